@@ -9,9 +9,9 @@ from typing import TYPE_CHECKING
 import configargparse
 from colorama import Fore
 
-from snail import proxy
+from snail import metrics, proxy
 
-from . import commands, multicli, tempconfigparser, tgbot, types
+from . import commands, memory, multicli, notifier, tempconfigparser, types
 
 if TYPE_CHECKING:
     import argparse
@@ -60,7 +60,13 @@ def build_parser() -> 'argparse.ArgumentParser':
         '--web3-rpc',
         type=commands.FileOrString,
         default='https://api.avax.network/ext/bc/C/rpc',
-        help='web3 http endpoint (value or path to file with value)',
+        help='web3 http endpoint(s), comma separated - requests are routed to the fastest healthy one (value or path to file with value)',
+    )
+    parser.add_argument(
+        '--web3-ws',
+        type=commands.FileOrString,
+        default=None,
+        help='web3 websocket endpoint, to be notified of new blocks (otherwise RPC is polled while waiting for transactions)',
     )
     parser.add_argument(
         '--web3-max-fee',
@@ -85,13 +91,77 @@ def build_parser() -> 'argparse.ArgumentParser':
         default=DEFAULT_GOTLS_PATH,
         help='Path to gotlsproxy binary to use',
     )
+    parser.add_argument(
+        '--gql-pool-size',
+        type=int,
+        default=10,
+        metavar='N',
+        help='Connections kept open to GraphQL endpoint, shared by all the wallets',
+    )
+    parser.add_argument(
+        '--gql-keepalive',
+        type=int,
+        default=60,
+        metavar='SECONDS',
+        help='TCP keep-alive idle time for GraphQL connections (0 to disable)',
+    )
+    parser.add_argument(
+        '--gql-max-concurrency',
+        type=int,
+        default=8,
+        metavar='N',
+        help='Maximum concurrent GraphQL requests, lowered (and raised back) adaptively when the API throttles (0 to disable)',
+    )
+    parser.add_argument(
+        '--gql-hedge',
+        type=float,
+        default=0,
+        metavar='FRACTION',
+        help='Resend slow mission race/snail queries (first reply wins), up to this fraction of extra requests (0 to disable)',
+    )
+    parser.add_argument(
+        '--tick-deadline',
+        type=int,
+        default=180,
+        metavar='SECONDS',
+        help='Maximum time a mission tick may spend in GraphQL/RPC calls, pending calls time out after that (0 to disable)',
+    )
+    parser.add_argument(
+        '--tls-impersonate',
+        action='store_true',
+        help='Impersonate browser TLS in-process (requires curl_cffi) instead of starting gotlsproxy',
+    )
+    parser.add_argument(
+        '--gotls-instances',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Number of gotlsproxy instances to spread GraphQL requests over',
+    )
+    parser.add_argument(
+        '--gotls-upstream',
+        action='append',
+        metavar='PROXY',
+        help='Upstream proxy for gotlsproxy instances (assigned round-robin if more than one), defaults to http(s)_proxy environment variable',
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='Serve metrics (Prometheus text format) on this local port',
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help='Trace memory allocations from startup (top allocators in /memory and metrics), otherwise started by /memory',
+    )
     parser.add_argument('--debug', action='store_true', help='Debug verbosity')
     parser.add_argument(
         '--notify',
         nargs=2,
         action=commands.StoreBotConfig,
         metavar=('TOKEN', 'CHAT_ID'),
-        default=tgbot.Notifier('', None),
+        default=notifier.BaseNotifier(None),
         help='Telegram bot token and target chat id to use for notifications (value or path to file with value)',
     )
     parser.add_argument(
@@ -186,17 +256,25 @@ def main(argv=None):
         logger.setLevel(logging.DEBUG)
         logger.debug('debug enabled')
 
-    # if no proxy is set and using official graphql, start gotlsproxy
-    if not args.proxy and isinstance(args.graphql_endpoint, commands.DefaultOption):
+    # if no proxy is set and using official graphql, start gotlsproxy (unless doing the TLS part in-process)
+    if not args.proxy and not args.tls_impersonate and isinstance(args.graphql_endpoint, commands.DefaultOption):
         logger.debug('starting proxy')
-        use_upstream_proxy = os.getenv('http_proxy') or os.getenv('https_proxy')
-        if use_upstream_proxy:
-            logger.warning('(upstream proxy %s)', use_upstream_proxy)
-        p = proxy.Proxy(args.gotls_bin, upstream_proxy=use_upstream_proxy)
+        upstream_proxies = args.gotls_upstream
+        if not upstream_proxies:
+            use_upstream_proxy = os.getenv('http_proxy') or os.getenv('https_proxy')
+            upstream_proxies = [use_upstream_proxy] if use_upstream_proxy else None
+        if upstream_proxies:
+            logger.warning('(upstream proxy %s)', ', '.join(upstream_proxies))
+        p = proxy.ProxyPool(args.gotls_bin, size=args.gotls_instances, upstream_proxies=upstream_proxies)
         p.start()
         atexit.register(p.stop)
-        logger.debug('proxy ready on %s', p.url())
-        args.graphql_endpoint = p.url()
+        logger.debug('proxy ready on %s', p)
+        args.graphql_endpoint = p
+
+    if args.trace_memory:
+        memory.start_tracing()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
 
     if args.tg_bot_owner is not None:
         args.notify.owner_chat_id = args.tg_bot_owner
@@ -1,28 +1,37 @@
 import argparse
+import contextlib
 import json
 import logging
+import random
 import time
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import cached_property
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
 import requests
 from colorama import Fore
 from tqdm import tqdm
 
-from scommon.decorators import cached_property_with_ttl
-from snail import VERSION, client
+from snail import VERSION, client, deadline, metrics, profiling
+from snail.gqlclient import priority, throttle
 from snail.gqlclient.types import Adaptation, Family, Gender, Race, Snail, _parse_datetime
 from snail.web3client import BOTTOM_BASE_FEE, DECIMALS
 
-from . import commands, templates, tgbot
+from . import commands, memory, planner, templates
 from .database import MissionLoop, WalletDB
-from .types import RaceCandidate, RaceJoin, Wallet
+from .helpers import LRUDict, cached_property_with_ttl
+from .notifier import escape_markdown
+from .planner import PlannedJoin
+from .types import PendingJoin, RaceCandidate, RaceJoin, Wallet
 from .utils import CachedSnailHistory, tx_fee, tznow
 
+if TYPE_CHECKING:
+    from . import tgbot
+    from .missions import MissionCoordinator, RaceWatcher, WatchChanges
+
 GENDER_COLORS = {
     Gender.MALE: Fore.BLUE,
     Gender.FEMALE: Fore.MAGENTA,
@@ -30,6 +39,23 @@ GENDER_COLORS = {
 }
 
 UNDEF = object()
+# seconds to wait for a pending (last spot) join receipt, same as default `wait_for_transaction_receipt`
+PENDING_JOIN_TIMEOUT = 120
+# maximum seconds to wait for a new block before checking pending receipts again
+PENDING_JOIN_POLL = 5
+# seconds after which the mission plan is refreshed, even if no join failed
+MISSION_PLAN_TTL = 30
+# seconds that wallet snapshots (for bot reports such as /stats and /inventory) are reused
+SNAPSHOT_TTL = 120
+# snails remembered (levels and mission cooldowns), least recently seen are forgotten
+SNAIL_CACHE_SIZE = 5000
+# snails kept in the tournament market cache, oldest updated are dropped
+TOURNAMENT_MARKET_CACHE_SIZE = 1000
+
+# ticks sampled by --profile-ticks
+PROFILED_TICKS = {'cmd_bot_tick_missions', 'cmd_bot_tick_other'}
+
+TICK_SECONDS = metrics.REGISTRY.histogram('snail_bot_tick_seconds', 'Bot tick duration', ('wallet', 'tick'))
 
 
 class CLI:
@@ -69,17 +95,32 @@ class CLI:
             gql_retry=args.retry if args.retry > 0 else None,
             web3_max_fee=args.web3_max_fee,
             web3_priority_fee=args.web3_priority_fee,
+            web3_ws=args.web3_ws,
+            gql_impersonate=args.tls_impersonate,
+            gql_pool_size=args.gql_pool_size,
+            gql_keepalive=args.gql_keepalive,
+            gql_max_concurrency=args.gql_max_concurrency,
+            gql_hedge=args.gql_hedge,
         )
         if graphql_endpoint:
             self.client.gql.url = graphql_endpoint
-        self.notifier: tgbot.Notifier = args.notify
+        self.notifier: 'tgbot.Notifier' = args.notify
         self._notify_mission_data = None
         self._notify_marketplace = {}
         self._notify_tournament = UNDEF
-        self._snail_mission_cooldown = {}
+        self._snail_mission_cooldown = LRUDict(capacity=SNAIL_CACHE_SIZE)
         self._snail_history = CachedSnailHistory(self)
-        self._snail_levels = {}
-        self._every_cache = {}
+        self._snail_levels = LRUDict(capacity=SNAIL_CACHE_SIZE)
+        self._every_cache = LRUDict(capacity=100)
+        # ids of all the snails (queueable or not) seen by last `mission_queueable_snails`
+        self._mission_snail_ids = set()
+        # snails left pending by last `join_missions`: waiting for a last spot (boosted or need tickets) or not
+        self._mission_pending_boosted = set()
+        self._mission_pending_normal = set()
+        memory.track('cli.snail_mission_cooldown', self, lambda c: c._snail_mission_cooldown)
+        memory.track('cli.snail_levels', self, lambda c: c._snail_levels)
+        memory.track('cli.every_cache', self, lambda c: c._every_cache)
+        memory.track('wallet_db.tournament_market_cache', self, lambda c: c.database.tournament_market_cache)
 
     @staticmethod
     def _now():
@@ -92,6 +133,18 @@ class CLI:
             return data['membership']['rank'] == 'LEADER'
         return False
 
+    @property
+    def mission_coordinator(self) -> Optional['MissionCoordinator']:
+        if self.multicli is None:
+            return None
+        return self.multicli.mission_coordinator
+
+    @property
+    def race_watcher(self) -> Optional['RaceWatcher']:
+        if self.multicli is None:
+            return None
+        return self.multicli.race_watcher
+
     @cached_property
     def masked_wallet(self):
         if self.owner[:2] != '0x':
@@ -146,6 +199,16 @@ class CLI:
             snail.id: snail for snail in self.client.iterate_all_snails(filters={'owner': self.owner}, more_stats=True)
         }
 
+    @cached_property_with_ttl(SNAPSHOT_TTL)
+    def mission_snails(self) -> dict[int, Snail]:
+        """snails as listed for missions (with `queueable_at`)"""
+        return {snail.id: snail for snail in self.client.iterate_my_snails_for_missions(self.owner)}
+
+    @cached_property_with_ttl(SNAPSHOT_TTL)
+    def inventory(self) -> dict[tuple, list]:
+        """inventory items grouped by (type, coef)"""
+        return self.cmd_inventory(verbose=False)
+
     def _breed_status_str(self, status):
         if status >= 0:
             if status >= 1:
@@ -230,8 +293,10 @@ class CLI:
         queueable = []
         closest = None
         resting = []
+        snail_ids = set()
 
         for x in self.client.iterate_my_snails_for_missions(self.owner, adaptations=race_conditions):
+            snail_ids.add(x.id)
             if self.args.exclude and x.id in self.args.exclude:
                 continue
             to_queue = x.queueable_at
@@ -251,6 +316,7 @@ class CLI:
                 if closest is None or to_queue < closest:
                     closest = to_queue
                 self.logger.debug(f"{Fore.YELLOW}{base_msg}{tleft}{Fore.RESET}")
+        self._mission_snail_ids = snail_ids
         return queueable, closest, resting
 
     def _join_missions_compute_boosted(self, queueable):
@@ -291,42 +357,65 @@ class CLI:
     def _notify(self, *args, **kwargs):
         return self.notifier.notify(*args, from_wallet=self.masked_wallet, **kwargs)
 
-    def _join_missions_race_snail(self, race, queueable: list[Snail], boosted):
-        athletes = len(race.athletes)
-        candidates = self.find_candidates(
-            race, queueable, include_zero=True, extra_sorting={snail.id: snail.slime_boost for snail in queueable}
-        )
-        for candidate in candidates:
-            score, snail = candidate.score, candidate.snail
-            if snail.slime_boost > 1 and self.args.sb_mission_matches:
-                mission_matches = self.args.sb_mission_matches
-            else:
-                mission_matches = self.args.mission_matches
-            # mission-matches only applies to lv15+
-            score_match = snail.level < 15 or mission_matches <= score
-            if athletes == 9:
-                # don't queue non-boosted!
-                # ignore required matches if "--no-adapt" (both for boosted and for need-tickets)
-                if snail.id in boosted and (score_match or self.args.no_adapt):
-                    break
-            else:
-                # don't queue boosted here, so they wait for a last spot
-                if snail.id not in boosted and score_match:
-                    break
+    def _join_missions_eligible(self, race, candidate: RaceCandidate, boosted) -> bool:
+        score, snail = candidate.score, candidate.snail
+        if snail.slime_boost > 1 and self.args.sb_mission_matches:
+            mission_matches = self.args.sb_mission_matches
         else:
-            # no snail for this track
-            return None
+            mission_matches = self.args.mission_matches
+        # mission-matches only applies to lv15+
+        score_match = snail.level < 15 or mission_matches <= score
+        if len(race.athletes) == 9:
+            # don't queue non-boosted!
+            # ignore required matches if "--no-adapt" (both for boosted and for need-tickets)
+            return snail.id in boosted and (score_match or self.args.no_adapt)
+        # don't queue boosted here, so they wait for a last spot
+        return snail.id not in boosted and score_match
+
+    def _join_missions_plan(self, missions, queueable: list[Snail], boosted, missions_done) -> list[PlannedJoin]:
+        extra_sorting = {snail.id: snail.slime_boost for snail in queueable}
+        races = []
+        for race in missions:
+            if race.id in missions_done:
+                continue
+            if race.participation:
+                # already joined
+                continue
+            if len(race.athletes) == 10:
+                # race full
+                continue
+            candidates = [
+                candidate
+                for candidate in self.find_candidates(race, queueable, include_zero=True, extra_sorting=extra_sorting)
+                if self._join_missions_eligible(race, candidate, boosted)
+            ]
+            races.append((race, candidates))
+        return planner.plan_missions(races, boosted)
+
+    def _mission_races(self) -> list[Race]:
+        """mission races, sorted by athletes (descending) - from the shared feed if running with multiple wallets"""
+        if self.mission_coordinator is None:
+            missions = list(self.client.iterate_mission_races(filters={'owner': self.owner}))
+        else:
+            missions = self.mission_coordinator.owner_races(self.owner, self._mission_snail_ids)
+        missions.sort(key=lambda race: len(race.athletes), reverse=True)
+        return missions
 
-        return snail
+    def _mission_joined(self, race, snail):
+        if self.mission_coordinator is not None:
+            self.mission_coordinator.joined(race.id, snail.id)
 
     def join_missions(self) -> MissionLoop:
-        missions = list(self.client.iterate_mission_races(filters={'owner': self.owner}))
-        missions.sort(key=lambda race: len(race.athletes), reverse=True)
+        missions = self._mission_races()
         queueable, closest, resting = self.mission_queueable_snails(
             race_conditions=[c.id for c in missions[0].conditions]
         )
+        if self.mission_coordinator is not None:
+            # participation is computed from owned snails, now loaded (no extra request, feed is cached)
+            missions = self._mission_races()
 
         ret = MissionLoop(status=MissionLoop.Status.DONE, next_at=closest, resting=len(resting))
+        self._mission_pending_boosted, self._mission_pending_normal = set(), set()
         if not queueable:
             if ret.next_at is None:
                 # no snails, check again in 5min
@@ -348,8 +437,9 @@ class CLI:
         def _slow_snail(snail, seconds=90):
             # add snail to cooldown, use 90 for now - check future logs if they still get locked
             self._snail_mission_cooldown[snail.id] = self._now() + timedelta(seconds=seconds)
-            # also remove from queueable (due to "continue")
-            queueable.remove(snail)
+            # also remove from queueable (due to "continue") - pending joins were already removed
+            if snail in queueable:
+                queueable.remove(snail)
             ret.resting += 1
             # update "closest" if needed
             if ret.next_at is not None and ret.next_at > self._snail_mission_cooldown[snail.id]:
@@ -362,40 +452,86 @@ class CLI:
         else:
             under_fee_spike = False
 
+        # last spot joins are submitted without waiting for the receipt, keep going with other races/snails
+        pending: list[PendingJoin] = []
+
+        def _reconcile_pending(block=False):
+            # joins were already sent, the tick deadline must not lose track of them
+            with deadline.lifted():
+                _reconcile_pending_lifted(block=block)
+
+        def _reconcile_pending_lifted(block=False):
+            while pending:
+                for p in list(pending):
+                    tx = self.client.web3.transaction_receipt(p.tx_hash)
+                    if tx is None:
+                        if time.monotonic() - p.submitted_at < PENDING_JOIN_TIMEOUT:
+                            continue
+                        # transaction timed out, so it very likely failed but we have no fee info, track separately...
+                        self.logger.error('Join contract timeout for %s on %d', p.snail.name, p.race.id)
+                        # never mined (or dropped), later transactions would queue behind its nonce
+                        self.client.web3.resync_nonce()
+                        _slow_snail(p.snail)
+                    elif tx['status'] == 1:
+                        cheap_tx = p.payload['payload']['size'] == 0
+                        self.logger.info(templates.render_mission_joined(p.snail, tx=tx, cheap=cheap_tx))
+                        self.notify_mission(
+                            templates.render_mission_joined(p.snail, tx=tx, cheap=cheap_tx, telegram=True)
+                        )
+                        self.database.joins_last.add((p.snail.id, p.race.id))
+                        self.database.save()
+                        ret.joined_last += 1
+                        if self.args.fee_spike and self.database.global_db.fee_spike_notified:
+                            # joined a last spot, reset fee spike notification
+                            self._notify('Fee spike is over 🥳')
+                            self.database.global_db.fee_spike_notified = False
+                            self.database.global_db.save()
+                    else:
+                        self.logger.error(templates.render_mission_joined_reverted(p.snail, tx))
+                        _slow_snail(p.snail)
+                    pending.remove(p)
+                if not block or not pending:
+                    break
+                self.client.web3.block_watcher.wait_for_block(timeout=PENDING_JOIN_POLL)
+
         missions_done = set()
+        plan: list[PlannedJoin] = []
+        planned_at = None
+        stale = False
         while True:
+            _reconcile_pending()
             # stop if there are no more snails in the queue
             if not queueable:
-                return ret
-            # refresh mission EVERY time
-            missions = list(self.client.iterate_mission_races(filters={'owner': self.owner}))
-            missions.sort(key=lambda race: len(race.athletes), reverse=True)
-            for race in missions:
-                # find one that hasn't been processed yet
-                if race.id not in missions_done:
-                    if race.participation:
-                        # already joined
-                        continue
-                    athletes = len(race.athletes)
-                    if athletes == 10:
-                        # race full
-                        continue
-                    missions_done.add(race.id)
-                    break
-            else:
-                # stop if there are no unprocessed races
                 break
-
-            if under_fee_spike:
-                boosted = set()
-            snail = self._join_missions_race_snail(race, queueable, boosted)
-            if snail is None:
+            if planned_at is not None and (not plan or stale or time.monotonic() - planned_at > MISSION_PLAN_TTL):
+                # plan is done, a join failed or races are outdated: refresh them (first plan uses initial fetch)
+                missions = self._mission_races()
+                plan = []
+            if not plan:
+                if under_fee_spike:
+                    boosted = set()
+                plan = self._join_missions_plan(missions, queueable, boosted, missions_done)
+                planned_at = time.monotonic()
+                stale = False
+                if not plan:
+                    # stop if there are no unprocessed races
+                    break
+                # next joins do not wait for signing
+                self.client.web3.presign_race_joins([(p.snail.id, p.race.id) for p in plan[1:]])
+
+            planned = plan.pop(0)
+            race, snail = planned.race, planned.snail
+            missions_done.add(race.id)
+            if self.mission_coordinator is not None and not self.mission_coordinator.claim(race.id, self.owner):
+                # another wallet is joining this race
                 continue
             self.logger.info(
                 f'{Fore.CYAN}Joining {race.id} ({len(race.athletes)} - {race.conditions}) with {snail.name_id} ({snail.adaptations}){Fore.RESET}'
             )
 
             tx = None
+            # any "continue" below means the join failed, refresh races before following the plan
+            stale = True
 
             # "boosted" includes explicitly boosted and the ones that need tickets
             # not_cheap will only include the explicitly boosted (and if --cheap is used)
@@ -413,7 +549,9 @@ class CLI:
                     except client.RequiresTransactionClientError as e:
                         r = e.args[1]
                         if r['payload']['size'] == 0:
-                            tx = self.client.rejoin_mission_races(r, priority_fee=self.args.mission_priority_fee)
+                            tx = self.client.rejoin_mission_races(
+                                r, priority_fee=self.args.mission_priority_fee, wait_for_transaction_receipt=False
+                            )
                         else:
                             self.logger.error('RACE NOT CHEAP - %s on %d', snail.name, race.id)
                             _slow_snail(snail)
@@ -425,6 +563,7 @@ class CLI:
                             race.id,
                             allow_last_spot=(snail.id in boosted),
                             priority_fee=self.args.mission_priority_fee,
+                            wait_for_transaction_receipt=False,
                         )
                     except client.RequiresTransactionClientError as e:
                         self.logger.error('TOO SLOW TO JOIN NON-LAST - %s on %d', snail.name, race.id)
@@ -449,7 +588,9 @@ class CLI:
                             _slow_snail(snail)
                             continue
 
-                        tx = self.client.rejoin_mission_races(r, priority_fee=self.args.mission_priority_fee)
+                        tx = self.client.rejoin_mission_races(
+                            r, priority_fee=self.args.mission_priority_fee, wait_for_transaction_receipt=False
+                        )
                         self.logger.info(templates.render_cheap_soon_join(snail, race))
 
                 if r.get('status') == 0:
@@ -458,29 +599,15 @@ class CLI:
                     self.database.joins_normal.add((snail.id, race.id))
                     self.database.save()
                     ret.joined_normal += 1
+                    self._mission_joined(race, snail)
                 elif r.get('status') == 1:
-                    if tx['status'] == 1:
-                        cheap_tx = r['payload']['size'] == 0
-                        self.logger.info(templates.render_mission_joined(snail, tx=tx, cheap=cheap_tx))
-                        self.notify_mission(
-                            templates.render_mission_joined(snail, tx=tx, cheap=cheap_tx, telegram=True)
-                        )
-                        self.database.joins_last.add((snail.id, race.id))
-                        self.database.save()
-                        ret.joined_last += 1
-                        if self.args.fee_spike and self.database.global_db.fee_spike_notified:
-                            # joined a last spot, reset fee spike notification
-                            self._notify('Fee spike is over 🥳')
-                            self.database.global_db.fee_spike_notified = False
-                            self.database.global_db.save()
-                    else:
-                        self.logger.error(templates.render_mission_joined_reverted(snail, tx))
-                        _slow_snail(snail)
-                        continue
+                    # `tx` is the hash, outcome is handled by `_reconcile_pending` once the receipt is available
+                    pending.append(PendingJoin(snail, race, r, tx, time.monotonic()))
+                    self._mission_joined(race, snail)
             except client.ClientError as e:
                 self.logger.exception('failed to join mission')
                 self._notify(
-                    f'⛔ `{snail.name_id}` FAILED to join mission: {tgbot.escape_markdown(str(e))}',
+                    f'⛔ `{snail.name_id}` FAILED to join mission: {escape_markdown(str(e))}',
                     chat_id=self.args.mission_chat_id,
                 )
             except client.gqlclient.NeedsToRestAPIError as e:
@@ -513,11 +640,6 @@ class CLI:
                     self.database.global_db.save()
                     under_fee_spike = True
                 continue
-            except client.web3client.exceptions.TimeExhausted:
-                # transaction timed out, so it very likely failed but we have no fee info, track separately...
-                self.logger.exception('Join contract timeout for %s on %d', snail.name, race.id)
-                _slow_snail(snail)
-                continue
             except client.web3client.exceptions.ContractLogicError as e:
                 # immediate contract errors, no fee paid
                 if 'Race already submitted' in str(e):
@@ -526,12 +648,17 @@ class CLI:
                     continue
                 raise
 
+            stale = False
             # remove snail from queueable (as it is no longer available)
             queueable.remove(snail)
 
+        _reconcile_pending(block=True)
         if queueable:
             self.logger.info(f'{len(queueable)} without matching race')
         ret.pending = len(queueable)
+        self._mission_pending_boosted = {snail.id for snail in queueable if snail.id in boosted}
+        self._mission_pending_normal = {snail.id for snail in queueable if snail.id not in boosted}
+        ret.pending_boosted = len(self._mission_pending_boosted)
         return ret
 
     def _balance(self, data=None):
@@ -629,6 +756,7 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
         else:
             raise Exception(r)
 
+    @priority.lane(priority.Priority.BACKGROUND)
     def _bot_marketplace(self):
         d = self.client.marketplace_stats()
         n = False
@@ -705,6 +833,7 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
                 snail['family'] = str(family)
                 yield snail, score, w
 
+    @priority.lane(priority.Priority.BACKGROUND)
     def _bot_tournament_market(self):
         data = self.client.tournament(self.owner)
         conditions = {tuple(week.ordered_conditions): week.week for week in data.weeks}
@@ -721,6 +850,8 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
                 continue
 
             matches.append(templates.render_tournament_market_found(snail, w, score, cached_price=cached_price))
+            # re-insert to keep it ordered by last update
+            self.database.tournament_market_cache.pop(snail.id, None)
             self.database.tournament_market_cache[snail.id] = (snail.market_price, score == 1, w)
 
         changes = False
@@ -733,6 +864,11 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
             self._notify('Tournament market snails gone:\n' + '\n'.join(f'Snail #{x}' for x in snails_gone))
             for s in snails_gone:
                 del self.database.tournament_market_cache[s]
+        overflow = len(self.database.tournament_market_cache) - TOURNAMENT_MARKET_CACHE_SIZE
+        if overflow > 0:
+            changes = True
+            for s in list(self.database.tournament_market_cache)[:overflow]:
+                del self.database.tournament_market_cache[s]
         if changes:
             self.database.save()
 
@@ -823,6 +959,12 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
     @commands.argument(
         '--data-dir', type=Path, help='Directory to persist data (settings changes over telegram, cache, etc)'
     )
+    @commands.argument(
+        '--db-backend',
+        choices=['json', 'sqlite'],
+        default='json',
+        help='Bot state storage in --data-dir: one JSON file per wallet or a single SQLite database (db.sqlite, existing JSON files are imported on first use)',
+    )
     @commands.argument(
         '--cheap',
         action='store_true',
@@ -927,6 +1069,12 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
         default=5,
         help='Priority fee to be used for time-sensitive transactions (such as joining last spots) - percentage of current gas price',
     )
+    @commands.argument(
+        '--profile-ticks',
+        type=float,
+        metavar='FRACTION',
+        help='Profile this fraction of bot ticks (1 for all, calls made in worker threads included), logging the slowest functions and saving the profiles in --data-dir',
+    )
     @commands.command()
     def cmd_bot(self):
         """
@@ -1045,6 +1193,7 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
                         data[guild_id][b['type'][6:]] = b['level']
         return data
 
+    @priority.lane(priority.Priority.BACKGROUND)
     def _cmd_tournament_preview_guild_drinks_at(self, guilds, date):
         guilds = list(guilds)
         latest_data = self._cmd_tournament_preview_guild_drinks_latest(guilds)
@@ -1277,29 +1426,40 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
         self._every_cache[func.__name__] = self._now() + timedelta(hours=hours, minutes=minutes, seconds=seconds)
 
     def cmd_bot_tick(self):
-        w1 = self._cmd_bot_tick_exception_handler(self._cmd_bot_tick_missions)
+        w1 = self._cmd_bot_tick_exception_handler(self._cmd_bot_tick_missions, self.args.tick_deadline)
+        # background jobs (such as the tournament market scan) take longer than a mission tick, no deadline
         w2 = self._cmd_bot_tick_exception_handler(self._cmd_bot_tick_other)
         return w1 or w2
 
-    def _cmd_bot_tick_exception_handler(self, m):
+    def _profile_tick(self, tick: str):
+        """profiler for a sample (--profile-ticks) of the mission/other ticks"""
+        fraction = getattr(self.args, 'profile_ticks', None)
+        if not fraction or tick not in PROFILED_TICKS or random.random() >= fraction:
+            return contextlib.nullcontext()
+        directory = self.args.data_dir / 'profiles' if self.args.data_dir else None
+        return profiling.profile(f'{self.masked_wallet}-{tick}', directory)
+
+    def _cmd_bot_tick_exception_handler(self, m, tick_deadline: Optional[int] = None):
         try:
-            return m()
+            # hard upper bound for every GraphQL/RPC call made in the tick (if any)
+            tick = getattr(m, '__name__', 'tick').strip('_')
+            with deadline.deadline(tick_deadline or None), TICK_SECONDS.time(self.masked_wallet, tick):
+                with self._profile_tick(tick):
+                    return m()
+        except client.gqlclient.requests.exceptions.Timeout as e:
+            self.logger.warning('tick timed out, waiting 20s: %s', e)
+            return 20
         except client.gqlclient.requests.exceptions.HTTPError as e:
+            # the shared throttle already slows down every client, only honour what the API asks for
+            retry_after = throttle.parse_retry_after(e.response.headers)
             if e.response.status_code in (502, 504):
                 # log stacktrace to check if specific calls cause this more frequently
                 self.logger.exception('site %d... waiting', e.response.status_code)
-                return 20
+                return retry_after or 20
 
             if e.response.status_code == 429:
-                # FIXME: handle retry-after header after checking it out
-                # should not happen as requests retry adapter handles this?
-                self.logger.exception(
-                    'site %d... waiting: %s - %s',
-                    e.response.status_code,
-                    e.response.headers,
-                    type(e.response.headers.get('retry-after')),
-                )
-                return 120
+                self.logger.warning('site %d... waiting %ss', e.response.status_code, retry_after or 20)
+                return retry_after or 20
 
             self.logger.exception('crash, waiting 2min: %s', e)
             return 120
@@ -1314,7 +1474,7 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
                 self._notify(
                     f'''bot unknown error, check logs
 ```
-{tgbot.escape_markdown(str(e))}
+{escape_markdown(str(e))}
 ```
 '''
                 )
@@ -1329,13 +1489,20 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
         now = self._now()
         if (
             self.database.mission_loop.status == MissionLoop.Status.UNKNOWN
-            or self.database.mission_loop.pending
+            # with a race watcher, pending snails are woken up by `mission_watch_wakeup`
+            or (self.database.mission_loop.pending and self.race_watcher is None)
             # FIXME: can it be None with status !UNKNOWN?!
             or self.database.mission_loop.next_at is None
             or self.database.mission_loop.next_at < now
         ):
             self.database.mission_loop.status = MissionLoop.Status.PROCESSING
+            self.client.gql.prewarm()
             self.database.mission_loop = self.join_missions()
+            if self.database.mission_loop.pending and self.race_watcher is not None:
+                # re-check anyway if the watcher does not wake it up before
+                fallback = now + timedelta(seconds=self.race_watcher.max_interval)
+                if self.database.mission_loop.next_at is None or self.database.mission_loop.next_at > fallback:
+                    self.database.mission_loop.next_at = fallback
             if self.database.mission_loop.pending:
                 msg = f'{self.database.mission_loop.pending} pending'
             elif self.database.mission_loop.status == MissionLoop.Status.NO_SNAILS:
@@ -1344,6 +1511,27 @@ AVAX: {r['AVAX']:.3f} / SNAILS: {r['SNAILS']}'''
                 msg = str(self.database.mission_loop.next_at)
             self.logger.info('next mission in at %s', msg)
 
+    def mission_watch_wakeup(self, changes: 'WatchChanges'):
+        """run mission loop in the next tick if any of the pending snails can use the watched changes"""
+        loop = self.database.mission_loop
+        if (changes.last_spots and loop.pending_boosted) or (changes.new_races and loop.pending > loop.pending_boosted):
+            self.logger.debug('mission watcher: %s', changes)
+            loop.next_at = self._now()
+            # sign join payloads (and open GraphQL connections) while waiting for the tick
+            self.client.gql.prewarm()
+            races = {race.id: race for race in changes.last_spots + changes.new_races}
+            # only the pending snails the planner may join to each race (see `_join_missions_eligible`)
+            self.client.web3.presign_race_joins(
+                [
+                    (snail_id, race.id)
+                    for race in races.values()
+                    for snail_id in (
+                        self._mission_pending_boosted if len(race.athletes) == 9 else self._mission_pending_normal
+                    )
+                    if snail_id not in race.athletes
+                ]
+            )
+
     def _cmd_bot_tick_other(self):
         if self.args.paused:
             return
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from typing import Optional
@@ -8,6 +9,7 @@ from pydantic.functional_serializers import PlainSerializer
 from typing_extensions import Annotated
 
 from .helpers import PersistingBaseModel, SetQueue
+from .sqlitedb import IMPORTED_AT, SqliteStore
 
 
 def dictToSetQueue(x):
@@ -32,6 +34,8 @@ class MissionLoop:
     joined_normal: int = 0
     joined_last: int = 0
     pending: int = 0
+    # pending snails that are boosted (or need tickets), waiting for a last spot
+    pending_boosted: int = 0
     resting: int = 0
     status: Status = Status.UNKNOWN
     next_at: Optional[AwareDatetime] = None
@@ -56,8 +60,8 @@ class WalletDB(PersistingBaseModel):
     global_db: 'GlobalDB' = Field(default_factory=lambda: GlobalDB(), exclude=True)
 
     @classmethod
-    def load_from_file(cls, filename: Path):
-        obj = super().load_from_file(filename)
+    def load_from_file(cls, filename: Path, journal: bool = False):
+        obj = super().load_from_file(filename, journal=journal)
         # FIXME remove these datafix during Jan2024 (after running in all bot instances)
         changed = False
         to_del = {x for x in obj.joins_normal if isinstance(x, str)}
@@ -90,17 +94,57 @@ class GlobalDB(PersistingBaseModel):
             w.save_file = None if not self.save_file else self.save_file.with_stem(f'db-{k}')
         return self
 
+    @classmethod
+    def load_from_sqlite(cls, filename: Path) -> 'GlobalDB':
+        """
+        load from (single) SQLite database `filename`, instead of one JSON file per wallet
+        if it is a new database, existing JSON files in the same directory (`db.json` and `db-*.json`) are imported
+        """
+        store = SqliteStore(filename)
+        if store.is_empty():
+            cls._import_json(store, filename.with_suffix('.json'))
+        return cls(**store.load('')).use_store(store, '')
+
+    @classmethod
+    def _import_json(cls, store: SqliteStore, json_file: Path):
+        if not json_file.exists():
+            return
+        # lifetime totals, not won "now"
+        store.save('', cls.load_from_file(json_file).model_dump(mode='json'), at=IMPORTED_AT)
+        prefix = f'{json_file.stem}-'
+        for f in json_file.parent.glob(f'{prefix}*{json_file.suffix}'):
+            store.save(f.stem[len(prefix) :], WalletDB.load_from_file(f).model_dump(mode='json'), at=IMPORTED_AT)
+
     def add_wallet(self, owner):
         if owner not in self.wallets:
-            if self.save_file:
-                self.wallets[owner] = WalletDB.load_from_file(self.save_file.with_stem(f'db-{owner}'))
+            if self._store is not None:
+                self.wallets[owner] = WalletDB(**self._store.load(owner), global_db=self).use_store(self._store, owner)
+            elif self.save_file:
+                self.wallets[owner] = WalletDB.load_from_file(
+                    self.save_file.with_stem(f'db-{owner}'), journal=self._journal
+                )
                 self.wallets[owner].global_db = self
             else:
                 self.wallets[owner] = WalletDB(global_db=self)
         return self.wallets[owner]
 
+    def flush_all(self):
+        """write debounced saves of this and every wallet database"""
+        self.flush()
+        for w in self.wallets.values():
+            w.flush()
+
+    def compact_all(self):
+        """compact this and every wallet database (such as before exiting)"""
+        self.compact()
+        for w in self.wallets.values():
+            w.compact()
+
     def total_slime_won(self) -> tuple[float, float, float]:
         """aggregates totals of every wallet and returns tuple with: total, total_last, total_normal"""
+        if self._store is not None:
+            totals = self._store.rewards(owners=self.wallets)
+            return totals['slime_won'], totals['slime_won_last'], totals['slime_won_normal']
         total = 0
         total_last = 0
         total_normal = 0
@@ -109,3 +153,10 @@ class GlobalDB(PersistingBaseModel):
             total_last += w.slime_won_last
             total_normal += w.slime_won_normal
         return total, total_last, total_normal
+
+    def slime_won_since(self, since: datetime) -> Optional[tuple[float, float, float]]:
+        """same as `total_slime_won` but only since `since` - only available with SQLite (None otherwise)"""
+        if self._store is None:
+            return None
+        totals = self._store.rewards(owners=self.wallets, since=since.timestamp())
+        return totals['slime_won'], totals['slime_won_last'], totals['slime_won_normal']
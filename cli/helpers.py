@@ -1,7 +1,25 @@
 import json
+import logging
+import os
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from scommon import decorators
+from snail import metrics
+
+# journal entries (or seconds) after which a journaled model is compacted into a full snapshot
+JOURNAL_COMPACT_ENTRIES = 100
+JOURNAL_COMPACT_SECONDS = 300
+# saves of a journaled model within this many seconds of its last journal write are coalesced into the next one
+JOURNAL_FLUSH_SECONDS = 1
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = metrics.REGISTRY.counter('snail_cache_requests_total', 'Cache lookups', ('cache', 'result'))
 
 
 class SetQueue(dict):
@@ -41,27 +59,289 @@ class SetQueue(dict):
         return super(self).to_dict()
 
 
+class LRUDict(OrderedDict):
+    """
+    dict keeping up to `capacity` items, evicting the least recently used (read or written) first,
+    and dropping items written more than `ttl` seconds ago (if set)
+
+    >>> d = LRUDict(capacity=2)
+    >>> d[1] = 'a'; d[2] = 'b'; d[1]; d[3] = 'c'
+    'a'
+    >>> list(d.items())
+    [(1, 'a'), (3, 'c')]
+    """
+
+    def __init__(self, capacity: int = 1000, ttl: Optional[float] = None):
+        super().__init__()
+        self.capacity = capacity
+        self.ttl = ttl
+        self._expires = {}
+
+    def _expired(self, key) -> bool:
+        at = self._expires.get(key)
+        if at is not None and at <= time.monotonic():
+            del self[key]
+            return True
+        return False
+
+    def __getitem__(self, key):
+        if self._expired(key):
+            raise KeyError(key)
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return super().__contains__(key) and not self._expired(key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+            self.expire()
+        while len(self) > self.capacity:
+            del self[next(iter(self))]
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._expires.pop(key, None)
+
+    def pop(self, key, *default):
+        self._expires.pop(key, None)
+        return super().pop(key, *default)
+
+    def clear(self):
+        super().clear()
+        self._expires.clear()
+
+    def expire(self):
+        """drop every expired item (they are otherwise only dropped when looked up)"""
+        now = time.monotonic()
+        for key in [k for k, at in self._expires.items() if at <= now]:
+            del self[key]
+
+
+class cached_property_with_ttl(decorators.cached_property_with_ttl):
+    """`scommon.decorators.cached_property_with_ttl` counting hits and misses in `snail_cache_requests_total`"""
+
+    def _record(self, hit: bool):
+        CACHE_REQUESTS.inc(self.name, 'hit' if hit else 'miss')
+
+
+def atomic_write_text(path: Path, data: str):
+    """write to a temporary file and rename it, so `path` is never left half-written (not even on power loss)"""
+    tmp = path.with_name(f'.{path.name}.tmp')
+    with tmp.open('w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # and the rename, before anything relying on it (such as discarding a journal)
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# journal entry key for lists changed only by dropping items from the start and appending others (SetQueue fields)
+JOURNAL_EXTEND = '$extend'
+
+
+def _list_delta(old, new) -> Optional[tuple[int, list]]:
+    """
+    (items dropped from the start, items appended) that turn list `old` into `new`, None if that is not the change
+
+    >>> _list_delta([1, 2, 3], [2, 3, 4, 5])
+    (1, [4, 5])
+    >>> _list_delta([1, 2, 3], [1, 3, 2]) is None
+    True
+    """
+    if not isinstance(old, list) or not isinstance(new, list) or not new:
+        return None
+    try:
+        drop = old.index(new[0])
+    except ValueError:
+        return None
+    kept = len(old) - drop
+    if new[:kept] != old[drop:]:
+        return None
+    return drop, new[kept:]
+
+
 class PersistingBaseModel(BaseModel):
+    """
+    Model persisted as JSON in `save_file`.
+    With `journal` enabled, `save` only appends the changes to `<save_file>.journal` (changed fields and,
+    for lists only trimmed and appended to, such as SetQueue fields, just the items added) and the full snapshot is rewritten (compacted) every JOURNAL_COMPACT_ENTRIES saves or JOURNAL_COMPACT_SECONDS.
+    Saves within JOURNAL_FLUSH_SECONDS of the last journal write only mark it dirty, the changes are written by the
+    next save after that, `flush` or `compact`.
+    """
+
     save_file: Path = Field(default=None, exclude=True)
 
+    _journal: bool = PrivateAttr(False)
+    # last persisted state (snapshot + journal)
+    _saved: Optional[dict] = PrivateAttr(None)
+    _journal_entries: int = PrivateAttr(0)
+    _compacted_at: float = PrivateAttr(default_factory=time.monotonic)
+    _flushed_at: float = PrivateAttr(0.0)
+    # saved (debounced) but not written yet
+    _dirty: bool = PrivateAttr(False)
+    # SqliteStore (and key) used instead of save_file, see `use_store`
+    _store: Any = PrivateAttr(None)
+    _store_key: Optional[str] = PrivateAttr(None)
+
+    @staticmethod
+    def journal_file(filename: Path) -> Path:
+        return filename.with_name(f'{filename.name}.journal')
+
+    @staticmethod
+    def _apply_entry(data: dict, entry: dict):
+        for k, v in entry.items():
+            if k == JOURNAL_EXTEND:
+                for field, (drop, added) in v.items():
+                    data[field] = data.get(field, [])[drop:] + added
+            else:
+                data[k] = v
+
     @classmethod
-    def load_from_file(cls, filename: Path):
-        if not filename.exists():
-            # all good, create file whenever save is called
-            return cls(save_file=filename)
-        raw_data = filename.read_text()
-        if not raw_data:
+    def _replay_journal(cls, filename: Path, data: dict, repair: bool = False) -> int:
+        """
+        apply journal entries to `data`, up to the first incomplete one (crash while writing)
+        with `repair`, the journal is truncated there, otherwise the next entry appended would be merged with it
+        """
+        journal = cls.journal_file(filename)
+        if not journal.exists():
+            return 0
+        raw = journal.read_bytes()
+        entries = 0
+        offset = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            cls._apply_entry(data, entry)
+            offset += len(line)
+            entries += 1
+        if repair and offset < len(raw):
+            logger.warning('dropping incomplete entries from %s (%d bytes)', journal, len(raw) - offset)
+            with journal.open('r+b') as f:
+                f.truncate(offset)
+        return entries
+
+    @classmethod
+    def load_from_file(cls, filename: Path, journal: bool = False):
+        data = {}
+        if filename.exists():
+            raw_data = filename.read_text()
             # empty file is also ok
-            data = {}
-        else:
-            data = json.loads(raw_data)
+            if raw_data:
+                data = json.loads(raw_data)
+        # else: all good, create file whenever save is called
+        # only the one journaling repairs it, others (such as CLI commands) may load while it is being written
+        entries = cls._replay_journal(filename, data, repair=journal)
         data['save_file'] = filename
-        return cls(**data)
+        obj = cls(**data)
+        obj._journal = journal
+        obj._journal_entries = entries
+        if journal:
+            obj._saved = obj.model_dump(mode='json')
+        return obj
+
+    def _changes(self) -> dict:
+        """fields changed since last save"""
+        data = self.model_dump(mode='json')
+        if self._saved is None:
+            return data
+        return {k: v for k, v in data.items() if self._saved.get(k) != v}
+
+    def _journal_entry(self, changes: dict) -> dict:
+        """`changes` as a journal entry: lists only trimmed and appended to are journaled as such"""
+        entry = {}
+        extended = {}
+        for k, v in changes.items():
+            delta = _list_delta(self._saved.get(k), v)
+            if delta is None:
+                entry[k] = v
+            else:
+                extended[k] = delta
+        if extended:
+            entry[JOURNAL_EXTEND] = extended
+        return entry
+
+    def use_store(self, store, key: str):
+        """persist (changes) in `store` (a `sqlitedb.SqliteStore`) under `key`, instead of `save_file`"""
+        self._store = store
+        self._store_key = key
+        self._saved = self.model_dump(mode='json')
+        return self
+
+    def compact(self) -> bool:
+        """write full snapshot (atomically) and discard the journal"""
+        if self._store is not None:
+            # nothing to compact
+            return True
+        if self.save_file is None:
+            return False
+        data = self.model_dump(mode='json')
+        atomic_write_text(self.save_file, json.dumps(data))
+        self.journal_file(self.save_file).unlink(missing_ok=True)
+        self._saved = data
+        self._journal_entries = 0
+        self._compacted_at = time.monotonic()
+        self._dirty = False
+        return True
+
+    def flush(self) -> bool:
+        """write the changes of debounced saves (if any) to the journal"""
+        if not self._dirty:
+            return True
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        changes = self._changes()
+        if not changes:
+            return True
+        with self.journal_file(self.save_file).open('a') as f:
+            f.write(json.dumps(self._journal_entry(changes)) + '\n')
+        self._saved.update(changes)
+        self._journal_entries += 1
+        if (
+            self._journal_entries >= JOURNAL_COMPACT_ENTRIES
+            or time.monotonic() - self._compacted_at > JOURNAL_COMPACT_SECONDS
+        ):
+            self.compact()
+        return True
 
     def save(self, to: Path = None) -> bool:
+        if to is None and self._store is not None:
+            changes = self._changes()
+            if changes:
+                self._store.save(self._store_key, changes, self._saved)
+                self._saved.update(changes)
+            return True
         if to is None:
             to = self.save_file
         if to is None:
             return False
-        to.write_text(self.model_dump_json())
-        return True
+        if to != self.save_file:
+            atomic_write_text(to, self.model_dump_json())
+            return True
+        if not self._journal:
+            return self.compact()
+        self._dirty = True
+        if time.monotonic() - self._flushed_at < JOURNAL_FLUSH_SECONDS:
+            # debounced, nothing dumped nor written yet
+            return True
+        return self.flush()
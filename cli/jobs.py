@@ -0,0 +1,182 @@
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from snail import profiling
+
+logger = logging.getLogger(__name__)
+
+# long-running bot commands executed at the same time (the bot loop runs apart, in the main thread)
+JOB_WORKERS = 3
+# jobs of the same kind allowed to run at the same time, unless specified in `limits`
+JOB_LIMIT = 1
+# per-wallet calls made at the same time by `fanout` (GraphQL rate limit, if any, still applies)
+FANOUT_WORKERS = 8
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLimitReached(Exception):
+    pass
+
+
+@dataclass(eq=False)
+class Job:
+    id: int
+    kind: str
+    description: str
+    created: float = field(default_factory=time.monotonic)
+    # running in a worker (not inline)
+    background: bool = False
+    future: Optional[Future] = None
+    # called once the job is over (such as to remove its cancel button from the last progress message)
+    on_done: Optional[Callable[[], Any]] = field(default=None, repr=False)
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.created
+
+    def cancel(self):
+        """request cancellation, job stops at its next `checkpoint`"""
+        self._cancel.set()
+
+    def checkpoint(self):
+        if self.cancelled:
+            raise JobCancelled(self)
+
+
+_current: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar('job', default=None)
+
+
+def current() -> Optional[Job]:
+    """job running in this thread, if any"""
+    return _current.get()
+
+
+def checkpoint():
+    """raise `JobCancelled` if the current job (if any) was cancelled - call it between steps of a job"""
+    job = current()
+    if job is not None:
+        job.checkpoint()
+
+
+def fanout(fn: Callable, items: Iterable, max_workers: int = FANOUT_WORKERS) -> Iterator[tuple[Any, Any, Any]]:
+    """
+    call `fn(item)` for every item concurrently, yielding `(item, result, exception)` as each one completes
+    (calls run in the current job, so a cancelled one stops consuming and drops the pending calls)
+
+    >>> sorted(r for _, r, _ in fanout(lambda x: x * 2, [1, 2, 3]))
+    [2, 4, 6]
+    """
+    items = list(items)
+    if not items:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='fanout')
+    try:
+        futures = {executor.submit(contextvars.copy_context().run, profiling.run, fn, item): item for item in items}
+        for future in as_completed(futures):
+            checkpoint()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            yield futures[future], result, error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class JobQueue:
+    """
+    Bounded worker pool for long-running commands, with a concurrency limit per job kind.
+    Until `start` is called, jobs run inline (in the caller thread).
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, limits: Optional[dict[str, int]] = None):
+        self.max_workers = max_workers
+        self.limits = limits or {}
+        self._jobs: dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+
+    def stop(self):
+        """cancel every job and release the workers (without waiting for them)"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            for job in self._jobs.values():
+                job.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def submit(self, kind: str, fn: Callable, *args, description: Optional[str] = None, **kwargs) -> Job:
+        """
+        queue `fn(*args, **kwargs)` as a job of `kind`
+        raises JobLimitReached if there are already as many jobs of `kind` as allowed
+        """
+        with self._lock:
+            limit = self.limits.get(kind, JOB_LIMIT)
+            if sum(1 for j in self._jobs.values() if j.kind == kind) >= limit:
+                raise JobLimitReached(kind)
+            job = Job(next(self._ids), kind, description or kind, background=self._executor is not None)
+            self._jobs[job.id] = job
+            executor = self._executor
+        if executor is None:
+            self._run(job, fn, args, kwargs)
+        else:
+            job.future = executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict[str, Any]):
+        token = _current.set(job)
+        try:
+            # cancelled while still queued
+            job.checkpoint()
+            return fn(*args, **kwargs)
+        except JobCancelled:
+            logger.info('job %s (%d) cancelled', job.description, job.id)
+        finally:
+            _current.reset(token)
+            if job.on_done is not None:
+                try:
+                    job.on_done()
+                except Exception:
+                    logger.exception('job %s (%d) clean up failed', job.description, job.id)
+            with self._lock:
+                self._jobs.pop(job.id, None)
@@ -0,0 +1,108 @@
+"""
+Memory report: resident size of the process, entries held by the long-lived structures (caches, dedup sets)
+and, once allocation tracing is on (`start_tracing`), the top allocators by source line.
+"""
+
+import linecache
+import os
+import threading
+import tracemalloc
+import weakref
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from snail import metrics
+
+# allocators listed in the report (only there: snapshots are too expensive for every metrics scrape)
+TOP = 10
+# frames stored per traced allocation (1 is enough to group by line, and the cheapest)
+FRAMES = 1
+
+_tracked: list[tuple[str, weakref.ref, Callable[[Any], Any]]] = []
+_tracked_lock = threading.Lock()
+
+
+def track(name: str, owner: Any, getter: Callable[[Any], Any]):
+    """
+    report the size of `getter(owner)` as `name` (added up over every owner with the same name)
+    while `owner` is alive - it is only weakly referenced
+    """
+    with _tracked_lock:
+        _tracked.append((name, weakref.ref(owner), getter))
+
+
+def sizes() -> dict[str, int]:
+    """entries held by every tracked structure, by name"""
+    with _tracked_lock:
+        _tracked[:] = [t for t in _tracked if t[1]() is not None]
+        tracked = list(_tracked)
+    totals = defaultdict(int)
+    for name, ref, getter in tracked:
+        owner = ref()
+        if owner is not None:
+            totals[name] += len(getter(owner))
+    return dict(totals)
+
+
+def rss() -> Optional[int]:
+    """resident memory of the process in bytes, None where /proc is not available"""
+    try:
+        pages = int(Path('/proc/self/statm').read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def start_tracing() -> bool:
+    """start tracing allocations (made from now on), False if it already was"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(FRAMES)
+    return True
+
+
+def top_allocators(limit: int = TOP) -> list[tuple[str, int, int]]:
+    """(source line, bytes, blocks) allocated and still alive, biggest first - empty if not tracing"""
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        )
+    )
+    top = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        top.append((f'{frame.filename}:{frame.lineno}', stat.size, stat.count))
+    return top
+
+
+def traced() -> tuple[int, int]:
+    """(current, peak) bytes traced, zeros if not tracing"""
+    return tracemalloc.get_traced_memory()
+
+
+def _rss():
+    value = rss()
+    return {} if value is None else {(): value}
+
+
+def _traced():
+    if not tracemalloc.is_tracing():
+        return {}
+    current, peak = traced()
+    return {('current',): current, ('peak',): peak}
+
+
+metrics.REGISTRY.callback('snail_memory_rss_bytes', 'Resident memory of the process', _rss)
+metrics.REGISTRY.callback(
+    'snail_memory_structure_entries',
+    'Entries held by long-lived caches and sets',
+    lambda: {(k,): v for k, v in sizes().items()},
+    ('structure',),
+)
+metrics.REGISTRY.callback('snail_memory_traced_bytes', 'Memory traced by tracemalloc', _traced, ('kind',))
@@ -0,0 +1,185 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from snail import client
+from snail.gqlclient.types import Race
+
+logger = logging.getLogger(__name__)
+
+# seconds the shared mission race list is re-used by all wallets
+MISSION_FEED_TTL = 5
+# poll interval boundaries (seconds) of RaceWatcher
+RACE_WATCH_MIN_INTERVAL = 2
+RACE_WATCH_MAX_INTERVAL = 60
+
+
+class MissionCoordinator:
+    """
+    Shared mission race feed for all the wallets of a MultiCLI:
+    * race list is fetched once per refresh (instead of once per wallet)
+    * participation is computed per owner, from the race athletes
+    * races are claimed by one wallet per refresh, so wallets do not target the same race
+    """
+
+    def __init__(self, client: 'client.Client', ttl: float = MISSION_FEED_TTL):
+        self.client = client
+        self.ttl = ttl
+        self._races: list[Race] = []
+        self._fetched_at: Optional[float] = None
+        # race id => owner
+        self._claims: dict[int, str] = {}
+
+    def invalidate(self):
+        self._fetched_at = None
+
+    def refresh(self) -> list[Race]:
+        self.invalidate()
+        return self.races()
+
+    def races(self) -> list[Race]:
+        """shared race list, refreshed if older than `ttl`"""
+        if self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl:
+            self._races = list(self.client.iterate_mission_races())
+            self._fetched_at = time.monotonic()
+            # new race state, new assignments
+            self._claims = {}
+        return self._races
+
+    def owner_races(self, owner: str, snail_ids: set[int]) -> list[Race]:
+        """
+        races available to `owner` (owned by `snail_ids`), with `participation` set for that owner
+        races claimed by other wallets are left out
+        """
+        races = []
+        for race in self.races():
+            if self._claims.get(race.id, owner) != owner:
+                continue
+            races.append(
+                Race(race, athletes=list(race.athletes), participation=bool(snail_ids.intersection(race.athletes)))
+            )
+        return races
+
+    def claim(self, race_id: int, owner: str) -> bool:
+        """claim race for `owner`, returns False if it's already claimed by another wallet"""
+        if self._claims.setdefault(race_id, owner) != owner:
+            return False
+        return True
+
+    def joined(self, race_id: int, snail_id: int):
+        """update shared race state after a join, so other wallets see the new athlete count"""
+        for race in self._races:
+            if race.id == race_id:
+                if snail_id not in race.athletes:
+                    race.athletes.append(snail_id)
+                break
+
+
+@dataclass
+class RaceWatch:
+    athletes: int
+    seen_at: float
+    # athletes per second (EWMA)
+    rate: Optional[float] = None
+
+
+@dataclass
+class WatchChanges:
+    # races that just reached 9 athletes
+    last_spots: list[Race] = field(default_factory=list)
+    # races not seen before
+    new_races: list[Race] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.last_spots or self.new_races)
+
+
+class RaceWatcher:
+    """
+    Polls mission races with an adaptive interval, learning the fill rate of each race:
+    polls often when a race is close to its last spot (9 athletes) and backs off when none is
+    """
+
+    LAST_SPOT = 9
+    # EWMA weight of the latest fill rate sample
+    ALPHA = 0.3
+
+    def __init__(
+        self,
+        fetch: Callable[[], list[Race]],
+        min_interval: float = RACE_WATCH_MIN_INTERVAL,
+        max_interval: float = RACE_WATCH_MAX_INTERVAL,
+    ):
+        self.fetch = fetch
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._races: dict[int, RaceWatch] = {}
+        # fill rate of all races, used for races without history
+        self._rate: Optional[float] = None
+        self._next_poll = 0.0
+
+    def _rate_sample(self, watch: RaceWatch, athletes: int, now: float):
+        elapsed = now - watch.seen_at
+        if elapsed <= 0:
+            return
+        sample = max(0, athletes - watch.athletes) / elapsed
+        watch.rate = sample if watch.rate is None else self.ALPHA * sample + (1 - self.ALPHA) * watch.rate
+        self._rate = sample if self._rate is None else self.ALPHA * sample + (1 - self.ALPHA) * self._rate
+
+    def observe(self, races: list[Race], now: Optional[float] = None) -> WatchChanges:
+        if now is None:
+            now = time.monotonic()
+        changes = WatchChanges()
+        watched = {}
+        for race in races:
+            athletes = len(race.athletes)
+            watch = self._races.get(race.id)
+            if watch is None:
+                changes.new_races.append(race)
+                watch = RaceWatch(athletes, now)
+                if athletes == self.LAST_SPOT:
+                    changes.last_spots.append(race)
+            else:
+                if athletes == self.LAST_SPOT and watch.athletes != self.LAST_SPOT:
+                    changes.last_spots.append(race)
+                self._rate_sample(watch, athletes, now)
+                watch.athletes = athletes
+                watch.seen_at = now
+            watched[race.id] = watch
+        # forget races that are gone (started)
+        self._races = watched
+        return changes
+
+    def interval(self) -> float:
+        """seconds until next poll, based on the estimated time for the closest race to reach a last spot"""
+        eta = None
+        for watch in self._races.values():
+            missing = self.LAST_SPOT - watch.athletes
+            if missing <= 0:
+                continue
+            if missing == 1:
+                # next join opens a last spot
+                return self.min_interval
+            rate = watch.rate or self._rate
+            if not rate:
+                continue
+            race_eta = missing / rate
+            if eta is None or race_eta < eta:
+                eta = race_eta
+        if eta is None:
+            return self.max_interval
+        return max(self.min_interval, min(self.max_interval, eta / 2))
+
+    def backoff(self, seconds: float):
+        """skip polls for `seconds` (such as after an API error)"""
+        self._next_poll = time.monotonic() + seconds
+
+    def tick(self) -> WatchChanges:
+        """poll races if it is time to, returning what changed"""
+        now = time.monotonic()
+        if now < self._next_poll:
+            return WatchChanges()
+        changes = self.observe(self.fetch(), now=now)
+        self._next_poll = now + self.interval()
+        return changes
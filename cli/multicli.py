@@ -15,7 +15,7 @@ from snail import VERSION
 from snail.gqlclient.types import Adaptation, Family, Snail
 from snail.web3client import DECIMALS
 
-from . import cli, commands, utils
+from . import cli, commands, missions, utils
 from .database import GlobalDB, MissionLoop
 
 logger = logging.getLogger(__name__)
@@ -36,8 +36,11 @@ class MultiCLI:
         self.args = args
         # --bot specific in global init... ugly...
         bot_data_dir = getattr(args, 'data_dir', None)
-        if bot_data_dir:
-            self.database = GlobalDB.load_from_file(self.args.data_dir / 'db.json')
+        if bot_data_dir and getattr(args, 'db_backend', None) == 'sqlite':
+            self.database = GlobalDB.load_from_sqlite(self.args.data_dir / 'db.sqlite')
+        elif bot_data_dir:
+            # bot saves after every change, journal them instead of rewriting every file
+            self.database = GlobalDB.load_from_file(self.args.data_dir / 'db.json', journal=True)
         else:
             self.database = GlobalDB()
 
@@ -59,6 +62,11 @@ class MultiCLI:
             args.notify.register_cli(c)
             self.clis.append(c)
 
+        # single mission race feed for all wallets (single wallet keeps using owner filtered feed)
+        self.mission_coordinator = missions.MissionCoordinator(self.main_cli.client) if self.is_multi else None
+        # only used by `bot`
+        self.race_watcher = None
+
         self.load_profiles()
 
     @property
@@ -101,6 +109,13 @@ class MultiCLI:
         # this cmd is special as it should loop infinitely
         self.args.notify.start_polling()
 
+        if self.mission_coordinator is not None:
+            self.race_watcher = missions.RaceWatcher(self.mission_coordinator.refresh)
+        else:
+            self.race_watcher = missions.RaceWatcher(
+                lambda: list(self.main_cli.client.iterate_mission_races(filters={'owner': self.main_cli.owner}))
+            )
+
         _past = self.main_cli._now()
         cli_waits = defaultdict(lambda: _past)
         cli_waits_other = defaultdict(lambda: _past)
@@ -111,6 +126,10 @@ class MultiCLI:
                 snail_balance = self.main_cli.client.web3.multicall_balances(
                     [c.owner for c in self.clis], _all=False, snails=True
                 )
+                if self.args.missions and not self.args.paused:
+                    w = self.main_cli._cmd_bot_tick_exception_handler(self._race_watch_tick)
+                    if w:
+                        self.race_watcher.backoff(w)
                 # do all missions in a row, first (but skip wallets with 0 snails)
                 for c in self.clis:
                     if snail_balance[c.owner].snails == 0:
@@ -140,9 +159,18 @@ class MultiCLI:
                         c.logger.info(
                             'Tick-other processed in %s (%d seconds)', self.main_cli._now() - _start, duration
                         )
+                # changes saved (debounced) in the ticks
+                self.database.flush_all()
                 time.sleep(1)
         finally:
             self.args.notify.stop_polling()
+            self.database.compact_all()
+
+    def _race_watch_tick(self):
+        changes = self.race_watcher.tick()
+        if changes:
+            for c in self.clis:
+                c.mission_watch_wakeup(changes)
 
     def cmd_balance(self):
         if self.args.claim or self.args.send is not None or self.args.send_avax is not None:
@@ -188,16 +216,21 @@ SNAILS: {totals[2]}'''
             if cli.owner[-40:].lower() == address[-40:].lower():
                 return cli
 
-    def _wait_api_transfer(self, cli: cli.CLI, *snails: int, sleep=0.5) -> list[Snail]:
-        """wait for API to refresh after snail transfers"""
-        for _ in range(60):
+    def _wait_api_transfer(self, cli: cli.CLI, *snails: int, timeout=30) -> list[Snail]:
+        """wait for API to refresh after snail transfers (checking on every new block)"""
+
+        def _check():
             _snails = list(cli.client.iterate_all_snails(filters={'id': snails}))
             if len(_snails) == len(snails) and {x.owner for x in _snails} == {cli.owner}:
-                print('API updated')
                 return _snails
             print('.', end='', flush=True)
-            time.sleep(sleep)
-        raise Exception('too many retries, not the holder?!')
+
+        try:
+            _snails = cli.client.web3.block_watcher.wait_until(_check, timeout)
+        except TimeoutError:
+            raise Exception('too many retries, not the holder?!')
+        print('API updated')
+        return _snails
 
     def _cmd_incubate_execute(self):
         # validate
@@ -261,11 +294,12 @@ SNAILS: {totals[2]}'''
                     if 'Please provide a' not in str(e):
                         raise
                     _r = e
-                    time.sleep(0.5)
+                    # API catches up with the chain, retry on next block
+                    c.client.web3.block_watcher.wait_for_block(timeout=1)
                 except cli.client.web3client.exceptions.ContractLogicError as e:
                     if 'Protocol coefficent changed' not in str(e):
                         raise
-                    time.sleep(1)
+                    c.client.web3.block_watcher.wait_for_block(timeout=2)
                     _r = e
             raise _r
 
@@ -847,7 +881,7 @@ Stats:
                 hash_queue.append((c, h))
             for c, hash in hash_queue:
                 try:
-                    r = c.client.web3.web3.eth.wait_for_transaction_receipt(hash, timeout=120)
+                    r = c.client.web3.wait_for_transaction_receipt(hash, timeout=120)
                     if r.get('status') == 1:
                         bal = int(r['logs'][1]['data'], 16) / cli.DECIMALS
                         fee = utils.tx_fee(r)
@@ -868,7 +902,7 @@ Stats:
                     hash_queue.append((c, h))
             for c, hash in hash_queue:
                 try:
-                    r = c.client.web3.web3.eth.wait_for_transaction_receipt(hash, timeout=120)
+                    r = c.client.web3.wait_for_transaction_receipt(hash, timeout=120)
                     if r.get('status') == 1:
                         if len(r['logs']) > 1:
                             logger.error('weird tx data: %s', r)
@@ -942,7 +976,8 @@ Stats:
                         if 'You are not the holder of Snail' not in str(e):
                             raise
                         print('.', end='', flush=True)
-                        time.sleep(0.5)
+                        # transfer not yet seen by API, retry on next block
+                        c.client.web3.block_watcher.wait_for_block(timeout=1)
                 else:
                     raise Exception('too many retries, not the holder?!')
 
@@ -0,0 +1,125 @@
+import re
+from typing import TYPE_CHECKING, Dict, Optional
+
+import configargparse
+
+if TYPE_CHECKING:
+    from . import cli, multicli
+
+
+def escape_markdown(*args, **kwargs):
+    # telegram is only loaded when there is something to escape
+    from telegram.utils.helpers import escape_markdown
+
+    return escape_markdown(*args, **kwargs)
+
+
+def cli_header(cli_name):
+    return f'`>> {cli_name}`'
+
+
+class BaseNotifier:
+    """
+    Notifier without a Telegram bot (no `--notify`): keeps the registered CLIs and settings but sends nothing.
+    `tgbot.Notifier` extends it, so Telegram is only imported when a bot is configured.
+    """
+
+    clis: Dict[str, 'cli.CLI']
+    _owner_chat_id = None
+
+    def __init__(self, chat_id, owner_chat_id=None):
+        self.chat_id = chat_id
+        self.clis = {}
+        self._settings_list = []
+        self._read_only_settings = None
+        self._parser = None
+        self.updater = None
+        if owner_chat_id is None:
+            self.owner_chat_id = {self.chat_id} if self.chat_id else None
+        else:
+            self.owner_chat_id = owner_chat_id
+
+    @property
+    def settings(self):
+        return self._settings_list
+
+    @property
+    def owner_chat_id(self):
+        return self._owner_chat_id
+
+    @owner_chat_id.setter
+    def owner_chat_id(self, value):
+        if value is None:
+            self._owner_chat_id = None
+        elif isinstance(value, int):
+            self._owner_chat_id = {value}
+        elif isinstance(value, (list, tuple, set)):
+            self._owner_chat_id = set(value)
+        else:
+            raise ValueError('invalid owner_chat_id type')
+
+    @property
+    def any_cli(self) -> 'cli.CLI':
+        return list(self.clis.values())[0]
+
+    @property
+    def is_multi_cli(self) -> bool:
+        return len(self.clis) > 1
+
+    @property
+    def main_cli(self) -> 'cli.CLI':
+        if self.is_multi_cli:
+            for c in self.clis.values():
+                if c.report_as_main:
+                    return c
+        return self.any_cli
+
+    @property
+    def multicli(self) -> 'multicli.CLI':
+        return self.any_cli.multicli
+
+    @property
+    def cli_parser(self):
+        return self._parser
+
+    @cli_parser.setter
+    def cli_parser(self, parser):
+        self._parser = parser
+        settings_rw = []
+        settings_ro = []
+
+        for x in parser._subparsers._actions[-1].choices['bot']._actions:
+            if isinstance(x, configargparse.argparse._StoreTrueAction) or (
+                isinstance(x, (configargparse.argparse._StoreAction, configargparse.argparse._AppendAction))
+                and x.type in (float, int)
+                and x.nargs in (None, 1)
+            ):
+                settings_rw.append(x)
+            elif not isinstance(x, configargparse.argparse._HelpAction):
+                settings_ro.append(x)
+
+        self._settings_list = settings_rw
+        self._read_only_settings = settings_ro
+
+    def tag_with_wallet(self, cli: 'cli.CLI', output: Optional[list] = None):
+        if not self.is_multi_cli:
+            return ''
+        m = cli_header(cli.name)
+        if output is not None:
+            output.append(m)
+        return m
+
+    def register_cli(self, cli):
+        self.clis[cli.owner] = cli
+
+    def idle(self):
+        pass
+
+    def start_polling(self):
+        pass
+
+    def stop_polling(self):
+        pass
+
+    def notify(self, message: str, *args, **kwargs):
+        """no bot configured, nothing is sent"""
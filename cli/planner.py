@@ -0,0 +1,246 @@
+"""
+mission planner: assign queueable snails to mission races in a single pass,
+as a maximum weight bipartite matching (solved with the hungarian algorithm),
+with ties between optimal plans broken race by race (fullest first) over the same optimal solutions
+"""
+
+from dataclasses import dataclass
+
+from snail.gqlclient.types import Race, Snail
+
+from .types import RaceCandidate
+
+# weight criteria are packed into a single integer (most significant first), each one clamped to [0, _SCALE)
+_SCALE = 1000
+
+
+@dataclass
+class PlannedJoin:
+    race: Race
+    snail: Snail
+    score: int
+    weight: int
+
+
+def hungarian(cost: list[list[int]]) -> list[int]:
+    """
+    minimum cost assignment for a `n x m` cost matrix, with `n <= m`
+    returns the assigned column of each row
+
+    >>> hungarian([[4, 1, 3], [2, 0, 5], [3, 2, 2]])
+    [1, 0, 2]
+    >>> hungarian([[1, 2, 3], [1, 4, 9]])
+    [1, 0]
+    >>> hungarian([])
+    []
+    """
+    return _hungarian(cost)[0]
+
+
+def _hungarian(cost: list[list[int]]) -> tuple[list[int], list[int], list[int]]:
+    """
+    `hungarian` and the (optimal) dual potentials of its rows and columns: `cost[i][j] - u[i] - v[j]` is never
+    negative, it is zero for the assigned cells, and unassigned columns have `v[j] == 0`
+    """
+    n = len(cost)
+    if not n:
+        return [], [], []
+    m = len(cost[0])
+    if n > m:
+        raise ValueError('more rows than columns')
+    inf = float('inf')
+    # potentials and matching are 1-indexed, column 0 is a sentinel
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = inf
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment, u[1:], v[1:]
+
+
+class _Ties:
+    """
+    break ties between optimal assignments row by row: each row (in order) gets its most preferred column
+    among the optimal assignments that keep the columns of the rows before it
+    (an optimal assignment only uses zero reduced cost cells and keeps columns with `v[j] < 0` assigned,
+    so moving a row to another column is a search for an alternating path over those cells)
+    """
+
+    def __init__(self, cost: list[list[int]]):
+        self.assignment, u, self.v = _hungarian(cost)
+        self.tight = [{j for j, c in enumerate(row) if c - u[i] - self.v[j] == 0} for i, row in enumerate(cost)]
+        self.owner = {j: i for i, j in enumerate(self.assignment)}
+        self.fixed = set()
+
+    def _augment(self, row: int, freed: int, taken: int, seen: set[int]) -> bool:
+        """move `row` to another column, ending in column `freed` or in one that is free (if `freed` may be)"""
+        for j in self.tight[row]:
+            if j in seen or j == taken:
+                continue
+            seen.add(j)
+            other = self.owner.get(j)
+            if j == freed or (other is None and self.v[freed] == 0):
+                pass
+            elif other is None or other in self.fixed or not self._augment(other, freed, taken, seen):
+                continue
+            self.assignment[row] = j
+            self.owner[j] = row
+            return True
+        return False
+
+    def prefer(self, row: int, columns: list[int]):
+        """assign `row` to the first of `columns` (most preferred first) possible, then keep it there"""
+        current = self.assignment[row]
+        for j in columns:
+            if j == current:
+                break
+            if j not in self.tight[row]:
+                continue
+            other = self.owner.get(j)
+            if other is None:
+                ok = self.v[current] == 0
+            else:
+                ok = other not in self.fixed and self._augment(other, current, j, {j})
+            if ok:
+                if self.owner.get(current) == row:
+                    del self.owner[current]
+                self.assignment[row] = j
+                self.owner[j] = row
+                break
+        if self.assignment[row] in columns:
+            self.fixed.add(row)
+        else:
+            # not any of them: any other column will do, and it may still move to another one
+            self.tight[row] -= set(columns)
+
+
+def _clamp(value) -> int:
+    return max(0, min(_SCALE - 1, int(value or 0)))
+
+
+def _snail_tie(snail: Snail, boosted: set[int]) -> int:
+    """criteria of the tie-break (see `join_weight`) that only depend on the snail, packed"""
+    if snail.id in boosted:
+        tickets = _SCALE - 1 - _clamp(snail.stats['mission_tickets'])
+    else:
+        tickets = 0
+    tie = 0
+    for criteria in ((snail.slime_boost or 0) * 10, tickets, len(snail.adaptations), snail.purity):
+        tie = tie * _SCALE + _clamp(criteria)
+    return tie
+
+
+def join_weight(candidate: RaceCandidate, boosted: set[int], rank: int = 0, snail_ties=None) -> tuple[int, int]:
+    """
+    weight of joining a race with a candidate, as (join weight, tie-break) - tie-breaks only order candidates
+    of the same race
+    join weight criteria, in order:
+    * any join (so the plan joins as many races as possible)
+    * adaptation score
+    tie-break criteria, in order:
+    * adaptation score (of this join, as the join weight only counts the total)
+    * slime boost
+    * fewer mission tickets, for boosted snails (the ones that need tickets the most)
+    * number of adaptations
+    * purity
+    * `rank` of the candidate in its race (as sorted by `find_candidates`), for stable ties
+    `snail_ties` caches `_snail_tie` by snail id, for a snail candidate in many races
+    """
+    snail = candidate.snail
+    if snail_ties is None:
+        tie = _snail_tie(snail, boosted)
+    else:
+        tie = snail_ties.get(snail.id)
+        if tie is None:
+            tie = snail_ties[snail.id] = _snail_tie(snail, boosted)
+    score = _clamp(candidate.score)
+    tie = (score * _SCALE**4 + tie) * _SCALE + _clamp(_SCALE - 1 - rank)
+    return _SCALE + score, tie
+
+
+def plan_missions(races: list[tuple[Race, list[RaceCandidate]]], boosted: set[int]) -> list[PlannedJoin]:
+    """
+    plan which snail joins each race, using the (already eligible) candidates of every race
+    among the plans with most joins and best total score, fullest races get their best candidates first
+    (as in joining races one by one, fullest first)
+    returned joins are sorted by race athletes (descending) so that last spots are joined first
+    """
+    races = sorted(races, key=lambda x: len(x[0].athletes), reverse=True)
+    snails: dict[int, Snail] = {}
+    for _, candidates in races:
+        for candidate in candidates:
+            snails.setdefault(candidate.snail.id, candidate.snail)
+    if not snails:
+        return []
+    columns = {snail_id: i for i, snail_id in enumerate(snails)}
+    # extra (dummy) columns so that every race gets a column: the ones left on a column that is not one of its
+    # candidates (dummy or not) do not join
+    width = max(len(columns), len(races))
+    cost = []
+    preferences = []
+    weights = []
+    snail_ties = {}
+    for _, candidates in races:
+        row = [0] * width
+        row_weights = {}
+        ties = []
+        for rank, candidate in enumerate(candidates):
+            join, tie = join_weight(candidate, boosted, rank=rank, snail_ties=snail_ties)
+            row[columns[candidate.snail.id]] = -join
+            row_weights[candidate.snail.id] = (join, candidate.score)
+            ties.append((tie, columns[candidate.snail.id]))
+        cost.append(row)
+        weights.append(row_weights)
+        preferences.append([j for _, j in sorted(ties, reverse=True)])
+
+    # best plans by join weight, then the fullest races (first) get their best candidates among those
+    ties = _Ties(cost)
+    for i, columns_preferred in enumerate(preferences):
+        ties.prefer(i, columns_preferred)
+
+    plan = []
+    snail_ids = list(snails)
+    for (race, _), row_weights, column in zip(races, weights, ties.assignment):
+        if column >= len(snail_ids) or snail_ids[column] not in row_weights:
+            # dummy column or not a candidate for this race
+            continue
+        w, score = row_weights[snail_ids[column]]
+        plan.append(PlannedJoin(race, snails[snail_ids[column]], score, w))
+    plan.sort(key=lambda x: len(x.race.athletes), reverse=True)
+    return plan
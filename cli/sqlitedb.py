@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+# SetQueue fields => (table, kind)
+SET_FIELDS = {
+    'joins_last': ('joins', 'last'),
+    'joins_normal': ('joins', 'normal'),
+    'notified_races': ('notified_races', 'races'),
+    'notified_races_over': ('notified_races', 'races_over'),
+}
+# amounts that only grow, stored as a ledger (to aggregate per period)
+REWARD_FIELDS = ('slime_won', 'slime_won_normal', 'slime_won_last')
+# timestamp of rows imported from JSON files (amounts won at unknown times, left out of any period)
+IMPORTED_AT = 0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS state (
+    owner TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (owner, key)
+);
+CREATE TABLE IF NOT EXISTS joins (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    snail_id INTEGER NOT NULL,
+    race_id INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS joins_owner ON joins (owner, kind, id);
+CREATE TABLE IF NOT EXISTS notified_races (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    race_id INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notified_races_owner ON notified_races (owner, kind, id);
+CREATE TABLE IF NOT EXISTS rewards (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    field TEXT NOT NULL,
+    amount REAL NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rewards_owner_at ON rewards (owner, at);
+'''
+
+
+def _key(item):
+    # SetQueue items are lists after a json dump (tuples in memory)
+    return tuple(item) if isinstance(item, list) else item
+
+
+class SqliteStore:
+    """
+    Bot state of all the wallets in a single SQLite file (WAL mode), an alternative to the JSON files.
+    Models are stored as changes (see `PersistingBaseModel.use_store`):
+    SetQueue fields in indexed tables, rewards as a ledger and every other field as JSON in `state`.
+    Global (non-wallet) state uses owner ''.
+    """
+
+    def __init__(self, filename: Path):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM state LIMIT 1').fetchone() is None
+
+    def _set_rows(self, owner: str, table: str, kind: str) -> list:
+        if table == 'joins':
+            q = 'SELECT snail_id, race_id FROM joins WHERE owner = ? AND kind = ? ORDER BY id'
+            return [(r[0], r[1]) for r in self._conn.execute(q, (owner, kind))]
+        q = 'SELECT race_id FROM notified_races WHERE owner = ? AND kind = ? ORDER BY id'
+        return [r[0] for r in self._conn.execute(q, (owner, kind))]
+
+    def load(self, owner: str) -> dict[str, Any]:
+        """model data (as for the model constructor)"""
+        with self._lock:
+            data = {
+                k: json.loads(v)
+                for k, v in self._conn.execute('SELECT key, value FROM state WHERE owner = ?', (owner,))
+            }
+            for field, (table, kind) in SET_FIELDS.items():
+                if field in data:
+                    data[field] = self._set_rows(owner, table, kind)
+            totals = dict(
+                self._conn.execute('SELECT field, SUM(amount) FROM rewards WHERE owner = ? GROUP BY field', (owner,))
+            )
+            for field in REWARD_FIELDS:
+                if field in data:
+                    data[field] = totals.get(field) or 0
+        return data
+
+    def _save_set(self, owner: str, table: str, kind: str, new: list, old: list, now: float):
+        new = [_key(x) for x in new]
+        old = [_key(x) for x in old]
+        new_set = set(new)
+        old_set = set(old)
+        removed = old_set - new_set
+        # items re-added are moved to the end of a SetQueue: re-insert everything after the first moved one
+        common_old = [x for x in old if x in new_set]
+        common_new = [x for x in new if x in old_set]
+        i = 0
+        while i < len(common_new) and common_new[i] == common_old[i]:
+            i += 1
+        moved = set(common_new[i:])
+        removed |= moved
+        if table == 'joins':
+            for snail_id, race_id in removed:
+                self._conn.execute(
+                    'DELETE FROM joins WHERE owner = ? AND kind = ? AND snail_id = ? AND race_id = ?',
+                    (owner, kind, snail_id, race_id),
+                )
+            self._conn.executemany(
+                'INSERT INTO joins (owner, kind, snail_id, race_id, at) VALUES (?, ?, ?, ?, ?)',
+                [(owner, kind, x[0], x[1], now) for x in new if x not in old_set or x in moved],
+            )
+        else:
+            self._conn.executemany(
+                'DELETE FROM notified_races WHERE owner = ? AND kind = ? AND race_id = ?',
+                [(owner, kind, x) for x in removed],
+            )
+            self._conn.executemany(
+                'INSERT INTO notified_races (owner, kind, race_id, at) VALUES (?, ?, ?, ?)',
+                [(owner, kind, x, now) for x in new if x not in old_set or x in moved],
+            )
+
+    def save(
+        self, owner: str, changes: dict[str, Any], previous: Optional[dict[str, Any]] = None, at: Optional[float] = None
+    ):
+        """
+        persist changed fields (`previous` being the last saved state), in a single transaction
+        new rows are timestamped `at` (default now)
+        """
+        previous = previous or {}
+        now = time.time() if at is None else at
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for field, value in changes.items():
+                    if field in SET_FIELDS:
+                        self._save_set(owner, *SET_FIELDS[field], value, previous.get(field) or [], now)
+                        # keep track of existing fields in state
+                        value = None
+                    elif field in REWARD_FIELDS:
+                        amount = (value or 0) - (previous.get(field) or 0)
+                        if amount:
+                            self._conn.execute(
+                                'INSERT INTO rewards (owner, field, amount, at) VALUES (?, ?, ?, ?)',
+                                (owner, field, amount, now),
+                            )
+                        value = None
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO state (owner, key, value) VALUES (?, ?, ?)',
+                        (owner, field, json.dumps(value)),
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def rewards(self, owners: Optional[Iterable[str]] = None, since: Optional[float] = None) -> dict[str, float]:
+        """sum of each reward field, for `owners` (default all) since timestamp `since` (default forever)"""
+        q = 'SELECT field, SUM(amount) FROM rewards WHERE 1 = 1'
+        params = []
+        if owners is not None:
+            owners = list(owners)
+            q += f' AND owner IN ({",".join("?" * len(owners))})'
+            params.extend(owners)
+        if since is not None:
+            q += ' AND at >= ?'
+            params.append(since)
+        q += ' GROUP BY field'
+        with self._lock:
+            totals = dict(self._conn.execute(q, params).fetchall())
+        return {field: totals.get(field) or 0 for field in REWARD_FIELDS}
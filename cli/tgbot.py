@@ -1,25 +1,32 @@
+import functools
 import logging
 import re
 from collections import defaultdict
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
 
 import configargparse
 from telegram import ForceReply, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove, Update, constants
+from telegram.error import BadRequest
 from telegram.ext import CallbackContext, CallbackQueryHandler, CommandHandler, MessageHandler, Updater
 from telegram.utils.helpers import escape_markdown
 
 from cli import templates
 from cli.database import MissionLoop
-from snail import web3client
+from snail import metrics, web3client
 
-from . import cli, utils
+from . import cli, jobs, memory, utils
 from .cli import DECIMALS
-
-if TYPE_CHECKING:
-    from . import multicli
+from .helpers import SetQueue
+from .notifier import BaseNotifier, cli_header
+from .tgsender import TelegramSender
 
 logger = logging.getLogger(__name__)
 
+# `only_once` messages remembered (not sent again), oldest are forgotten
+SENT_MESSAGES_SIZE = 1000
+
 
 def escmv2(*a, **b):
     return escape_markdown(*a, version=2, **b)
@@ -52,6 +59,41 @@ def bot_auth(func):
     return wrapper_func
 
 
+def background(kind):
+    """run the handler as a job of `kind` in `Notifier.jobs`, so it does not hold the dispatcher"""
+
+    def decorator(func):
+        def wrapper_func(notifier, *args):
+            update = args[-2]
+
+            def _job():
+                try:
+                    return func(notifier, *args)
+                except jobs.JobCancelled:
+                    update.effective_message.reply_markdown(f'✋ `{kind}` cancelled')
+                except Exception as e:
+                    if not notifier.jobs.running:
+                        raise
+                    logger.exception('error in job %s', kind)
+                    update.effective_message.reply_markdown(
+                        f'''error occurred, check logs
+```
+{escape_markdown(str(e))}
+```
+'''
+                    )
+
+            try:
+                notifier.jobs.submit(kind, _job, description=func.__doc__.strip().splitlines()[0])
+            except jobs.JobLimitReached:
+                update.effective_message.reply_markdown(f'`{kind}` is already running, check /jobs')
+
+        wrapper_func.__doc__ = func.__doc__
+        return wrapper_func
+
+    return decorator
+
+
 def no_rental(func):
     def wrapper_func(notifier, update: Update, context: CallbackContext):
         if notifier.any_cli.args.rental:
@@ -63,30 +105,23 @@ def no_rental(func):
     return wrapper_func
 
 
-class Notifier:
-    clis: Dict[str, 'cli.CLI']
-    _owner_chat_id = None
-
+class Notifier(BaseNotifier):
     SNAIL_ID1_RE = re.compile(r'(Snail \#(\d{1,5}))')
     SNAIL_ID2_RE = re.compile(r'(\(#(\d{1,5})\))')
     SNAIL_ID1_BACKTICKS_RE = re.compile(r'`(.*?)(Snail \#(\d{1,5}))(.*?)`')
     SNAIL_ID2_BACKTICKS_RE = re.compile(r'`(.*?)(\(#(\d{1,5})\))(.*?)`')
 
     def __init__(self, token, chat_id, owner_chat_id=None):
+        super().__init__(chat_id, owner_chat_id=owner_chat_id)
         self.__token = token
-        self.chat_id = chat_id
-        self.clis = {}
-        self._sent_messages = set()
-        self._settings_list = []
-        self._read_only_settings = None
-        self._parser = None
-        if owner_chat_id is None:
-            self.owner_chat_id = {self.chat_id} if self.chat_id else None
-        else:
-            self.owner_chat_id = owner_chat_id
+        self._sent_messages = SetQueue(capacity=SENT_MESSAGES_SIZE)
+        self._sender = None
+        self.jobs = jobs.JobQueue()
+        memory.track('notifier.sent_messages', self, lambda n: n._sent_messages)
 
         if token:
             self.updater = Updater(self.__token)
+            self._sender = TelegramSender(self.updater.bot)
             dispatcher = self.updater.dispatcher
             dispatcher.add_error_handler(self.handle_exceptions)
             dispatcher.add_handler(CommandHandler("start", self.cmd_start))
@@ -110,91 +145,19 @@ class Notifier:
             dispatcher.add_handler(CommandHandler("markettournament", self.cmd_market_tournament))
             dispatcher.add_handler(CommandHandler("balancebalance", self.cmd_balance_balance))
             dispatcher.add_handler(CommandHandler("reloadsnails", self.cmd_reload_snails))
+            dispatcher.add_handler(CommandHandler("jobs", self.cmd_jobs))
+            dispatcher.add_handler(CommandHandler("perf", self.cmd_perf))
+            dispatcher.add_handler(CommandHandler("memory", self.cmd_memory))
             dispatcher.add_handler(CommandHandler("settings", self.cmd_settings))
             dispatcher.add_handler(CommandHandler("usethisformissions", self.cmd_usethisformissions))
             dispatcher.add_handler(CommandHandler("help", self.cmd_help))
             dispatcher.add_handler(MessageHandler(None, self.cmd_message))
-        else:
-            self.updater = None
-
-    @property
-    def settings(self):
-        return self._settings_list
-
-    @property
-    def owner_chat_id(self):
-        return self._owner_chat_id
-
-    @owner_chat_id.setter
-    def owner_chat_id(self, value):
-        if value is None:
-            self._owner_chat_id = None
-        elif isinstance(value, int):
-            self._owner_chat_id = {value}
-        elif isinstance(value, (list, tuple, set)):
-            self._owner_chat_id = set(value)
-        else:
-            raise ValueError('invalid owner_chat_id type')
-
-    @property
-    def any_cli(self) -> 'cli.CLI':
-        return list(self.clis.values())[0]
-
-    @property
-    def is_multi_cli(self) -> bool:
-        return len(self.clis) > 1
-
-    @property
-    def main_cli(self) -> 'cli.CLI':
-        if self.is_multi_cli:
-            for c in self.clis.values():
-                if c.report_as_main:
-                    return c
-        return self.any_cli
-
-    @property
-    def multicli(self) -> 'multicli.CLI':
-        return self.any_cli.multicli
-
-    @property
-    def cli_parser(self):
-        return self._parser
-
-    @cli_parser.setter
-    def cli_parser(self, parser):
-        self._parser = parser
-        settings_rw = []
-        settings_ro = []
-
-        for x in parser._subparsers._actions[-1].choices['bot']._actions:
-            if isinstance(x, configargparse.argparse._StoreTrueAction) or (
-                isinstance(x, (configargparse.argparse._StoreAction, configargparse.argparse._AppendAction))
-                and x.type in (float, int)
-                and x.nargs in (None, 1)
-            ):
-                settings_rw.append(x)
-            elif not isinstance(x, configargparse.argparse._HelpAction):
-                settings_ro.append(x)
-
-        self._settings_list = settings_rw
-        self._read_only_settings = settings_ro
-
-    def tag_with_wallet(self, cli: 'cli.CLI', output: Optional[list] = None):
-        if not self.is_multi_cli:
-            return ''
-        m = cli_header(cli.name)
-        if output is not None:
-            output.append(m)
-        return m
 
     def _slow_query(self, query):
         return query.edit_message_reply_markup(
             reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton('🚧 Loading...', callback_data='ignore')]])
         )
 
-    def register_cli(self, cli):
-        self.clis[cli.owner] = cli
-
     def handle_exceptions(self, update: object, context: CallbackContext) -> None:
         logger.exception('Error from tgbot', exc_info=context.error)
         if self.any_cli.args.rental:
@@ -227,6 +190,8 @@ class Notifier:
             return self.handle_buttons_swapsend(opts, update, context)
         elif cmd == 'balance_balance':
             return self.handle_buttons_balance_balance(opts, update, context)
+        elif cmd == 'cancel':
+            return self.handle_buttons_cancel(opts, update, context)
         query.edit_message_text(text=f"Unknown option: {query.data}")
 
     def handle_buttons_toggle(self, opts: str, update: Update, context: CallbackContext) -> None:
@@ -382,7 +347,7 @@ class Notifier:
         # check every receipt
         for _cli, hash in hash_queue:
             try:
-                r = _cli.client.web3.web3.eth.wait_for_transaction_receipt(hash, timeout=120)
+                r = _cli.client.web3.wait_for_transaction_receipt(hash, timeout=120)
                 if r.get('status') == 1:
                     if len(r['logs']) not in (1, 3):
                         logger.error('weird tx data: %s', r)
@@ -398,6 +363,7 @@ class Notifier:
                 cb(_cli, 2, f'claim FAILED for {_cli.name}')
                 logger.exception('error claiming')
 
+    @background('slime')
     def handle_buttons_claim(self, opts: str, update: Update, context: CallbackContext) -> None:
         """Process claim buttons"""
         query = update.callback_query
@@ -431,7 +397,8 @@ class Notifier:
         self._async_claim(clis, _cb, minimum=self.main_cli.args.css_minimum)
 
         # clean up message
-        query.edit_message_text(
+        result_edit_message_text(
+            query,
             '\n'.join(list(final_status.values()) + [f'*Total claimed*: {total_claimed[0]}']),
             parse_mode='Markdown',
         )
@@ -456,10 +423,11 @@ class Notifier:
 
         # wait for receipts
         for _cli, hash in hash_queue:
-            r = _cli.client.web3.web3.eth.wait_for_transaction_receipt(hash, timeout=120)
+            r = _cli.client.web3.wait_for_transaction_receipt(hash, timeout=120)
             sent = int(r['logs'][0]['data'], 16) / DECIMALS
             cb(_cli, 1, f'{_cli.name}: sent {sent} SLIME', [sent])
 
+    @background('slime')
     def handle_buttons_swapsend(self, opts: str, update: Update, context: CallbackContext) -> None:
         """Process swapsend buttons"""
         query = update.callback_query
@@ -492,11 +460,13 @@ class Notifier:
         self._async_swapsend(cli, list(self.clis.values()), _cb)
 
         # clean up message
-        query.edit_message_text(
+        result_edit_message_text(
+            query,
             '\n'.join(list(final_status.values()) + [f'*Total sent*: {total_sent[0]}']),
             parse_mode='Markdown',
         )
 
+    @background('balance_balance')
     def handle_buttons_balance_balance(self, opts: str, update: Update, context: CallbackContext) -> None:
         """Process /balancebalance confirmation"""
         query = update.callback_query
@@ -506,11 +476,12 @@ class Notifier:
 
         def _cb(_m):
             msg.append(escape_markdown(_m))
-            query.message.edit_text(text='\n'.join(msg), parse_mode='Markdown')
+            progress_edit_text(query.message, text='\n'.join(msg), parse_mode='Markdown')
 
         stop, limit = self.main_cli.args.balance_balance
         utils.balance_balance(self.clis.values(), limit, stop, _cb, force=True)
 
+    @background('slime')
     def handle_buttons_css(self, opts: str, update: Update, context: CallbackContext) -> None:
         """Process /css buttons"""
         query = update.callback_query
@@ -583,7 +554,7 @@ class Notifier:
             extra_text[-1] = f'NOT swapped {_msg} ❌'
             logger.error('error swapping: %s', out_min_real)
 
-        query.edit_message_text('\n'.join(extra_text), parse_mode='Markdown')
+        result_edit_message_text(query, '\n'.join(extra_text), parse_mode='Markdown')
 
     @bot_auth
     def cmd_start(self, update: Update, context: CallbackContext) -> None:
@@ -682,40 +653,58 @@ class Notifier:
             update.message.text,
         )
 
+    def handle_buttons_cancel(self, opts: str, update: Update, context: CallbackContext) -> None:
+        """Process job cancel buttons"""
+        query = update.callback_query
+        if opts and self.jobs.cancel(int(opts[0])):
+            query.edit_message_reply_markup()
+        else:
+            query.edit_message_text(text='Job already finished')
+
     @bot_auth
+    @background('stats')
     def cmd_stats(self, update: Update, context: CallbackContext) -> None:
         """
         My snails stats
         """
         update.message.reply_chat_action(constants.CHATACTION_TYPING)
-        all_snails = []
 
-        for c in self.clis.values():
+        def _load(c: 'cli.CLI'):
             it = list(c.my_snails.values())
             it.sort(key=lambda x: x.breed_status)
             # queuable times
-            queues = {s.id: s for s in c.client.iterate_my_snails_for_missions(c.owner)}
+            queues = c.mission_snails
             for s in it:
                 s['queueable_at'] = queues.get(s.id).get('queueable_at')
-            all_snails.extend(it)
-
-        # split into blocks of 50 snails due to message size limit of 4k (100 snails already error)
-        for partly in range(0, len(all_snails), 50):
-            update.message.reply_markdown_v2(
-                '\n'.join(
-                    '🐌  %s\n%s\n🍆  *%s* 🏁 %s 🎫 %s'
-                    % (
-                        f'[{escmv2(snail.name)}](https://www.snailtrail.art/snails/{snail.id}/about)',
-                        escmv2(
-                            f"{snail.level_str} {snail.family.gene} {snail.gender.emoji()} {snail.klass} {snail.purity_str}"
-                        ),
-                        self._breed_status_markdown(snail.breed_status),
-                        escmv2(self._queueable_at(snail)),
-                        escmv2(str(snail.stats['mission_tickets'])),
+            return it
+
+        # wallets are loaded concurrently, each one is sent as soon as it is ready
+        for c, snails, error in jobs.fanout(_load, self.clis.values()):
+            header = [cli_header(c.name)] if self.is_multi_cli else []
+            if error is not None:
+                logger.error('failed to load snails for %s', c.name, exc_info=error)
+                update.message.reply_markdown_v2('\n'.join(header + [escmv2(f'⚠️ failed to load: {error}')]))
+                continue
+            # split into blocks of 50 snails due to message size limit of 4k (100 snails already error)
+            for partly in range(0, len(snails), 50):
+                update.message.reply_markdown_v2(
+                    '\n'.join(
+                        header
+                        + [
+                            '🐌  %s\n%s\n🍆  *%s* 🏁 %s 🎫 %s'
+                            % (
+                                f'[{escmv2(snail.name)}](https://www.snailtrail.art/snails/{snail.id}/about)',
+                                escmv2(
+                                    f"{snail.level_str} {snail.family.gene} {snail.gender.emoji()} {snail.klass} {snail.purity_str}"
+                                ),
+                                self._breed_status_markdown(snail.breed_status),
+                                escmv2(self._queueable_at(snail)),
+                                escmv2(str(snail.stats['mission_tickets'])),
+                            )
+                            for snail in snails[partly : partly + 50]
+                        ]
                     )
-                    for snail in all_snails[partly : partly + 50]
                 )
-            )
 
     @bot_auth
     def cmd_balance(self, update: Update, context: CallbackContext) -> None:
@@ -730,29 +719,42 @@ class Notifier:
         m.edit_text(text=templates.render_tgbot_balances(data), parse_mode='Markdown')
 
     @bot_auth
+    @background('inventory')
     def cmd_inventory(self, update: Update, context: CallbackContext) -> None:
         """
         Inventory items
         """
         update.message.reply_chat_action(constants.CHATACTION_TYPING)
-        msg = []
+        clis = list(self.clis.values())
+        sections = {c.owner: ['...Loading...'] for c in clis}
         totals = defaultdict(lambda: 0)
         m = update.message.reply_markdown('Loading items...')
-        for c in self.clis.values():
-            self.tag_with_wallet(c, msg)
-            msg.append('...Loading...')
-            trivial_edit_text(m, text='\n'.join(msg), parse_mode='Markdown')
-            msg.pop()
-            for _, v in c.cmd_inventory(verbose=False).items():
-                msg.append(f'_{v[0].name}_: {len(v)}')
-                totals[v[0].name] += len(v)
-            trivial_edit_text(m, text='\n'.join(msg), parse_mode='Markdown')
+
+        def _render():
+            msg = []
+            for c in clis:
+                self.tag_with_wallet(c, msg)
+                msg.extend(sections[c.owner])
+            return msg
+
+        # wallets are loaded concurrently (fresh snapshots come back right away), message updated as they arrive
+        for c, inventory, error in jobs.fanout(lambda c: c.inventory, clis):
+            if error is not None:
+                logger.error('failed to load inventory for %s', c.name, exc_info=error)
+                sections[c.owner] = [f'⚠️ failed to load: {escape_markdown(str(error))}']
+            else:
+                sections[c.owner] = []
+                for _, v in inventory.items():
+                    sections[c.owner].append(f'_{v[0].name}_: {len(v)}')
+                    totals[v[0].name] += len(v)
+            trivial_edit_text(m, text='\n'.join(_render()), parse_mode='Markdown')
 
         if self.is_multi_cli:
+            msg = _render()
             msg.append('`Total`')
             for k, v in totals.items():
                 msg.append(f'_{k}_: {v}')
-            m.edit_text(text='\n'.join(msg), parse_mode='Markdown')
+            result_edit_text(m, text='\n'.join(msg), parse_mode='Markdown')
 
     @bot_auth
     def cmd_fee(self, update: Update, context: CallbackContext) -> None:
@@ -784,14 +786,21 @@ Median is {pct:.2f}% of your max fee and {mpct:.2f}% of your max mission fee
         Display current bot statistics
         """
         update.message.reply_chat_action(constants.CHATACTION_TYPING)
-        total, total_last, total_normal = self.any_cli.database.global_db.total_slime_won()
-        update.message.reply_markdown(
-            f'''\
+        global_db = self.any_cli.database.global_db
+        total, total_last, total_normal = global_db.total_slime_won()
+        msg = f'''\
 Total slime won in missions: **{total}**
 ... with normal spots: **{total_normal}**
 ... with last spots: **{total_last}**
 '''
-        )
+        last_day = global_db.slime_won_since(self.any_cli._now() - timedelta(days=1))
+        if last_day is not None:
+            msg += f'''\
+Last 24h: **{last_day[0]}**
+... with normal spots: **{last_day[2]}**
+... with last spots: **{last_day[1]}**
+'''
+        update.message.reply_markdown(msg)
 
     @bot_auth
     def cmd_boosted(self, update: Update, context: CallbackContext) -> None:
@@ -880,6 +889,7 @@ Total slime won in missions: **{total}**
         m.edit_text(text='\n'.join(msg), parse_mode='Markdown')
 
     @bot_auth
+    @background('balance_balance')
     def cmd_balance_balance(self, update: Update, context: CallbackContext) -> None:
         """
         Distribute AVAX balance from richest wallet to the others
@@ -891,7 +901,7 @@ Total slime won in missions: **{total}**
 
         def _cb(_m):
             msg.append(_m)
-            m.edit_text(text='\n'.join(msg), parse_mode='Markdown')
+            progress_edit_text(m, text='\n'.join(msg), parse_mode='Markdown')
 
         r = utils.balance_balance(self.clis.values(), limit, stop, _cb)
 
@@ -905,7 +915,7 @@ Total slime won in missions: **{total}**
                 ],
                 [InlineKeyboardButton(f'❌ Niente', callback_data='toggle')],
             ]
-            m.edit_text(text='\n'.join(msg), parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+            result_edit_text(m, text='\n'.join(msg), parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
 
     @bot_auth
     def cmd_css(self, update: Update, context: CallbackContext) -> None:
@@ -1034,6 +1044,86 @@ Total slime won in missions: **{total}**
         self.multicli.load_profiles()
         update.message.reply_text('✅')
 
+    @bot_auth
+    def cmd_jobs(self, update: Update, context: CallbackContext) -> None:
+        """
+        Running commands (cancel them)
+        """
+        running = self.jobs.jobs()
+        if not running:
+            update.message.reply_markdown('No commands running')
+            return
+        keyboard = [
+            [InlineKeyboardButton(f'✋ {job.description} ({job.elapsed:.0f}s)', callback_data=f'cancel {job.id}')]
+            for job in running
+        ]
+        keyboard.append([InlineKeyboardButton('❌ Niente', callback_data='toggle')])
+        update.message.reply_markdown('Cancel which one?', reply_markup=InlineKeyboardMarkup(keyboard))
+
+    @staticmethod
+    def _perf_latencies(name: str, errors: Optional[str] = None, limit: int = 8) -> list[str]:
+        """slowest (by total time) label sets of histogram `name`, with their error count (from counter `errors`)"""
+        histogram = metrics.REGISTRY.get(name)
+        failed = defaultdict(int)
+        if errors and metrics.REGISTRY.get(errors):
+            for k, v in metrics.REGISTRY.get(errors).values().items():
+                failed[k[:-1]] += v
+        series = sorted(histogram.series().items(), key=lambda x: x[1][1], reverse=True) if histogram else []
+        lines = []
+        for labels, (count, total) in series[:limit]:
+            p95 = histogram.quantile(0.95, *labels)
+            p95 = f'>{histogram.buckets[-1]}s' if p95 == float('inf') else f'≤{p95}s'
+            line = f'`{" ".join(labels)}`: {count} in {total:.1f}s, avg {total / count:.2f}s, p95 {p95}'
+            if failed[labels]:
+                line += f', ❌ {failed[labels]:.0f}'
+            lines.append(line)
+        return lines or ['_nothing yet_']
+
+    @bot_auth
+    def cmd_perf(self, update: Update, context: CallbackContext) -> None:
+        """
+        Performance summary (latencies, errors, waits and caches)
+        """
+        msg = ['*GraphQL*']
+        msg.extend(self._perf_latencies('snail_graphql_query_seconds', 'snail_graphql_errors_total'))
+        msg.append('*RPC*')
+        msg.extend(self._perf_latencies('snail_rpc_request_seconds', 'snail_rpc_errors_total'))
+        msg.append('*Ticks*')
+        msg.extend(self._perf_latencies('snail_bot_tick_seconds'))
+        msg.append('*Waiting for rate limit*')
+        msg.extend(self._perf_latencies('snail_graphql_wait_seconds'))
+        caches = defaultdict(lambda: [0, 0])
+        cache_requests = metrics.REGISTRY.get('snail_cache_requests_total')
+        for (cache, result), v in (cache_requests.values() if cache_requests else {}).items():
+            caches[cache][result == 'hit'] += v
+        if caches:
+            msg.append('*Caches*')
+            for cache, (miss, hit) in sorted(caches.items()):
+                msg.append(f'`{cache}`: {hit * 100 / (hit + miss):.0f}% hits of {hit + miss:.0f}')
+        update.message.reply_markdown('\n'.join(msg))
+
+    @bot_auth
+    def cmd_memory(self, update: Update, context: CallbackContext) -> None:
+        """
+        Memory usage (cache sizes and top allocators)
+        """
+        rss = memory.rss()
+        msg = [f'*RSS*: {rss / 1024 / 1024:.1f} MB' if rss is not None else '*RSS*: unknown']
+        msg.append('*Structures*')
+        for name, size in sorted(memory.sizes().items()):
+            msg.append(f'`{name}`: {size}')
+        msg.append('*Top allocators*')
+        if memory.start_tracing():
+            msg.append('_tracing started, check again later_')
+        else:
+            current, peak = memory.traced()
+            msg.append(f'traced {current / 1024 / 1024:.1f} MB (peak {peak / 1024 / 1024:.1f} MB)')
+            for location, size, count in memory.top_allocators():
+                path, line = location.rsplit(':', 1)
+                path = Path(path)
+                msg.append(f'`{path.parent.name}/{path.name}:{line}`: {size / 1024:.0f} KB in {count} blocks')
+        update.message.reply_markdown('\n'.join(msg))
+
     def __setting_value(self, setting, short=False):
         v = getattr(self.any_cli.args, setting.dest)
         if setting.type in (int, float):
@@ -1143,11 +1233,14 @@ Total slime won in missions: **{total}**
         if self.updater:
             self.updater.bot.set_my_commands(self._listed_commands())
             self.updater.start_polling()
+            self._sender.start()
+            self.jobs.start()
 
     def stop_polling(self):
         if self.updater:
             self.updater.stop()
-            self.updater.bot.edit_message_text
+            self.jobs.stop()
+            self._sender.stop()
 
     def _breed_status_markdown(self, status):
         if status >= 0:
@@ -1194,6 +1287,8 @@ Total slime won in missions: **{total}**
 
         Returns:
             :class:`telegram.Message`: On success, the sent message is returned.
+            :class:`tgsender.PendingMessage`: Once polling started, as messages are queued to a background sender.
+                It can still be used as `edit` in following calls.
 
         Raises:
             :class:`telegram.error.TelegramError`
@@ -1222,9 +1317,15 @@ Total slime won in missions: **{total}**
                     reply_markup = InlineKeyboardMarkup(keyboard)
                 else:
                     reply_markup = None
+                if self._sender.running:
+                    return self._sender.send(
+                        chat_id, message, parse_mode=format, silent=silent, reply_markup=reply_markup
+                    )
                 return self.updater.bot.send_message(
                     chat_id, message, parse_mode=format, disable_notification=silent, reply_markup=reply_markup
                 )
+            elif self._sender.running:
+                return self._sender.edit(edit, message, parse_mode=format)
             else:
                 return self.updater.bot.edit_message_text(
                     message, edit['chat']['id'], edit['message_id'], parse_mode=format
@@ -1241,7 +1342,53 @@ Total slime won in missions: **{total}**
         return self.SNAIL_ID2_RE.sub(_r, m)
 
 
+def _job_progress(kwargs, edit_reply_markup: Callable):
+    # progress edits are where a cancelled job stops, and they carry its cancel button (while it is running)
+    job = jobs.current()
+    if job is not None:
+        job.checkpoint()
+        if job.background and 'reply_markup' not in kwargs:
+            kwargs['reply_markup'] = InlineKeyboardMarkup(
+                [[InlineKeyboardButton('✋ Cancel', callback_data=f'cancel {job.id}')]]
+            )
+            job.on_done = functools.partial(_remove_cancel_button, edit_reply_markup)
+
+
+def _remove_cancel_button(edit_reply_markup: Callable):
+    try:
+        edit_reply_markup(reply_markup=None)
+    except BadRequest:
+        # already removed by a final edit (message is not modified)
+        pass
+
+
+def _job_result():
+    # the result replaces the progress message (and its cancel button, as it sets its own markup or none)
+    job = jobs.current()
+    if job is not None:
+        job.on_done = None
+
+
+def progress_edit_text(message, *args, **kwargs):
+    """same as `message.edit_text`, as progress of the current job (if any)"""
+    _job_progress(kwargs, message.edit_reply_markup)
+    return message.edit_text(*args, **kwargs)
+
+
+def result_edit_text(message, *args, **kwargs):
+    """same as `message.edit_text`, as the final result of the current job (if any)"""
+    _job_result()
+    return message.edit_text(*args, **kwargs)
+
+
+def result_edit_message_text(query, *args, **kwargs):
+    """same as `query.edit_message_text`, as the final result of the current job (if any)"""
+    _job_result()
+    return query.edit_message_text(*args, **kwargs)
+
+
 def trivial_edit_message_text(query, *args, **kwargs):
+    _job_progress(kwargs, query.edit_message_reply_markup)
     try:
         return query.edit_message_text(*args, **kwargs)
     except Exception:
@@ -1249,11 +1396,8 @@ def trivial_edit_message_text(query, *args, **kwargs):
 
 
 def trivial_edit_text(query, *args, **kwargs):
+    _job_progress(kwargs, query.edit_reply_markup)
     try:
         return query.edit_text(*args, **kwargs)
     except Exception:
         logger.exception('telegram timeout')
-
-
-def cli_header(cli_name):
-    return f'`>> {cli_name}`'
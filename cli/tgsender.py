@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from telegram import constants
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# plain messages to the same chat queued within this window are sent as a single one
+COALESCE_SECONDS = 1.0
+# minimum seconds between edits of the same message (intermediate edits are dropped)
+EDIT_INTERVAL = 3.0
+# telegram flood limits: ~1 message per second per chat, 30 per second overall
+CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1 / 30
+# network errors retried before giving up on a message
+RETRIES = 3
+PART_SEPARATOR = '\n\n'
+
+
+@dataclass(eq=False)
+class _Outgoing:
+    chat_id: int
+    parse_mode: Optional[str]
+    due: float
+    # send
+    parts: list[str] = field(default_factory=list)
+    silent: bool = False
+    reply_markup: Any = None
+    # edit: pending send (`target`) or an existing message (`message_id`, `text`)
+    target: Optional['_Outgoing'] = None
+    message_id: Optional[int] = None
+    text: Optional[str] = None
+    attempts: int = 0
+    message: Any = None
+    edited_at: float = 0
+    edit: Optional['_Outgoing'] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def is_edit(self) -> bool:
+        return self.target is not None or self.message_id is not None
+
+    def render(self) -> str:
+        if self.target is not None:
+            return PART_SEPARATOR.join(self.target.parts)
+        if self.text is not None:
+            return self.text
+        return PART_SEPARATOR.join(self.parts)
+
+
+class PendingMessage:
+    """returned by `TelegramSender.send`, can be used as `edit` target before the message is actually sent"""
+
+    def __init__(self, item: _Outgoing, index: int):
+        self._item = item
+        self._index = index
+
+    def result(self, timeout: Optional[float] = None):
+        """the sent `telegram.Message` (None if sending failed or timed out)"""
+        self._item.done.wait(timeout)
+        return self._item.message
+
+
+class TelegramSender:
+    """
+    Background sender for bot notifications, so the bot loop never waits on Telegram:
+    * plain messages to the same chat within `coalesce` seconds are merged into one
+    * edits of the same message are debounced to one every `edit_interval` seconds
+    * per chat / global flood limits are respected, as well as RetryAfter replies
+    """
+
+    def __init__(self, bot, coalesce: float = COALESCE_SECONDS, edit_interval: float = EDIT_INTERVAL):
+        self.bot = bot
+        self.coalesce = coalesce
+        self.edit_interval = edit_interval
+        self._items: list[_Outgoing] = []
+        self._cond = threading.Condition()
+        self._chat_next: dict[int, float] = {}
+        self._global_next = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='tgsender', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10):
+        """send whatever is queued (waiting up to `timeout` seconds) and stop"""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def send(
+        self, chat_id: int, text: str, parse_mode: Optional[str] = None, silent: bool = False, reply_markup=None
+    ) -> PendingMessage:
+        now = time.monotonic()
+        with self._cond:
+            if reply_markup is None:
+                for item in reversed(self._items):
+                    if item.chat_id != chat_id or item.is_edit:
+                        continue
+                    if (
+                        item.reply_markup is None
+                        and item.parse_mode == parse_mode
+                        and item.silent == silent
+                        and len(item.render()) + len(PART_SEPARATOR) + len(text) <= constants.MAX_MESSAGE_LENGTH
+                    ):
+                        item.parts.append(text)
+                        return PendingMessage(item, len(item.parts) - 1)
+                    # keep order within the chat, only merge with the latest queued message
+                    break
+            item = _Outgoing(
+                chat_id, parse_mode, now + self.coalesce, parts=[text], silent=silent, reply_markup=reply_markup
+            )
+            self._items.append(item)
+            self._cond.notify_all()
+        return PendingMessage(item, 0)
+
+    def edit(self, target, text: str, parse_mode: Optional[str] = None):
+        """
+        edit `target`: a `PendingMessage` (from `send`) or an existing message (dict or `telegram.Message`)
+        returns the `PendingMessage` (for the first) or None
+        """
+        now = time.monotonic()
+        with self._cond:
+            if isinstance(target, PendingMessage):
+                item = target._item
+                item.parts[target._index] = text
+                if item in self._items:
+                    # not sent yet, goes out with the new text
+                    return target
+                if item.edit is None:
+                    item.edit = _Outgoing(
+                        item.chat_id, parse_mode, max(now, item.edited_at + self.edit_interval), target=item
+                    )
+                    self._items.append(item.edit)
+                    self._cond.notify_all()
+                return target
+
+            chat_id = target['chat']['id']
+            message_id = target['message_id']
+            for item in self._items:
+                if item.chat_id == chat_id and item.message_id == message_id:
+                    item.text = text
+                    return None
+            self._items.append(_Outgoing(chat_id, parse_mode, now, message_id=message_id, text=text))
+            self._cond.notify_all()
+        return None
+
+    def _ready_at(self, item: _Outgoing) -> float:
+        due = item.due
+        if item.target is not None:
+            due = max(due, item.target.edited_at + self.edit_interval)
+        return max(due, self._chat_next.get(item.chat_id, 0), self._global_next)
+
+    def _next_item(self) -> Optional[_Outgoing]:
+        with self._cond:
+            while True:
+                if not self._items and self._stopping:
+                    return None
+                now = time.monotonic()
+                wake = None
+                first_send = set()
+                for item in self._items:
+                    if item.is_edit:
+                        if item.target is not None and not item.target.done.is_set():
+                            continue
+                    elif item.chat_id in first_send:
+                        # sends are delivered in order within a chat
+                        continue
+                    else:
+                        first_send.add(item.chat_id)
+                    at = self._ready_at(item)
+                    if at <= now:
+                        self._items.remove(item)
+                        return item
+                    wake = at if wake is None else min(wake, at)
+                self._cond.wait(None if wake is None else wake - now)
+
+    def _deliver(self, item: _Outgoing):
+        if item.is_edit:
+            message_id = item.message_id
+            if item.target is not None:
+                if item.target.message is None:
+                    # original message was not sent, nothing to edit
+                    return
+                message_id = item.target.message['message_id']
+                with self._cond:
+                    item.target.edit = None
+            self.bot.edit_message_text(item.render(), item.chat_id, message_id, parse_mode=item.parse_mode)
+            if item.target is not None:
+                item.target.edited_at = time.monotonic()
+        else:
+            item.message = self.bot.send_message(
+                item.chat_id,
+                item.render(),
+                parse_mode=item.parse_mode,
+                disable_notification=item.silent,
+                reply_markup=item.reply_markup,
+            )
+
+    def _requeue(self, item: _Outgoing, delay: float):
+        with self._cond:
+            item.due = time.monotonic() + delay
+            if item.target is not None:
+                if item.target.edit is not None:
+                    # a newer edit got queued meanwhile, it will carry the latest text
+                    return
+                item.target.edit = item
+            self._items.insert(0, item)
+
+    def _run(self):
+        while True:
+            item = self._next_item()
+            if item is None:
+                return
+            try:
+                self._deliver(item)
+            except RetryAfter as e:
+                logger.warning('telegram flood control, retrying in %s seconds', e.retry_after)
+                with self._cond:
+                    self._chat_next[item.chat_id] = time.monotonic() + e.retry_after
+                self._requeue(item, e.retry_after)
+                continue
+            except BadRequest as e:
+                if 'not modified' not in str(e):
+                    logger.exception('telegram rejected message')
+            except NetworkError:
+                item.attempts += 1
+                if item.attempts < RETRIES:
+                    logger.warning('failed to send telegram message, retrying')
+                    self._requeue(item, item.attempts * CHAT_INTERVAL)
+                    continue
+                logger.exception('failed to send telegram message')
+            except Exception:
+                logger.exception('failed to send telegram message')
+            finally:
+                now = time.monotonic()
+                with self._cond:
+                    self._chat_next[item.chat_id] = max(self._chat_next.get(item.chat_id, 0), now + CHAT_INTERVAL)
+                    self._global_next = now + GLOBAL_INTERVAL
+                    self._cond.notify_all()
+            item.done.set()
+            with self._cond:
+                self._cond.notify_all()
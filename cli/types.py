@@ -2,7 +2,7 @@ from dataclasses import dataclass
 
 from web3 import Account
 
-from snail.gqlclient.types import Snail
+from snail.gqlclient.types import Race, Snail
 
 
 @dataclass
@@ -39,3 +39,15 @@ class Wallet:
 class RaceCandidate:
     score: int
     snail: Snail
+
+
+@dataclass
+class PendingJoin:
+    """last spot join submitted without waiting for its transaction receipt"""
+
+    snail: Snail
+    race: Race
+    payload: dict
+    tx_hash: bytes
+    # time.monotonic() of submission
+    submitted_at: float
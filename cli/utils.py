@@ -7,11 +7,19 @@ from typing import TYPE_CHECKING, Union
 from snail.gqlclient.types import Race, Snail
 from snail.web3client import DECIMALS, web3_types
 
+from . import memory
+from .helpers import CACHE_REQUESTS, LRUDict
+
 if TYPE_CHECKING:
     from . import cli
 
 logger = logging.getLogger(__name__)
 
+# seconds a snail race history is reused
+SNAIL_HISTORY_TTL = 1800
+# (snail, limit) race histories kept, least recently used are dropped
+SNAIL_HISTORY_SIZE = 500
+
 
 def tznow():
     return datetime.now(tz=timezone.utc)
@@ -60,7 +68,8 @@ def balance_balance(clis: 'list[cli.CLI]', limit, stop, callback, force=False):
 class CachedSnailHistory:
     def __init__(self, cli: 'cli.CLI'):
         self.cli = cli
-        self._cache = {}
+        self._cache = LRUDict(capacity=SNAIL_HISTORY_SIZE, ttl=SNAIL_HISTORY_TTL)
+        memory.track('snail_history', self, lambda h: h._cache)
 
     @staticmethod
     def race_stats(snail_id, race):
@@ -81,14 +90,15 @@ class CachedSnailHistory:
         """
         if isinstance(snail_id, Snail):
             snail_id = snail_id.id
-        # FIXME: make this prettier with a TTLed lru_cache
         key = (snail_id, limit)
         data, last_update = self._cache.get(key, (None, 0))
         _now = time.time()
         # re-fetch only once per 30min
         # TODO: make configurable? update only once and use race notifications to keep it up to date?
-        if _now - last_update < 1800:
+        if _now - last_update < SNAIL_HISTORY_TTL:
+            CACHE_REQUESTS.inc('snail_history', 'hit')
             return data
+        CACHE_REQUESTS.inc('snail_history', 'miss')
 
         races = []
         stats = defaultdict(lambda: [0, 0, 0, 0])
@@ -117,7 +127,7 @@ class CachedSnailHistory:
         key = (snail_id, limit)
         data, last_update = self._cache.get(key, (None, 0))
         _now = time.time()
-        if _now - last_update >= 1800:
+        if _now - last_update >= SNAIL_HISTORY_TTL:
             # do not update anything as cache already expired
             return False
 
@@ -1,8 +1,7 @@
 import time
-from functools import cached_property
 
 
-class cached_property_with_ttl(cached_property):
+class cached_property_with_ttl:
     """
     >>> class A:
     ...     @cached_property_with_ttl(300)
@@ -32,38 +31,39 @@ class cached_property_with_ttl(cached_property):
     """
 
     def __init__(self, ttl):
-        # fake func
-        super().__init__(self.__init__)
-        self._real_func = None
-        self._owner = None
         self._ttl = ttl
+        self._func = None
+        self.attrname = None
+        self.name = None
 
     def __call__(self, func):
-        self.func = self.func_and_time
-        self._real_func = func
-        self.attrname = None
+        self._func = func
         self.__doc__ = func.__doc__
         return self
 
     def __set_name__(self, owner, name):
         # add "_ttl" to attrname so it does not override the actual property/func
-        super().__set_name__(owner, f'_{name}_ttl')
-        self._owner = owner
+        self.attrname = f'_{name}_ttl'
+        self.name = name
         setattr(owner, f'reset_cache_{name}', lambda instance: self.clear_cache(instance))
 
     def clear_cache(self, instance):
         # expire cache
-        try:
-            del instance.__dict__[self.attrname]
-        except KeyError:
-            """ignore, not used yet"""
+        instance.__dict__.pop(self.attrname, None)
 
-    def func_and_time(self, instance):
-        return self._real_func(instance), time.time()
+    def _record(self, hit: bool):
+        """hook for cache statistics"""
 
     def __get__(self, instance, owner=None):
-        val, last_update = super().__get__(instance, owner=owner)
-        if (time.time() - last_update) > self._ttl:
-            self.clear_cache(instance)
-            val, _ = super().__get__(instance, owner=owner)
-        return val
+        if instance is None:
+            return self
+        # no lock (unlike functools.cached_property before python 3.12, one for all instances of the class):
+        # different instances compute it concurrently, at worst the same one computes it twice
+        cached = instance.__dict__.get(self.attrname)
+        if cached is None or (time.time() - cached[1]) > self._ttl:
+            self._record(False)
+            cached = (self._func(instance), time.time())
+            instance.__dict__[self.attrname] = cached
+        else:
+            self._record(True)
+        return cached[0]
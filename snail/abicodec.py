@@ -0,0 +1,71 @@
+"""
+Calldata encoding / decoding straight from eth_abi, using the selectors and type strings
+that update_abi.py generates (`FUNCTIONS` of each `snail.contracts` module).
+Skips web3 contract argument validation and ABI lookups, meant for hot paths.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.encoding import TupleEncoder
+from eth_abi.registry import registry
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
+
+
+@dataclass(frozen=True)
+class Function:
+    name: str
+    selector: bytes
+    inputs: tuple[str, ...]
+    encoder: TupleEncoder
+    decoder: TupleDecoder
+
+    def _normalize(self, args) -> tuple:
+        # hex strings are accepted for (top-level) bytes arguments, as web3 does
+        return tuple(
+            HexBytes(v) if isinstance(v, str) and t.startswith('bytes') and '[' not in t else v
+            for t, v in zip(self.inputs, args)
+        )
+
+    def encode(self, *args) -> bytes:
+        """
+        >>> from snail import contracts
+        >>> function(contracts.snail_nft, 'balanceOf').encode_hex('0xbad43dfb19C6Ab77D9eC30704b89879F1e6d3081')
+        '0x70a08231000000000000000000000000bad43dfb19c6ab77d9ec30704b89879f1e6d3081'
+        """
+        if len(args) != len(self.inputs):
+            raise TypeError(f'{self.name} expects {len(self.inputs)} arguments, got {len(args)}')
+        return self.selector + self.encoder(self._normalize(args))
+
+    def encode_hex(self, *args) -> str:
+        return '0x' + self.encode(*args).hex()
+
+    def decode(self, data: bytes) -> tuple[Any, ...]:
+        """
+        >>> from snail import contracts
+        >>> function(contracts.snail_nft, 'balanceOf').decode(bytes.fromhex('00' * 31 + '2a'))
+        (42,)
+        """
+        return self.decoder(ContextFramesBytesIO(bytes(data)))
+
+
+@lru_cache(maxsize=None)
+def function(module, name: str) -> Function:
+    """encoder/decoder for function `name` of contract `module` (built once)"""
+    selector, inputs, outputs = module.FUNCTIONS[name]
+    return Function(
+        name=name,
+        selector=bytes.fromhex(selector[2:]),
+        inputs=inputs,
+        encoder=TupleEncoder(encoders=[registry.get_encoder(t) for t in inputs]),
+        decoder=TupleDecoder(decoders=[registry.get_decoder(t) for t in outputs]),
+    )
+
+
+@lru_cache(maxsize=None)
+def address(module) -> str:
+    """checksummed contract address of `module`"""
+    return to_checksum_address(module.CONTRACT)
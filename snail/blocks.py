@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+# seconds between eth_blockNumber calls (only while there is someone waiting)
+POLL_INTERVAL = 0.5
+
+
+class BlockWatcher:
+    """
+    Tracks chain head and wakes up waiters when a new block arrives.
+    Uses a `newHeads` websocket subscription if `ws_uri` is set, `eth_blockNumber` polling otherwise
+    (polling only happens while there are waiters).
+    """
+
+    def __init__(self, web3: Web3, poll_interval: float = POLL_INTERVAL, ws_uri: Optional[str] = None):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.ws_uri = ws_uri
+        self.block_number: Optional[int] = None
+        self._cond = threading.Condition()
+        self._waiters = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def _set_block(self, number: int):
+        with self._cond:
+            if self.block_number is None or number > self.block_number:
+                self.block_number = number
+                self._cond.notify_all()
+
+    async def _subscribe(self):
+        import websockets
+
+        async with websockets.connect(self.ws_uri) as ws:
+            await ws.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}))
+            while True:
+                msg = json.loads(await ws.recv())
+                head = msg.get('params', {}).get('result')
+                if head:
+                    self._set_block(int(head['number'], 16))
+
+    def _poll(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._waiters > 0)
+            try:
+                self._set_block(self.web3.eth.block_number)
+            except Exception:
+                logger.exception('failed to get block number')
+            time.sleep(self.poll_interval)
+
+    def _run(self):
+        if self.ws_uri:
+            try:
+                asyncio.run(self._subscribe())
+            except Exception:
+                logger.exception('block subscription failed, falling back to polling')
+        self._poll()
+
+    def _start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='blockwatcher', daemon=True)
+                self._thread.start()
+
+    def _wait(self, condition: Callable[[], bool], timeout: Optional[float]) -> bool:
+        self._start()
+        with self._cond:
+            self._waiters += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(condition, timeout=timeout)
+            finally:
+                self._waiters -= 1
+
+    def wait_for_block(self, after: Optional[int] = None, timeout: Optional[float] = None) -> Optional[int]:
+        """wait for a block newer than `after` (default: current one), returns its number or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if after is None:
+            if self.block_number is None:
+                # first time, get a baseline
+                if not self._wait(lambda: self.block_number is not None, timeout):
+                    return None
+            after = self.block_number
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        if not self._wait(lambda: self.block_number > after, remaining):
+            return None
+        return self.block_number
+
+    def wait_until(self, predicate: Callable[[], Any], timeout: float) -> Any:
+        """
+        evaluate `predicate` now and after every new block, until it returns a truthy value (which is returned)
+        raises TimeoutError if it doesn't within `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            block = self.block_number
+            r = predicate()
+            if r:
+                return r
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError()
+            self.wait_for_block(after=block, timeout=remaining)
+
+
+_watchers: dict[Any, BlockWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(web3: Web3, ws_uri: Optional[str] = None) -> BlockWatcher:
+    """watcher shared by every client using the same provider"""
+    with _watchers_lock:
+        if web3.provider not in _watchers:
+            _watchers[web3.provider] = BlockWatcher(web3, ws_uri=ws_uri)
+        return _watchers[web3.provider]
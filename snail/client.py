@@ -5,11 +5,15 @@ from typing import Generator, List, Union
 
 import requests
 
-from . import gqlclient, web3client
+from . import deadline, gqlclient, web3client
 from .gqlclient import types
 
 logger = logging.getLogger(__name__)
 
+# seconds each page of a listing may take to fetch, retries included (counted from when the page is requested,
+# so the consumer and the throttle between pages do not use it up)
+PAGE_DEADLINE = 120
+
 
 class League(int, Enum):
     GOLD = 5
@@ -59,8 +63,24 @@ class Client:
         web3_priority_fee=0,
         rate_limiter=None,
         gql_retry=None,
+        web3_ws=None,
+        gql_impersonate=False,
+        gql_pool_size=None,
+        gql_keepalive=None,
+        gql_max_concurrency=None,
+        gql_hedge=None,
     ):
-        self.gql = gqlclient.Client(http_token=http_token, proxy=proxy, rate_limiter=rate_limiter, retry=gql_retry)
+        self.gql = gqlclient.Client(
+            http_token=http_token,
+            proxy=proxy,
+            rate_limiter=rate_limiter,
+            retry=gql_retry,
+            impersonate=gql_impersonate,
+            pool_size=gql_pool_size,
+            keepalive=gql_keepalive,
+            max_concurrency=gql_max_concurrency,
+            hedge_fraction=gql_hedge,
+        )
         if wallet and web3_provider:
             self.web3 = web3client.Client(
                 wallet,
@@ -69,6 +89,7 @@ class Client:
                 web3_provider_class=web3_provider_class,
                 max_fee=web3_max_fee,
                 max_priority_fee=web3_priority_fee,
+                web3_ws=web3_ws,
             )
         self._gql_token = None
         self._priority_fee = web3_priority_fee
@@ -97,7 +118,9 @@ class Client:
         while True:
             logger.debug('fetching offset %d (call %d) for %s', c, calls, getattr(method, "__name__", str(method)))
             kwargs['offset'] = c
-            objs = method(*args, **kwargs)
+            # set per page, as the context var would leak to the consumer between pages
+            with deadline.deadline(PAGE_DEADLINE):
+                objs = method(*args, **kwargs)
             if not objs.get(key):
                 break
             total = objs.get('count')
@@ -124,7 +147,9 @@ class Client:
                 args,
             )
             kwargs['cursor'] = c
-            objs = method(*args, **kwargs)
+            # set per page, as the context var would leak to the consumer between pages
+            with deadline.deadline(PAGE_DEADLINE):
+                objs = method(*args, **kwargs)
             c = cursor(objs)
             objs = key(objs)
             _r = map(klass, objs) if klass else objs
@@ -235,15 +260,27 @@ class Client:
             **kwargs,
         )
 
-    def join_mission_races(self, snail_id: int, race_id: int, allow_last_spot=False, priority_fee=None):
-        """join mission race - signature is generated by `sign_race_join`"""
+    def join_mission_races(
+        self,
+        snail_id: int,
+        race_id: int,
+        allow_last_spot=False,
+        priority_fee=None,
+        wait_for_transaction_receipt: Union[bool, float] = None,
+    ):
+        """
+        join mission race - signature is generated by `sign_race_join`
+        if `wait_for_transaction_receipt` is False, last spot joins return the tx hash instead of the receipt
+        """
         signature = self.web3.sign_race_join(snail_id, race_id)
         r = self.gql.join_mission_races(snail_id, race_id, self.web3.wallet, signature)
         if r.get('status') == 0:
             return r, None
         elif r.get('status') == 1:
             if allow_last_spot:
-                return r, self.rejoin_mission_races(r, priority_fee=priority_fee)
+                return r, self.rejoin_mission_races(
+                    r, priority_fee=priority_fee, wait_for_transaction_receipt=wait_for_transaction_receipt
+                )
             else:
                 raise RequiresTransactionClientError('requires_transaction', r)
         else:
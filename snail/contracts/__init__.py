@@ -1,19 +1,28 @@
 # generated automatically - DO NOT MODIFY
 
-from . import (
-    bulk_transfer,
-    multicall,
-    snail_gene_marketplace,
-    snail_guild,
-    snail_incubator,
-    snail_lab,
-    snail_marketplace,
-    snail_mega_race,
-    snail_nft,
-    snail_preference,
-    snail_race,
-    snail_shop,
-    snail_token,
-    traderjoe,
-    wavax,
-)
+import importlib
+
+__all__ = [
+    'bulk_transfer',
+    'multicall',
+    'snail_gene_marketplace',
+    'snail_guild',
+    'snail_incubator',
+    'snail_lab',
+    'snail_marketplace',
+    'snail_mega_race',
+    'snail_nft',
+    'snail_preference',
+    'snail_race',
+    'snail_shop',
+    'snail_token',
+    'traderjoe',
+    'wavax',
+]
+
+
+def __getattr__(name):
+    # ABI modules are big, load them on first use
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -51,3 +51,10 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'bulkTransfer20': ('0x2ffb3aa9', ('address', '(address,uint256)[]'), ()),
+    'bulkTransfer721': ('0x765888e3', ('address', '(address,uint256)[]'), ()),
+    'bulkTransfer721Lite': ('0xea137f07', ('address', 'address', 'uint256[]'), ()),
+}
@@ -238,3 +238,23 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'aggregate': ('0x252dba42', ('(address,bytes)[]',), ('uint256', 'bytes[]')),
+    'aggregate3': ('0x82ad56cb', ('(address,bool,bytes)[]',), ('(bool,bytes)[]',)),
+    'aggregate3Value': ('0x174dea71', ('(address,bool,uint256,bytes)[]',), ('(bool,bytes)[]',)),
+    'blockAndAggregate': ('0xc3077fa9', ('(address,bytes)[]',), ('uint256', 'bytes32', '(bool,bytes)[]')),
+    'getBasefee': ('0x3e64a696', (), ('uint256',)),
+    'getBlockHash': ('0xee82ac5e', ('uint256',), ('bytes32',)),
+    'getBlockNumber': ('0x42cbb15c', (), ('uint256',)),
+    'getChainId': ('0x3408e470', (), ('uint256',)),
+    'getCurrentBlockCoinbase': ('0xa8b0574e', (), ('address',)),
+    'getCurrentBlockDifficulty': ('0x72425d9d', (), ('uint256',)),
+    'getCurrentBlockGasLimit': ('0x86d516e8', (), ('uint256',)),
+    'getCurrentBlockTimestamp': ('0x0f28c97d', (), ('uint256',)),
+    'getEthBalance': ('0x4d2301cc', ('address',), ('uint256',)),
+    'getLastBlockHash': ('0x27e86d6e', (), ('bytes32',)),
+    'tryAggregate': ('0xbce38bd7', ('bool', '(address,bytes)[]'), ('(bool,bytes)[]',)),
+    'tryBlockAndAggregate': ('0x399542e9', ('bool', '(address,bytes)[]'), ('uint256', 'bytes32', '(bool,bytes)[]')),
+}
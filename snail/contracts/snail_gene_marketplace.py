@@ -331,3 +331,39 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'addRecognizeContract': ('0xba17fa40', ('address',), ()),
+    'enableMarketplace': ('0xb398b448', (), ()),
+    'fullfillGeneSale': ('0x6bfdcf69', ('address', 'uint256', 'uint256'), ()),
+    'fullfillInHouseBreeding': ('0xcbf55244', ('uint256', 'uint256'), ()),
+    'getOwner': ('0xc41a360a', ('uint256',), ('address',)),
+    'getPrice': ('0xe7572230', ('uint256',), ('uint256',)),
+    'getSnailGender': ('0x140513cb', ('uint256',), ('uint8',)),
+    'isActive': ('0x82afd23b', ('uint256',), ('bool',)),
+    'isBazaarOpen': ('0x0f03f0fe', (), ('bool',)),
+    'isContractRecognized': ('0xee75c759', ('address',), ('bool',)),
+    'isGenderChangeAvailable': ('0x640d7a6b', ('uint256',), ('bool',)),
+    'isGenderChangeEnabled': ('0x1b4e3292', (), ('bool',)),
+    'isIncubationPossible': ('0x25c801d0', ('uint256', 'uint256'), ('bool',)),
+    'listGene': ('0x942474f6', ('uint256', 'uint256'), ()),
+    'maxFemaleProductionCount': ('0x72b81edc', (), ('uint8',)),
+    'maxMaleProductionCount': ('0xa3899d23', (), ('uint8',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'pauseMarketplace': ('0x3ec62279', (), ()),
+    'recognizedContracts': ('0x8ba40477', ('address',), ('bool',)),
+    'removeRecognizedContract': ('0x557807d5', ('address',), ()),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setGender': ('0x4b056120', ('uint256', 'uint8'), ()),
+    'snailGenderCounter': ('0xe05cd07a', ('uint256',), ('uint256',)),
+    'snailGenderTracker': ('0x3976d2db', ('uint256',), ('uint8',)),
+    'snailIncubationTimeTracker': ('0x333b21b6', ('uint256',), ('uint256',)),
+    'snailIncubationTracker': ('0xd6017636', ('uint256', 'uint256'), ('uint8',)),
+    'timeToNextGenderChange': ('0x604483f5', ('uint256',), ('uint256',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'updatePrice': ('0x82367b2d', ('uint256', 'uint256'), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0xc7e42b1b', ('address',), ()),
+    'withdrawMarketItem': ('0x5dd415dd', ('uint256',), ()),
+}
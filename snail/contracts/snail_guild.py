@@ -111,3 +111,16 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'initialize': ('0x485cc955', ('address', 'address'), ()),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'stakeSnails': ('0x873a6fc6', ('(uint256,address,uint256[],uint256,uint256)', 'bytes'), ()),
+    'stakedSnailsOwner': ('0x2dc44ff5', ('uint256',), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'unstakeSnails': ('0xcbd68c89', ('uint256[]',), ()),
+}
@@ -201,3 +201,39 @@ ABI = [
     {'inputs': [], 'name': 'withdrawErc20', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'addKnownMarketplace': ('0x87e4de95', ('address',), ()),
+    'changeGenemarketplaceContract': ('0xd850433b', ('address',), ()),
+    'enableIncubator': ('0x2de478ca', (), ()),
+    'geneMarketContract': ('0x99149811', (), ('address',)),
+    'getCurrentCoefficent': ('0xb5d0fcc3', (), ('uint256',)),
+    'getCurrentNonce': ('0x79192251', ('address',), ('uint256',)),
+    'incubateSnails': (
+        '0x56ae9596',
+        ('address', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256', 'uint256', 'bytes'),
+        (),
+    ),
+    'isAutoProtocolCoefficent': ('0x2e3c4a18', ('bool',), ()),
+    'isAutoProtocolCoefficentEnabled': ('0x7a489bb0', (), ('bool',)),
+    'isIncubatorEnabled': ('0x49bd87df', (), ('bool',)),
+    'knownMarketplaces': ('0xdaae7a00', ('address',), ('bool',)),
+    'lastBreedingTimeTracker': ('0xbf9e82fb', ('uint256',), ('uint256',)),
+    'lastTimestamp': ('0x19d8ac61', (), ('uint256',)),
+    'nftContract': ('0xd56d229d', (), ('address',)),
+    'nonceCounter': ('0x83aa78df', ('address',), ('uint256',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'pauseIncubator': ('0x82e7d8d5', (), ()),
+    'removeKnownMarketplace': ('0x413eba0c', ('address',), ()),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setProtocolCoefficent': ('0x9a9fe7e8', ('uint256',), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'setThresholdMultiplier': ('0xaccd5176', ('uint256',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'thresholdMultiplier': ('0xca9cffb9', (), ('uint256',)),
+    'tokenContract': ('0x55a373d6', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0x3e3f2359', (), ()),
+}
@@ -116,3 +116,19 @@ ABI = [
     },
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'graveyardContractAddress': ('0xa0d17fa0', (), ('address',)),
+    'initialize': ('0xc0c53b8b', ('address', 'address', 'address'), ()),
+    'isLabEnabled': ('0x694ca0ec', (), ('bool',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'useLab': ('0x2f6cc5b4', ('(uint256,uint256,uint256[],address,uint256,uint256,uint256)', 'bytes'), ()),
+    'withdraw': ('0x3ccfd60b', (), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0xc7e42b1b', ('address',), ()),
+}
@@ -192,3 +192,23 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'emergencyDelist': ('0xa342f71c', ('uint256[]',), ()),
+    'enableMarketplace': ('0xb398b448', (), ()),
+    'fullfillSale': ('0x74fab4db', ('uint256',), ()),
+    'getCurrentListCount': ('0xcaa5f6d5', (), ('uint256',)),
+    'isBazaarOpen': ('0x0f03f0fe', (), ('bool',)),
+    'listMarketItem': ('0x2796390c', ('uint256', 'uint256'), ()),
+    'marketFee': ('0x0ccf2156', (), ('uint256',)),
+    'marketItems': ('0x51f28e14', ('uint256',), ('uint256', 'uint256', 'address', 'uint256', 'bool')),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'pauseMarketplace': ('0x3ec62279', (), ()),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'updateFees': ('0x78dacee1', ('uint256',), ()),
+    'updatePrice': ('0x82367b2d', ('uint256', 'uint256'), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawMarketItem': ('0x5dd415dd', ('uint256',), ()),
+}
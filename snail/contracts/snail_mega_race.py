@@ -198,3 +198,31 @@ ABI = [
     },
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'claimRewards': ('0x372500ab', (), ()),
+    'claimableRewards': ('0x6c003a9b', (), ('uint256',)),
+    'directResultEnabled': ('0xb2b118df', (), ('bool',)),
+    'initialize': ('0xc0c53b8b', ('address', 'address', 'address'), ()),
+    'isRewardClaimEnabled': ('0x620e38e2', (), ('bool',)),
+    'joinMegaRace': (
+        '0x97c3032e',
+        ('(uint256,uint256,address,uint256,uint256,uint256)', '(uint256,address[],uint256[])', 'uint256', 'bytes'),
+        (),
+    ),
+    'megaRacesEnabled': ('0x68e5d06e', (), ('bool',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'racerCountbyRaceId': ('0x85c5197c', ('uint256',), ('uint256',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'rewardDistributionTracker': ('0x7a7f6476', ('uint256',), ('bool',)),
+    'rewardTracker': ('0x3c04c717', ('address',), ('uint256',)),
+    'setMegaRacesEnabled': ('0x29356d6c', ('bool',), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'setWavaxTreasuryContract': ('0xb8750d23', ('address',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'wavaxTreasuryContract': ('0xf0aeb46a', (), ('address',)),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0xc7e42b1b', ('address',), ()),
+}
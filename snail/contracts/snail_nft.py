@@ -430,3 +430,53 @@ ABI = [
     {'inputs': [], 'name': 'withdrawBalance', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'INITIAL_SUPPLY': ('0x2ff2e9dc', (), ('uint256',)),
+    'MARKETING_ALLOCATION': ('0x8e80bd39', (), ('uint256',)),
+    'PUBLIC_ALLOCATION': ('0xe3177e6b', (), ('uint256',)),
+    'SNAIL_PRICE': ('0x39656da7', (), ('uint256',)),
+    'addRecognizeContract': ('0xba17fa40', ('address',), ()),
+    'antiBotMerkleRoot': ('0x828976e1', (), ('bytes32',)),
+    'antiBotMint': ('0x475d6317', ('bytes32[]',), ()),
+    'approve': ('0x095ea7b3', ('address', 'uint256'), ()),
+    'balanceOf': ('0x70a08231', ('address',), ('uint256',)),
+    'breedSnail': ('0x83f1af24', ('address', 'uint256', 'uint256'), ()),
+    'burnSnail': ('0xfc1a5087', ('uint256',), ()),
+    'generateSnail': ('0xa7278d13', ('address',), ()),
+    'getApproved': ('0x081812fc', ('uint256',), ('address',)),
+    'getRemainingWhitelistSpot': ('0xf70ae25d', (), ('uint256',)),
+    'grossAmount': ('0xb1eb6723', (), ('uint256',)),
+    'isApprovedForAll': ('0xe985e9c5', ('address', 'address'), ('bool',)),
+    'isContractRecognized': ('0xee75c759', ('address',), ('bool',)),
+    'isPostWhitelistMintEnabled': ('0xe0a4488c', (), ('bool',)),
+    'isPublicMintEnabled': ('0x0116bc2d', (), ('bool',)),
+    'isWhitelistMintEnabled': ('0x51aaceab', (), ('bool',)),
+    'mint': ('0xa0712d68', ('uint256',), ()),
+    'mintMarketingSnail': ('0xde8a5815', ('address',), ()),
+    'minted': ('0x4f02c420', (), ('uint256',)),
+    'name': ('0x06fdde03', (), ('string',)),
+    'newBornCount': ('0xcbd33901', (), ('uint256',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'ownerOf': ('0x6352211e', ('uint256',), ('address',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'safeTransferFrom(address,address,uint256)': ('0x42842e0e', ('address', 'address', 'uint256'), ()),
+    'safeTransferFrom(address,address,uint256,bytes)': ('0xb88d4fde', ('address', 'address', 'uint256', 'bytes'), ()),
+    'setAntiBotRoot': ('0x3b0ba75f', ('bytes32',), ()),
+    'setApprovalForAll': ('0xa22cb465', ('address', 'bool'), ()),
+    'setBaseUri': ('0xa0bcfc7f', ('string',), ()),
+    'setPostWhitelistMintEnabled': ('0xfd2b1f1f', ('bool',), ()),
+    'setPublicMintEnabled': ('0x818668d7', ('bool',), ()),
+    'setSnailsAllocation': ('0xf04a1006', ('address[]', 'uint8'), ()),
+    'setWhitelistMintEnabled': ('0xb767a098', ('bool',), ()),
+    'supportsInterface': ('0x01ffc9a7', ('bytes4',), ('bool',)),
+    'symbol': ('0x95d89b41', (), ('string',)),
+    'tokenByIndex': ('0x4f6ccce7', ('uint256',), ('uint256',)),
+    'tokenOfOwnerByIndex': ('0x2f745c59', ('address', 'uint256'), ('uint256',)),
+    'tokenURI': ('0xc87b56dd', ('uint256',), ('string',)),
+    'totalSupply': ('0x18160ddd', (), ('uint256',)),
+    'transferFrom': ('0x23b872dd', ('address', 'address', 'uint256'), ()),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+}
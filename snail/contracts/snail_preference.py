@@ -256,3 +256,39 @@ ABI = [
     {'inputs': [], 'name': 'withdrawErc20', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'GENDER_DURATION': ('0x6c38065b', (), ('uint256',)),
+    'baseChangePrice': ('0xdc4e38e3', (), ('uint256',)),
+    'buySnailNameChange': ('0x6e32a8cb', ('uint256', 'string'), ()),
+    'forceNameChange': ('0x87f1bee5', ('uint256', 'string'), ()),
+    'getCurrentNameChangePrice': ('0x87a69ba5', ('uint256',), ('uint256',)),
+    'getNameChangeCount': ('0x1d72b978', ('uint256',), ('uint256',)),
+    'getSnailName': ('0xcbad4fef', ('uint256',), ('string',)),
+    'isAllFreeChangeUsed': ('0x5992a3ae', ('uint256',), ('bool',)),
+    'isAutoAdjusted': ('0x88e5dde4', (), ('bool',)),
+    'isNameChangeEnabled': ('0x1121c9b4', (), ('bool',)),
+    'isNameChangePurchaseEnabled': ('0xfff5722e', (), ('bool',)),
+    'isNameTaken': ('0xb3da4e34', ('string',), ('bool',)),
+    'maxNameChange': ('0xe3b4a3c7', (), ('uint8',)),
+    'nameChangeIncreaseRate': ('0x46889b01', (), ('uint256',)),
+    'nameChangePrice': ('0x45ca7738', (), ('uint256',)),
+    'nftContract': ('0xd56d229d', (), ('address',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setIsUsingAutoAdjust': ('0x772929af', ('bool',), ()),
+    'setMaxNameChange': ('0xb5a8a7a9', ('uint8',), ()),
+    'setNameBaseChangePrice': ('0x5eaa319b', ('uint256',), ()),
+    'setNameChangeEnabled': ('0x31d55fd0', ('bool',), ()),
+    'setNameChangePrice': ('0x84a1b902', ('uint256',), ()),
+    'setNameChangePriceRate': ('0xf896e5d5', ('uint256',), ()),
+    'setNameChangePurchaseEnabled': ('0x5c8f0ae9', ('bool',), ()),
+    'setSnailName': ('0xc94312db', ('uint256', 'string'), ()),
+    'snailNames': ('0xb4cd0c64', ('uint256',), ('string',)),
+    'takenNames': ('0xb146e408', ('bytes32',), ('bool',)),
+    'tokenContract': ('0x55a373d6', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0x3e3f2359', (), ()),
+}
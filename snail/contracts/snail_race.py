@@ -413,3 +413,71 @@ ABI = [
     {'inputs': [], 'name': 'withdrawErc20', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'autoClaimAfterResultEnabled': ('0x0e0dd381', (), ('bool',)),
+    'claimRewards': ('0x372500ab', (), ()),
+    'claimableCompRewards': ('0xf7b6f6d6', (), ('uint256',)),
+    'claimableDailyRewards': ('0xa40b36c5', (), ('uint256',)),
+    'claimableRewards': ('0x6c003a9b', (), ('uint256',)),
+    'compRewardTracker': ('0x2f144bc6', ('address',), ('uint256',)),
+    'compTreasuryContract': ('0x1cffd1f2', (), ('address',)),
+    'competitiveDistr': ('0x3844f0ff', ('uint256',), ('uint256',)),
+    'competitiveTotalDistr': ('0xbb0741af', (), ('uint256',)),
+    'competitveRaceMaxRacerTracker': ('0xa1028eeb', ('uint256',), ('uint256',)),
+    'competitveRaceUniqueEntryTracker': ('0xe4d1f3db', ('uint256', 'address'), ('bool',)),
+    'dailyRewardTracker': ('0x581d1987', ('address',), ('uint256',)),
+    'dailyTreasuryContract': ('0x8dba30a3', (), ('address',)),
+    'fastResultEnabled': ('0x43fdf92b', (), ('bool',)),
+    'getCurrentNonce': ('0x79192251', ('address',), ('uint256',)),
+    'getRacerCount': ('0x2c5bfcaf', ('uint256[]',), ('uint256[]',)),
+    'initialize': ('0x485cc955', ('address', 'address'), ()),
+    'isCompetitiveRacesEnabled': ('0xd0decc10', (), ('bool',)),
+    'isDailyMissionsEnabled': ('0x8b973a12', (), ('bool',)),
+    'isRewardClaimEnabled': ('0x620e38e2', (), ('bool',)),
+    'joinCompetitiveRace': (
+        '0xc30e4010',
+        (
+            '(uint256,uint256,address,uint256,uint256)',
+            '(uint256,int8,address[],uint256[])',
+            'uint256',
+            'uint256',
+            'bytes',
+        ),
+        (),
+    ),
+    'joinDailyMission': (
+        '0xe681a7c9',
+        (
+            '(uint256,uint256,address)',
+            'uint256',
+            '((uint256,int8,address[],uint256[]),(uint256,int8,address[],uint256[]))',
+            'uint256',
+            'uint256',
+            'bytes',
+        ),
+        (),
+    ),
+    'nonceCounter': ('0x83aa78df', ('address',), ('uint256',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'preCalculatedDailyRewards': ('0xb5caf4c4', ('uint256',), ('uint256',)),
+    'raceFeeTracker': ('0x047f878b', ('uint256',), ('uint256',)),
+    'raceIDToAddress': ('0x9a5bc8bf', ('uint256', 'uint256'), ('address',)),
+    'raceSubmissionTracker': ('0x4b9f829a', ('uint256',), ('bool',)),
+    'raceTypeTracker': ('0x34213e35', ('uint256',), ('uint8',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'rewardDistributionTracker': ('0x7a7f6476', ('uint256',), ('bool',)),
+    'setAutoClaimAfterResultEnabled': ('0x109ad7ba', ('bool',), ()),
+    'setCompTreasuryContract': ('0x55c9654e', ('address',), ()),
+    'setCompetitiveRacesEnabled': ('0x627bb6ff', ('bool',), ()),
+    'setDailyMissionsEnabled': ('0x74016f4c', ('bool',), ()),
+    'setDailyTreasuryContract': ('0xa88ea8b4', ('address',), ()),
+    'setFastResultEnabled': ('0x5a85de46', ('bool',), ()),
+    'setRewardClaimEnabled': ('0xcd2d2d0c', ('bool',), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0x3e3f2359', (), ()),
+}
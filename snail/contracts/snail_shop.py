@@ -122,3 +122,22 @@ ABI = [
     {'inputs': [], 'name': 'withdrawSLIME', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'buyItem': ('0xf794d406', ('(uint256,uint256,uint256,uint256,address,uint256,uint256,uint256)', 'bytes'), ()),
+    'enableShop': ('0x177b99b7', (), ()),
+    'initialize': ('0x485cc955', ('address', 'address'), ()),
+    'isShopEnabled': ('0x85844864', (), ('bool',)),
+    'nftContract': ('0xd56d229d', (), ('address',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'pauseShop': ('0x425345a4', (), ()),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'setSigner': ('0x6c19e783', ('address',), ()),
+    'signerPublicAddress': ('0xba40a96a', (), ('address',)),
+    'tokenContract': ('0x55a373d6', (), ('address',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'withdrawBalance': ('0x5fd8c710', (), ()),
+    'withdrawErc20': ('0xc7e42b1b', ('address',), ()),
+    'withdrawSLIME': ('0xc43a57b9', (), ()),
+}
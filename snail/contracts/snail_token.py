@@ -191,3 +191,26 @@ ABI = [
     },
     {'inputs': [], 'name': 'unpause', 'outputs': [], 'stateMutability': 'nonpayable', 'type': 'function'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'allowance': ('0xdd62ed3e', ('address', 'address'), ('uint256',)),
+    'approve': ('0x095ea7b3', ('address', 'uint256'), ('bool',)),
+    'balanceOf': ('0x70a08231', ('address',), ('uint256',)),
+    'burn': ('0x42966c68', ('uint256',), ()),
+    'burnFrom': ('0x79cc6790', ('address', 'uint256'), ()),
+    'decimals': ('0x313ce567', (), ('uint8',)),
+    'decreaseAllowance': ('0xa457c2d7', ('address', 'uint256'), ('bool',)),
+    'increaseAllowance': ('0x39509351', ('address', 'uint256'), ('bool',)),
+    'name': ('0x06fdde03', (), ('string',)),
+    'owner': ('0x8da5cb5b', (), ('address',)),
+    'pause': ('0x8456cb59', (), ()),
+    'paused': ('0x5c975abb', (), ('bool',)),
+    'renounceOwnership': ('0x715018a6', (), ()),
+    'symbol': ('0x95d89b41', (), ('string',)),
+    'totalSupply': ('0x18160ddd', (), ('uint256',)),
+    'transfer': ('0xa9059cbb', ('address', 'uint256'), ('bool',)),
+    'transferFrom': ('0x23b872dd', ('address', 'address', 'uint256'), ('bool',)),
+    'transferOwnership': ('0xf2fde38b', ('address',), ()),
+    'unpause': ('0x3f4ba83a', (), ()),
+}
@@ -576,3 +576,88 @@ ABI = [
     },
     {'stateMutability': 'payable', 'type': 'receive'},
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'addLiquidity': (
+        '0xa3c7271a',
+        (
+            '(address,address,uint256,uint256,uint256,uint256,uint256,uint256,uint256,int256[],uint256[],uint256[],address,address,uint256)',
+        ),
+        ('uint256', 'uint256', 'uint256', 'uint256', 'uint256[]', 'uint256[]'),
+    ),
+    'addLiquidityNATIVE': (
+        '0x8efc2b2c',
+        (
+            '(address,address,uint256,uint256,uint256,uint256,uint256,uint256,uint256,int256[],uint256[],uint256[],address,address,uint256)',
+        ),
+        ('uint256', 'uint256', 'uint256', 'uint256', 'uint256[]', 'uint256[]'),
+    ),
+    'createLBPair': ('0x659ac74b', ('address', 'address', 'uint24', 'uint16'), ('address',)),
+    'getFactory': ('0x88cc58e4', (), ('address',)),
+    'getIdFromPrice': ('0xf96fe925', ('address', 'uint256'), ('uint24',)),
+    'getLegacyFactory': ('0x71d1974a', (), ('address',)),
+    'getLegacyRouter': ('0xba846523', (), ('address',)),
+    'getPriceFromId': ('0xd0e380f2', ('address', 'uint24'), ('uint256',)),
+    'getSwapIn': ('0x964f987c', ('address', 'uint128', 'bool'), ('uint128', 'uint128', 'uint128')),
+    'getSwapOut': ('0xa0d376cf', ('address', 'uint128', 'bool'), ('uint128', 'uint128', 'uint128')),
+    'getV1Factory': ('0xbb558a9f', (), ('address',)),
+    'getWNATIVE': ('0x6c9c0078', (), ('address',)),
+    'removeLiquidity': (
+        '0xc22159b6',
+        ('address', 'address', 'uint16', 'uint256', 'uint256', 'uint256[]', 'uint256[]', 'address', 'uint256'),
+        ('uint256', 'uint256'),
+    ),
+    'removeLiquidityNATIVE': (
+        '0x81c2fdfb',
+        ('address', 'uint16', 'uint256', 'uint256', 'uint256[]', 'uint256[]', 'address', 'uint256'),
+        ('uint256', 'uint256'),
+    ),
+    'swapExactNATIVEForTokens': (
+        '0xb066ea7c',
+        ('uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapExactNATIVEForTokensSupportingFeeOnTransferTokens': (
+        '0xe038e6dc',
+        ('uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapExactTokensForNATIVE': (
+        '0x9ab6156b',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapExactTokensForNATIVESupportingFeeOnTransferTokens': (
+        '0x1a24f9a9',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapExactTokensForTokens': (
+        '0x2a443fae',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapExactTokensForTokensSupportingFeeOnTransferTokens': (
+        '0x4b801870',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256',),
+    ),
+    'swapNATIVEForExactTokens': (
+        '0x2075ad22',
+        ('uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256[]',),
+    ),
+    'swapTokensForExactNATIVE': (
+        '0x3dc8f8ec',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256[]',),
+    ),
+    'swapTokensForExactTokens': (
+        '0x92fe8e70',
+        ('uint256', 'uint256', '(uint256[],uint8[],address[])', 'address', 'uint256'),
+        ('uint256[]',),
+    ),
+    'sweep': ('0x62c06767', ('address', 'address', 'uint256'), ()),
+    'sweepLBToken': ('0xe9361c08', ('address', 'address', 'uint256[]', 'uint256[]'), ()),
+}
@@ -87,3 +87,15 @@ ABI = [
         'type': 'function',
     },
 ]
+
+# name => (selector, input types, output types)
+FUNCTIONS = {
+    'allowance': ('0xdd62ed3e', ('address', 'address'), ('uint256',)),
+    'approve': ('0x095ea7b3', ('address', 'uint256'), ('bool',)),
+    'balanceOf': ('0x70a08231', ('address',), ('uint256',)),
+    'deposit': ('0xd0e30db0', (), ()),
+    'totalSupply': ('0x18160ddd', (), ('uint256',)),
+    'transfer': ('0xa9059cbb', ('address', 'uint256'), ('bool',)),
+    'transferFrom': ('0x23b872dd', ('address', 'address', 'uint256'), ('bool',)),
+    'withdraw': ('0x2e1a7d4d', ('uint256',), ()),
+}
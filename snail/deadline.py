@@ -0,0 +1,117 @@
+"""
+Deadlines shared by every GraphQL and RPC call made in the same context (thread, job or bot tick).
+Each call takes as timeout the smallest of its own budget and the time left to the current deadline,
+and nested deadlines can only shorten the outer one (`lifted` blocks run without any).
+"""
+
+import contextlib
+import contextvars
+import time
+from typing import Optional
+
+import requests
+
+from . import metrics
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """deadline expired before (or while) making a call"""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+TIMEOUTS = metrics.REGISTRY.counter('snail_timeouts_total', 'Calls timed out (or cut by a deadline)', ('operation',))
+
+
+def expires_at(seconds: Optional[float] = None) -> Optional[float]:
+    """
+    monotonic time the current deadline expires at (or `seconds` from now, if sooner)
+
+    >>> expires_at() is None
+    True
+    """
+    current = _deadline.get()
+    if seconds is None:
+        return current
+    at = time.monotonic() + seconds
+    return at if current is None else min(current, at)
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float] = None, at: Optional[float] = None):
+    """
+    run the block with a deadline of `seconds` from now (or monotonic time `at`), unless the current one is sooner
+
+    >>> with deadline(10):
+    ...     remaining() <= 10
+    True
+    >>> remaining() is None
+    True
+    """
+    if at is None:
+        at = expires_at(seconds)
+    elif _deadline.get() is not None:
+        at = min(at, _deadline.get())
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+@contextlib.contextmanager
+def lifted():
+    """
+    run the block without any deadline, for calls that must complete (such as receipts of sent transactions)
+
+    >>> with deadline(10):
+    ...     with lifted():
+    ...         remaining() is None
+    True
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """seconds left to the current deadline (negative if expired), None if there is none"""
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def timeout(budget: Optional[float] = None) -> Optional[float]:
+    """
+    timeout for the next call: its `budget` capped to the current deadline
+    raises DeadlineExceeded if the deadline already expired
+
+    >>> timeout(5)
+    5
+    >>> with deadline(2):
+    ...     timeout(5) <= 2
+    True
+    """
+    left = remaining()
+    if left is None:
+        return budget
+    if left <= 0:
+        raise DeadlineExceeded('deadline exceeded')
+    return left if budget is None else min(budget, left)
+
+
+def record_timeout(operation: str):
+    TIMEOUTS.inc(operation)
+
+
+def timeouts() -> dict[str, int]:
+    """number of timed out calls, by operation"""
+    return {k[0]: v for k, v in TIMEOUTS.values().items()}
@@ -1,10 +1,18 @@
+import functools
+import logging
+import socket
+import threading
 import time
-from typing import List
+from collections import Counter
+from typing import Callable, List, Optional
 
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 from urllib3.util.retry import Retry
 
+from .. import deadline, metrics
+from . import hedge, priority, throttle
 from .errors import (  # noqa: import like this for now, retrocompatibility - but fix callers in future
     APIError,
     JoinedGuildAfterCycleStartAPIError,
@@ -15,6 +23,167 @@ from .errors import (  # noqa: import like this for now, retrocompatibility - bu
     RaceInnacurateRegistrantsAPIError,
 )
 from .helper import GQL, GQLMutation, GQLUnion
+from .priority import Priority
+
+logger = logging.getLogger(__name__)
+
+# seconds a query (retries included) may take, by operation: tight for races and joins, looser for listings
+OPERATION_TIMEOUTS = {
+    'joinMissionRaces': 8,
+    'joinCompetitiveRaces': 8,
+    'getMissionRaces': 5,
+    'getOnboardingRaces': 5,
+    'getFinishedRaces': 10,
+    'getRaceHistory': 10,
+    'getAllSnail': 30,
+    'getMySnailsForMissions': 20,
+    'getMySnailsForRanked': 20,
+    'guildRoster': 20,
+    'tournamentMyGuildLeaderboard': 20,
+}
+DEFAULT_TIMEOUT = 15
+
+QUERY_SECONDS = metrics.REGISTRY.histogram(
+    'snail_graphql_query_seconds', 'GraphQL query latency (waits included)', ('operation',)
+)
+QUERY_ERRORS = metrics.REGISTRY.counter('snail_graphql_errors_total', 'GraphQL query errors', ('operation', 'error'))
+WAIT_SECONDS = metrics.REGISTRY.histogram(
+    'snail_graphql_wait_seconds', 'Time GraphQL queries wait for the rate limiter/throttle', ('limiter', 'priority')
+)
+
+
+def _error_label(e: Exception) -> str:
+    """
+    >>> _error_label(requests.exceptions.ReadTimeout())
+    'timeout'
+    >>> _error_label(APIError.make([['-', 'oops']]))
+    'api'
+    """
+    if isinstance(e, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return str(e.response.status_code)
+    if isinstance(e, APIError):
+        return 'api'
+    return type(e).__name__
+
+
+class RateLimiter:
+    """
+    one query per `interval` seconds, shared by every client (and thread) using it
+    each slot goes to the highest priority waiting for it
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._next = 0
+        self._waiting = Counter()
+
+    def wait(self, priority: Priority = Priority.NORMAL):
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    ahead = any(self._waiting[p] for p in Priority if p < priority)
+                    if now >= self._next and not ahead:
+                        break
+                    # woken up by whoever takes the slot, to wait for the next one
+                    self._cond.wait(self._next - now if now < self._next else None)
+                self._next = now + self.interval
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+
+_rate_limiters: dict[float, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(interval: float) -> RateLimiter:
+    """
+    >>> get_rate_limiter(1) is get_rate_limiter(1.0)
+    True
+    """
+    with _rate_limiters_lock:
+        if interval not in _rate_limiters:
+            _rate_limiters[interval] = RateLimiter(interval)
+        return _rate_limiters[interval]
+
+
+def keepalive_socket_options(idle: int) -> list[tuple]:
+    """TCP keep-alive probes after `idle` seconds, so idle pooled connections are not silently dropped"""
+    options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options += [
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(idle // 3, 1)),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+        ]
+    return options
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a configurable pool size and TCP keep-alive, meant to be shared by clients"""
+
+    def __init__(self, pool_size: int = 10, keepalive: Optional[int] = None, **kwargs):
+        # before super(), as it already initializes the pool manager
+        self.keepalive = keepalive
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keepalive:
+            kwargs['socket_options'] = keepalive_socket_options(self.keepalive)
+        super().init_poolmanager(*args, **kwargs)
+
+
+class DeadlineRetry(Retry):
+    """Retry that gives up when the current deadline expires, and never backs off past it"""
+
+    def is_exhausted(self) -> bool:
+        return super().is_exhausted() or deadline.expired()
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        left = deadline.remaining()
+        return backoff if left is None else max(0, min(backoff, left))
+
+
+def _retries(retry):
+    if not retry:
+        return 0
+    return DeadlineRetry(
+        total=retry,
+        backoff_factor=1,
+        status_forcelist=[502, 504],
+        allowed_methods=['POST'],
+        raise_on_status=False,
+    )
+
+
+_adapters: dict[tuple, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+
+
+def get_adapter(retry=None, pool_size: int = 10, keepalive: Optional[int] = None, impersonate=False) -> HTTPAdapter:
+    """
+    adapter (and its connection pools) shared by every client with the same settings
+    (session headers, such as authorization, are still per client)
+
+    >>> get_adapter(3, pool_size=20) is get_adapter(3, pool_size=20)
+    True
+    """
+    key = (retry, pool_size, keepalive, impersonate)
+    with _adapters_lock:
+        if key not in _adapters:
+            if impersonate:
+                from .impersonate import ImpersonatingAdapter
+
+                _adapters[key] = ImpersonatingAdapter(max_retries=_retries(retry))
+            else:
+                _adapters[key] = PooledAdapter(pool_size=pool_size, keepalive=keepalive, max_retries=_retries(retry))
+        return _adapters[key]
 
 
 class Client(requests.Session):
@@ -25,8 +194,18 @@ class Client(requests.Session):
         rate_limiter=None,
         retry=None,
         url='https://api.snailtrail.art/graphql/',
+        impersonate=False,
+        pool_size=None,
+        keepalive=None,
+        max_concurrency=None,
+        hedge_fraction=None,
     ):
         """
+        `pool_size` and/or `keepalive` (seconds) make this client use the connection pool shared by other clients
+        with the same settings, instead of its own
+        `max_concurrency` enables the adaptive throttle (see `throttle`), shared by clients with the same value
+        `hedge_fraction` enables hedged reads (see `hedge`), with this fraction of extra requests at most
+
         >>> Client(retry=3).rate_limiter
         >>>
         """
@@ -48,18 +227,17 @@ class Client(requests.Session):
         self.trust_env = False
         if http_token:
             self.headers.update({"authorization": f"Basic {http_token}"})
-        if retry:
-            retry_adapter = HTTPAdapter(
-                max_retries=Retry(
-                    total=retry,
-                    backoff_factor=1,
-                    status_forcelist=[502, 504],
-                    allowed_methods=['POST'],
-                    raise_on_status=False,
-                )
-            )
+        if pool_size or keepalive:
+            shared = get_adapter(retry, pool_size=pool_size or 10, keepalive=keepalive)
+            self.mount('http://', shared)
+            self.mount('https://', shared)
+        elif retry:
+            retry_adapter = HTTPAdapter(max_retries=_retries(retry))
             self.mount('http://', retry_adapter)
             self.mount('https://', retry_adapter)
+        if impersonate:
+            # browser TLS fingerprint in-process, instead of going through gotlsproxy (requires curl_cffi)
+            self.mount('https://', get_adapter(retry, impersonate=True))
         if proxy:
             self.proxies = {
                 "http": proxy,
@@ -68,28 +246,112 @@ class Client(requests.Session):
             # ignore certificates, as either burp or mitmproxy are expected...
             self.verify = False
         self.rate_limiter = rate_limiter
-        self._last_query = 0
+        # clients with the same limit share it, as they hit the same API (even if from different threads)
+        self._limiter = None if rate_limiter is None else get_rate_limiter(rate_limiter)
+        self._throttle = throttle.get_throttle(max_concurrency) if max_concurrency else None
+        self._hedger = hedge.get_hedger(hedge_fraction) if hedge_fraction else None
         self.url = url
 
+    def prewarm(self, connections: int = 1):
+        """
+        open pooled connections to the endpoint (TCP and TLS handshakes) ahead of latency-critical queries
+        connections already open (and alive) are left as they are
+        """
+        urls = [self.url] if isinstance(self.url, str) else self.url.urls()
+        for url in urls:
+            adapter = self.get_adapter(url)
+            if self.proxies or not hasattr(adapter, 'poolmanager'):
+                # debugging proxy or not urllib3 (in-process impersonation)
+                continue
+            try:
+                # same pool (key) as the requests to come
+                request = requests.Request('POST', url).prepare()
+                pool = adapter.get_connection_with_tls_context(request, self.verify, cert=self.cert)
+                conns = [pool._get_conn() for _ in range(connections)]
+                try:
+                    for conn in conns:
+                        if conn.sock is None:
+                            conn.connect()
+                finally:
+                    for conn in conns:
+                        pool._put_conn(conn)
+            except Exception as e:
+                logger.debug('failed to prewarm %s: %s', url, e)
+
+    def _post(self, headers, payload) -> requests.Response:
+        timeout = deadline.timeout()
+        if isinstance(self.url, str):
+            return self.post(self.url, headers=headers, json=payload, timeout=timeout)
+        # pool of endpoints, such as snail.proxy.ProxyPool
+        return self.url.post(self, headers=headers, json=payload, timeout=timeout)
+
+    def _throttled_post(self, send: Callable[[], requests.Response], lane: Priority) -> requests.Response:
+        with WAIT_SECONDS.time('throttle', lane.name.lower()):
+            self._throttle.acquire(lane)
+        status, retry_after, timed_out = None, None, False
+        try:
+            r = send()
+            status, retry_after = r.status_code, throttle.parse_retry_after(r.headers)
+            return r
+        except requests.exceptions.Timeout:
+            timed_out = True
+            raise
+        except requests.exceptions.ConnectionError:
+            timed_out = deadline.expired()
+            raise
+        finally:
+            self._throttle.release(status, retry_after=retry_after, timed_out=timed_out)
+
+    def _rate_limited(self, send: Callable[[], requests.Response], lane: Priority) -> requests.Response:
+        if self._limiter is not None:
+            with WAIT_SECONDS.time('rate_limit', lane.name.lower()):
+                self._limiter.wait(lane)
+        return send()
+
     def query(self, operation, variables, query, auth=None):
-        if self.rate_limiter is not None:
-            delta = time.time() - self._last_query
-            if delta < self.rate_limiter:
-                time.sleep(self.rate_limiter - delta)
+        start = time.monotonic()
+        try:
+            return self._query(operation, variables, query, auth=auth)
+        except Exception as e:
+            QUERY_ERRORS.inc(operation, _error_label(e))
+            raise
+        finally:
+            QUERY_SECONDS.observe(time.monotonic() - start, operation)
+
+    def _query(self, operation, variables, query, auth=None):
+        lane = priority.of(operation)
+        if self._limiter is not None:
+            with WAIT_SECONDS.time('rate_limit', lane.name.lower()):
+                self._limiter.wait(lane)
         if auth:
             headers = {'auth': auth}
         else:
             headers = None
-        r = self.post(
-            self.url,
-            headers=headers,
-            json={
-                'operationName': operation,
-                'variables': variables,
-                'query': query,
-            },
-        )
-        self._last_query = time.time()
+        payload = {
+            'operationName': operation,
+            'variables': variables,
+            'query': query,
+        }
+        send = functools.partial(self._post, headers, payload)
+        if self._throttle is not None:
+            send = functools.partial(self._throttled_post, send, lane)
+        if self._hedger is not None and hedge.hedgeable(operation, query):
+            # the copy is an extra request: its own rate limit token and throttle slot
+            send = functools.partial(
+                self._hedger.run, operation, send, functools.partial(self._rate_limited, send, lane)
+            )
+        with deadline.deadline(OPERATION_TIMEOUTS.get(operation, DEFAULT_TIMEOUT)):
+            try:
+                r = send()
+            except requests.exceptions.Timeout:
+                deadline.record_timeout(operation)
+                raise
+            except requests.exceptions.ConnectionError as e:
+                # read timeouts end up as connection errors once retries are exhausted
+                if deadline.expired():
+                    deadline.record_timeout(operation)
+                    raise deadline.DeadlineExceeded(operation) from e
+                raise
         r.raise_for_status()
         r = r.json()
         if 'errors' in r:
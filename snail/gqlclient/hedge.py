@@ -0,0 +1,175 @@
+"""
+Hedged reads: a query still pending after the usual latency of its operation (a high percentile of the
+recent ones) is sent again, through another connection (or proxy instance), and the first reply wins.
+Extra load is capped by a budget: hedges are at most `fraction` of the requests (plus a small burst).
+Only for read-only queries - mutations must never be sent twice.
+"""
+
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from .. import metrics, profiling
+
+# read-only queries on the join path
+HEDGED_OPERATIONS = {'getMissionRaces', 'getMySnailsForMissions', 'getOnboardingRaces'}
+# latency percentile (of the operation) after which a query is hedged
+PERCENTILE = 0.9
+# latency samples kept per operation, and needed before hedging any
+SAMPLES = 100
+MIN_SAMPLES = 10
+# hedges allowed in a row, on top of `fraction`
+BURST = 2
+# originals waited on at the same time (others are sent inline, not hedged), copies have their own workers
+WORKERS = 8
+
+
+def hedgeable(operation: str, query: str) -> bool:
+    """
+    >>> hedgeable('getMissionRaces', 'query getMissionRaces { }')
+    True
+    >>> hedgeable('getMissionRaces', 'mutation getMissionRaces { }')
+    False
+    """
+    return operation in HEDGED_OPERATIONS and not query.lstrip().startswith('mutation')
+
+
+class Hedger:
+    def __init__(self, fraction: float, percentile: float = PERCENTILE):
+        self.fraction = fraction
+        self.percentile = percentile
+        self.requests = 0
+        self.hedged = 0
+        # replies from the hedge, before the original request
+        self.hedge_wins = 0
+        self._tokens = 0.0
+        self._latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=SAMPLES))
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='hedge')
+        # so copies never queue behind the (slow) originals they should overtake
+        self._copies = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='hedge-copy')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins}
+
+    def threshold(self, operation: str) -> Optional[float]:
+        """seconds a query of `operation` may take before being hedged, None if there are not enough samples yet"""
+        with self._lock:
+            samples = sorted(self._latencies[operation])
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * self.percentile), len(samples) - 1)]
+
+    def _record(self, operation: str, latency: float):
+        with self._lock:
+            self._latencies[operation].append(latency)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def _take_worker(self) -> bool:
+        with self._lock:
+            if self._busy >= WORKERS:
+                return False
+            self._busy += 1
+            return True
+
+    def _release_worker(self, _):
+        with self._lock:
+            self._busy -= 1
+
+    @staticmethod
+    def _submit(executor: ThreadPoolExecutor, send: Callable) -> Future:
+        # same context (deadline, priority, profile) as the caller
+        return executor.submit(contextvars.copy_context().run, profiling.run, send)
+
+    def run(self, operation: str, send: Callable, resend: Optional[Callable] = None):
+        """
+        `send()`, hedged with `resend()` (defaults to `send`) if it takes longer than usual
+        `resend` is expected to go through rate limits and throttling on its own, as an extra request
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(BURST, self._tokens + self.fraction)
+        threshold = self.threshold(operation)
+        start = time.monotonic()
+        if threshold is None or not self._take_worker():
+            result = send()
+            self._record(operation, time.monotonic() - start)
+            return result
+
+        primary = self._submit(self._executor, send)
+        primary.add_done_callback(self._release_worker)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._take_token():
+            result = primary.result()
+            self._record(operation, time.monotonic() - start)
+            return result
+
+        pending = {primary, self._submit(self._copies, resend or send)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # the other one may still make it
+                    error = error or e
+                    continue
+                if future is not primary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                self._record(operation, time.monotonic() - start)
+                return result
+        raise error
+
+
+_hedgers: dict[float, Hedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(fraction: float) -> Hedger:
+    """
+    hedger (and its latency samples) shared by every client with the same budget
+
+    >>> get_hedger(0.1) is get_hedger(0.1)
+    True
+    """
+    with _hedgers_lock:
+        if fraction not in _hedgers:
+            _hedgers[fraction] = Hedger(fraction)
+        return _hedgers[fraction]
+
+
+def _collect(key: str):
+    """`Hedger.stats()[key]` of every hedger, by budget"""
+
+    def _values():
+        with _hedgers_lock:
+            hedgers = list(_hedgers.items())
+        return {(str(k),): h.stats()[key] for k, h in hedgers}
+
+    return _values
+
+
+metrics.REGISTRY.callback(
+    'snail_graphql_hedged_total', 'GraphQL reads sent twice', _collect('hedged'), ('budget',), 'counter'
+)
+metrics.REGISTRY.callback(
+    'snail_graphql_hedge_wins_total',
+    'Hedged reads answered first by the copy',
+    _collect('hedge_wins'),
+    ('budget',),
+    'counter',
+)
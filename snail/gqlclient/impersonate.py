@@ -0,0 +1,116 @@
+"""
+Transport adapter that performs the browser TLS handshake in-process (with curl_cffi),
+as an alternative to routing requests through a local gotlsproxy.
+curl_cffi is an optional dependency, only imported when the adapter is created.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .. import deadline
+from ..proxy import JA3, USER_AGENT
+
+# curl error code of timed out transfers (CURLE_OPERATION_TIMEDOUT)
+CURL_TIMEOUT = 28
+
+
+class ImpersonatingAdapter(HTTPAdapter):
+    """
+    `requests` adapter sending requests through curl_cffi with the same JA3 and user agent as gotlsproxy.
+    Retries (`max_retries`) are applied to the status codes in its `status_forcelist`, within the current deadline.
+    The adapter is shared by every client (and thread), each thread has its own curl session (they are not thread-safe).
+    """
+
+    def __init__(self, ja3: str = JA3, user_agent: str = USER_AGENT, max_retries=0):
+        try:
+            from curl_cffi import requests as curl_requests
+        except ImportError as e:
+            raise ImportError('in-process TLS impersonation requires curl_cffi (pip install curl_cffi)') from e
+
+        super().__init__(max_retries=max_retries)
+        self.ja3 = ja3
+        self.user_agent = user_agent
+        self._session_class = curl_requests.Session
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._session_class()
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _curl_send(self, request: requests.PreparedRequest, timeout, verify, proxies):
+        headers = dict(request.headers)
+        headers['User-Agent'] = self.user_agent
+        if isinstance(timeout, tuple):
+            # curl_cffi takes (connect, read) as well, but not None inside
+            timeout = tuple(30 if t is None else t for t in timeout)
+        return self._session.request(
+            request.method,
+            request.url,
+            data=request.body,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxies=proxies or None,
+            allow_redirects=False,
+            ja3=self.ja3,
+            default_headers=False,
+        )
+
+    def build_curl_response(self, request: requests.PreparedRequest, r) -> requests.Response:
+        response = requests.Response()
+        response.status_code = r.status_code
+        response.headers = CaseInsensitiveDict(r.headers)
+        response.reason = r.reason
+        response.url = request.url
+        response.request = request
+        response._content = r.content
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.connection = self
+        return response
+
+    def send(
+        self, request: requests.PreparedRequest, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ) -> requests.Response:
+        from curl_cffi.requests.errors import RequestsError
+
+        retry = self.max_retries
+        attempt = 0
+        while True:
+            try:
+                r = self._curl_send(request, timeout, verify, proxies)
+            except RequestsError as e:
+                if getattr(e, 'code', None) == CURL_TIMEOUT:
+                    raise requests.exceptions.Timeout(e, request=request)
+                raise requests.exceptions.ConnectionError(e, request=request)
+            response = self.build_curl_response(request, r)
+            if attempt >= (retry.total or 0) or response.status_code not in (retry.status_forcelist or ()):
+                return response
+            attempt += 1
+            backoff = retry.backoff_factor * 2 ** (attempt - 1)
+            left = deadline.remaining()
+            if left is not None and left <= backoff:
+                # no time left for another attempt
+                return response
+            time.sleep(backoff)
+            if isinstance(timeout, (int, float)):
+                timeout = deadline.timeout(timeout)
+
+    def close(self):
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        # threads create a new one if still in use
+        self._local = threading.local()
+        super().close()
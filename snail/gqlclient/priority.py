@@ -0,0 +1,54 @@
+"""
+Request classes for GraphQL queries: waiting for the rate limiter or the throttle, critical requests
+(mission joins, race lookups) go ahead of queued normal ones, and background ones (bulk scans) only get
+the capacity left over.
+"""
+
+import contextlib
+import contextvars
+from enum import IntEnum
+from typing import Optional
+
+
+class Priority(IntEnum):
+    CRITICAL = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+# operations that are always latency critical, whoever calls them
+OPERATION_PRIORITIES = {
+    'joinMissionRaces': Priority.CRITICAL,
+    'joinCompetitiveRaces': Priority.CRITICAL,
+    'getMissionRaces': Priority.CRITICAL,
+    'getOnboardingRaces': Priority.CRITICAL,
+    'getFinishedRaces': Priority.CRITICAL,
+}
+
+_lane: contextvars.ContextVar[Optional[Priority]] = contextvars.ContextVar('priority', default=None)
+
+
+@contextlib.contextmanager
+def lane(priority: Priority):
+    """
+    run the block (or decorated function) queries with `priority`, unless the operation has its own
+
+    >>> with lane(Priority.BACKGROUND):
+    ...     of('getAllSnail'), of('joinMissionRaces')
+    (<Priority.BACKGROUND: 2>, <Priority.CRITICAL: 0>)
+    >>> of('getAllSnail')
+    <Priority.NORMAL: 1>
+    """
+    token = _lane.set(priority)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def of(operation: str) -> Priority:
+    """priority of a query for `operation`, in the current context"""
+    if operation in OPERATION_PRIORITIES:
+        return OPERATION_PRIORITIES[operation]
+    current = _lane.get()
+    return Priority.NORMAL if current is None else current
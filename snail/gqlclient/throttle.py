@@ -0,0 +1,193 @@
+"""
+AIMD (additive increase, multiplicative decrease) controller for GraphQL requests, shared by every client (wallet).
+Blocked (403/429), failing (5xx) or timed out requests halve the allowed concurrency and add a delay
+between requests, successful ones ramp them back up. `Retry-After` pauses all requests for as long as asked.
+Slots go to the highest priority waiting (see `priority`).
+"""
+
+import email.utils
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Mapping, Optional
+
+from .. import deadline, metrics
+from .priority import Priority
+
+logger = logging.getLogger(__name__)
+
+# replies signaling the API (or its firewall) wants less traffic
+THROTTLE_STATUS = {403, 429, 500, 502, 503, 504}
+# concurrency multiplier on a throttled reply (down to 1)
+DECREASE = 0.5
+# delay between requests added (and then doubled) on a throttled reply, up to MAX_INTERVAL
+INTERVAL_STEP = 0.25
+MAX_INTERVAL = 5
+# delay multiplier on a successful reply
+RECOVERY = 0.9
+# throttled replies within this many seconds of a decrease count as the same event (requests already in flight)
+COOLDOWN = 1
+# longest Retry-After honored, in seconds
+MAX_RETRY_AFTER = 300
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    seconds from `Retry-After` header (delay or HTTP date), None if missing or invalid
+
+    >>> parse_retry_after({'Retry-After': '12'})
+    12.0
+    >>> parse_retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    0
+    >>> parse_retry_after({'Retry-After': 'soon'})
+    >>> parse_retry_after({})
+    """
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0), MAX_RETRY_AFTER)
+    except ValueError:
+        pass
+    try:
+        at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(at.timestamp() - time.time(), 0), MAX_RETRY_AFTER)
+
+
+class Throttle:
+    """
+    Concurrency limit (between 1 and `max_limit`) and delay between requests, adjusted by the replies.
+    Starts wide open: `max_limit` requests at the same time and no delay.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(max_limit, 1)
+        self.limit = float(self.max_limit)
+        self.interval = 0.0
+        self.inflight = 0
+        self.succeeded = 0
+        self.throttled = 0
+        self._blocked_until = 0.0
+        self._next = 0.0
+        self._cooldown_until = 0.0
+        self._waiting = Counter()
+        self._cond = threading.Condition()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'inflight': self.inflight,
+                'waiting': {p.name.lower(): n for p, n in self._waiting.items() if n},
+                'interval': self.interval,
+                'blocked_for': max(self._blocked_until - time.monotonic(), 0),
+                'succeeded': self.succeeded,
+                'throttled': self.throttled,
+            }
+
+    def _capacity(self, lane: Priority) -> int:
+        """slots `lane` may use: background leaves one free for the others (if there is more than one)"""
+        limit = int(self.limit)
+        if lane == Priority.BACKGROUND and limit > 1:
+            return limit - 1
+        return limit
+
+    def acquire(self, lane: Priority = Priority.NORMAL):
+        """
+        wait for a slot, going ahead of any lower priority waiting for one
+        (raises DeadlineExceeded if the current deadline expires meanwhile)
+        """
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = max(self._blocked_until, self._next) - now
+                    ahead = any(self._waiting[p] for p in Priority if p < lane)
+                    if delay <= 0 and not ahead and self.inflight < self._capacity(lane):
+                        break
+                    left = deadline.remaining()
+                    if left is not None and left <= 0:
+                        raise deadline.DeadlineExceeded('throttled')
+                    waits = [w for w in (delay if delay > 0 else None, left) if w is not None]
+                    self._cond.wait(min(waits) if waits else None)
+            finally:
+                self._waiting[lane] -= 1
+                self._cond.notify_all()
+            self.inflight += 1
+            self._next = now + self.interval
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[float] = None, timed_out: bool = False):
+        """
+        release the slot, adjusting the limits to the reply `status`
+        (None for requests that failed without one, neutral unless `timed_out`)
+        """
+        with self._cond:
+            self.inflight -= 1
+            now = time.monotonic()
+            if timed_out or status in THROTTLE_STATUS:
+                self.throttled += 1
+                if now >= self._cooldown_until:
+                    self.limit = max(1.0, self.limit * DECREASE)
+                    self.interval = min(MAX_INTERVAL, max(self.interval * 2, INTERVAL_STEP))
+                    self._cooldown_until = now + COOLDOWN
+                    logger.warning(
+                        'GraphQL throttled (%s): %d concurrent requests, %.2fs apart',
+                        'timeout' if timed_out else status,
+                        self.limit,
+                        self.interval,
+                    )
+                if retry_after:
+                    self._blocked_until = max(self._blocked_until, now + retry_after)
+            elif status is not None:
+                self.succeeded += 1
+                self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+                self.interval = self.interval * RECOVERY if self.interval > 0.01 else 0.0
+            self._cond.notify_all()
+
+
+_throttles: dict[int, Throttle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(max_limit: int) -> Throttle:
+    """
+    >>> get_throttle(4) is get_throttle(4)
+    True
+    """
+    with _throttles_lock:
+        if max_limit not in _throttles:
+            _throttles[max_limit] = Throttle(max_limit)
+        return _throttles[max_limit]
+
+
+def _collect(key: str):
+    """`Throttle.stats()[key]` of every throttle, by max concurrency"""
+
+    def _values():
+        with _throttles_lock:
+            throttles = list(_throttles.items())
+        return {(str(k),): t.stats()[key] for k, t in throttles}
+
+    return _values
+
+
+metrics.REGISTRY.callback(
+    'snail_graphql_throttle_limit', 'Concurrent GraphQL requests allowed by the throttle', _collect('limit'), ('max',)
+)
+metrics.REGISTRY.callback(
+    'snail_graphql_throttle_inflight', 'GraphQL requests in flight', _collect('inflight'), ('max',)
+)
+metrics.REGISTRY.callback(
+    'snail_graphql_throttle_interval_seconds', 'Delay between GraphQL requests', _collect('interval'), ('max',)
+)
+metrics.REGISTRY.callback(
+    'snail_graphql_throttled_total',
+    'Throttled GraphQL replies (403, 429, 5xx or timeouts)',
+    _collect('throttled'),
+    ('max',),
+    'counter',
+)
@@ -0,0 +1,258 @@
+"""
+In-process metrics (counters, histograms and callback gauges) with a Prometheus text format endpoint.
+Modules register their metrics at import time in `REGISTRY` (registering an existing name returns it).
+"""
+
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    """
+    >>> _labels(('operation',), ('getAllSnail',), 'le="0.5"')
+    '{operation="getAllSnail",le="0.5"}'
+    >>> _labels((), ())
+    ''
+    """
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: tuple) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {labels}')
+        return tuple(str(v) for v in labels)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError()
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    >>> c = Counter('requests_total', 'Requests', ('status',))
+    >>> c.inc(200); c.inc(200); c.inc(404)
+    >>> c.values()
+    {('200',): 2, ('404',): 1}
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values().items()):
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+class _Series:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(Metric):
+    """
+    >>> h = Histogram('latency_seconds', 'Latency', ('operation',), buckets=(0.1, 1))
+    >>> h.observe(0.05, 'a'); h.observe(0.5, 'a'); h.observe(5, 'a')
+    >>> h.series()
+    {('a',): (3, 5.55)}
+    >>> h.quantile(0.5, 'a')
+    1
+    >>> print(h.render())
+    # HELP latency_seconds Latency
+    # TYPE latency_seconds histogram
+    latency_seconds_bucket{operation="a",le="0.1"} 1
+    latency_seconds_bucket{operation="a",le="1"} 2
+    latency_seconds_bucket{operation="a",le="+Inf"} 3
+    latency_seconds_sum{operation="a"} 5.55
+    latency_seconds_count{operation="a"} 3
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, _Series] = {}
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        # index of the first bucket the value fits in (len(buckets) is +Inf)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets) + 1)
+            series.buckets[i] += 1
+            series.count += 1
+            series.sum += value
+
+    @contextlib.contextmanager
+    def time(self, *labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, *labels)
+
+    def series(self) -> dict[tuple, tuple[int, float]]:
+        """(count, sum) for every label set"""
+        with self._lock:
+            return {k: (s.count, round(s.sum, 6)) for k, s in self._series.items()}
+
+    def quantile(self, q: float, *labels) -> Optional[float]:
+        """upper bound of the bucket the `q` quantile falls in (inf if above the last one), None without samples"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None or not series.count:
+                return None
+            target = q * series.count
+            total = 0
+            for bound, n in zip(self.buckets + (float('inf'),), series.buckets):
+                total += n
+                if total >= target:
+                    return bound
+        return float('inf')
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, list(s.buckets), s.count, s.sum) for k, s in self._series.items())
+        for key, buckets, count, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), buckets):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                yield f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, key)} {_number(round(total, 6))}'
+            yield f'{self.name}_count{_labels(self.labelnames, key)} {count}'
+
+
+class CallbackMetric(Metric):
+    """values read from `fn` (returning {label values: value}) when collected, for state kept elsewhere"""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], dict], labelnames: tuple = (), kind: str = 'gauge'):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def values(self) -> dict[tuple, float]:
+        try:
+            return {self._key(tuple(k)): v for k, v in self.fn().items()}
+        except Exception:
+            logger.exception('failed to collect %s', self.name)
+            return {}
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values().items()):
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets=buckets))
+
+    def callback(
+        self, name: str, help: str, fn: Callable[[], dict], labelnames: tuple = (), kind: str = 'gauge'
+    ) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, fn, labelnames, kind=kind))
+
+    def render(self) -> str:
+        """all metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return '\n'.join(m.render() for m in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def serve(port: int, host: str = '127.0.0.1', registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """serve `registry` (on any path) from a background thread, for Prometheus to scrape"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info('metrics on http://%s:%d/metrics', host, server.server_address[1])
+    return server
@@ -0,0 +1,93 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# functions listed in the report (by cumulative time)
+TOP = 20
+# profiles kept in the directory, oldest are deleted
+KEEP = 100
+
+# profiles of the worker threads (`run`) started from the current `profile` block
+_workers: contextvars.ContextVar[Optional[list[cProfile.Profile]]] = contextvars.ContextVar('profiling', default=None)
+_workers_lock = threading.Lock()
+
+
+def report(*profilers: cProfile.Profile, top: int = TOP) -> str:
+    """top functions by cumulative time (of all the profilers added up)"""
+    stream = io.StringIO()
+    pstats.Stats(*profilers, stream=stream).strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return stream.getvalue()
+
+
+def run(fn: Callable, *args, **kwargs) -> Any:
+    """
+    `fn(*args, **kwargs)` in a worker thread, profiled as part of the `profile` block it was submitted from (if any)
+    - cProfile only records the thread it is enabled in, so executors run their calls (in the copied context) with this
+    """
+    workers = _workers.get()
+    if workers is None:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiler is active (python >= 3.12 has a single one, recording every thread already)
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        with _workers_lock:
+            workers.append(profiler)
+
+
+def _prune(directory: Path, keep: int):
+    profiles = sorted(directory.glob('*.prof'))
+    for p in profiles[:-keep]:
+        p.unlink(missing_ok=True)
+        p.with_suffix('.txt').unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def profile(name: str, directory: Optional[Path] = None, top: int = TOP, keep: int = KEEP):
+    """
+    profile the block (cProfile), logging the top functions by cumulative time
+    calls made from worker threads are included if their executor runs them with `run`,
+    and only those that completed within the block
+    with `directory`, also save `<timestamp>-<name>.prof` (for pstats/snakeviz) and the report (.txt) in it
+    """
+    profiler = cProfile.Profile()
+    workers = []
+    token = _workers.set(workers)
+    start = time.monotonic()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _workers.reset(token)
+        with _workers_lock:
+            profilers = [profiler] + workers
+        text = report(*profilers, top=top)
+        header = (
+            f'profile of {name} ({time.monotonic() - start:.2f} seconds, {len(profilers) - 1} calls in worker threads)'
+        )
+        logger.info('%s:\n%s', header, text)
+        if directory is not None:
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / f'{time.strftime("%Y%m%d-%H%M%S")}-{name}.prof'
+                pstats.Stats(*profilers).dump_stats(path)
+                path.with_suffix('.txt').write_text(f'{header}:\n{text}')
+                _prune(directory, keep)
+            except OSError:
+                logger.exception('failed to save profile of %s', name)
@@ -1,8 +1,29 @@
+import itertools
+import logging
 import subprocess
+import threading
 import time
+from dataclasses import dataclass
+from typing import Optional
 
 import requests
 
+logger = logging.getLogger(__name__)
+
+# seconds to wait for gotlsproxy to accept connections
+READY_TIMEOUT = 5
+# seconds between health checks of the pool instances
+HEALTH_INTERVAL = 5
+# consecutive blocked replies (403/429) before an instance is benched
+BENCH_BLOCKED = 3
+# seconds an instance is benched for (doubles with every new bench, up to BENCH_MAX)
+BENCH_SECONDS = 30
+BENCH_MAX = 600
+BLOCKED_STATUS = {403, 429}
+# TLS fingerprint and user agent of the browser impersonated (by gotlsproxy or gqlclient.impersonate)
+JA3 = '771,4865-4867-4866-49195-49199-52393-52392-49196-49200-49162-49161-49171-49172-156-157-47-53-10,0-23-65281-10-11-35-16-5-34-51-43-13-45-28-65037,29-23-24-25-256-257,0'
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0'
+
 
 def _free_port():
     import socket
@@ -25,6 +46,27 @@ class Proxy:
     def url(self):
         return f'http://127.0.0.1:{self._port}'
 
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def ready(self) -> bool:
+        """accepting connections"""
+        try:
+            requests.get(self.url(), timeout=1)
+        except requests.exceptions.RequestException:
+            return False
+        return True
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready():
+                return
+            if not self.alive():
+                break
+            time.sleep(0.1)
+        raise Exception('proxy not starting')
+
     def start(self, wait_for_ready=True):
         if not self._binary.is_file():
             raise Exception(
@@ -35,24 +77,146 @@ class Proxy:
         if self._upstream:
             args.extend(['-upstream-proxy', self._upstream])
         args.append('https://api.snailtrail.art/graphql/')
-        args.extend(
-            [
-                '-ja3',
-                '771,4865-4867-4866-49195-49199-52393-52392-49196-49200-49162-49161-49171-49172-156-157-47-53-10,0-23-65281-10-11-35-16-5-34-51-43-13-45-28-65037,29-23-24-25-256-257,0',
-                '-ua',
-                'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:120.0) Gecko/20100101 Firefox/120.0',
-            ]
-        )
+        args.extend(['-ja3', JA3, '-ua', USER_AGENT])
         self._process = subprocess.Popen(args)
         if wait_for_ready:
-            for _ in range(50):
-                try:
-                    requests.get(self.url())
-                    break
-                except requests.exceptions.ConnectionError:
-                    time.sleep(0.1)
-            else:
-                raise Exception('proxy not starting')
+            self.wait_ready()
 
     def stop(self):
         self._process.terminate()
+
+
+@dataclass(eq=False)
+class PoolMember:
+    proxy: Proxy
+    inflight: int = 0
+    requests: int = 0
+    blocked: int = 0
+    errors: int = 0
+    consecutive_blocked: int = 0
+    benches: int = 0
+    benched_until: float = 0
+    # down: crashed or refusing connections, until the health check brings it back
+    down: bool = False
+
+    @property
+    def block_rate(self) -> float:
+        if not self.requests:
+            return 0
+        return self.blocked / self.requests
+
+
+class ProxyPool:
+    """
+    Several gotlsproxy instances (optionally each with its own upstream proxy), supervised and load balanced:
+    * requests go to the least loaded healthy instance (round-robin between equals)
+    * instances replying 403/429 in a row are benched for a while
+    * crashed instances are restarted by a health check thread
+
+    Used as `gqlclient.Client.url`, that then posts through `post`.
+    """
+
+    def __init__(self, binary, size: int = 1, upstream_proxies: Optional[list[str]] = None, quiet=True):
+        upstream_proxies = upstream_proxies or [None]
+        self.members = [
+            PoolMember(Proxy(binary, quiet=quiet, upstream_proxy=upstream_proxies[i % len(upstream_proxies)]))
+            for i in range(max(size, 1))
+        ]
+        self._lock = threading.Lock()
+        self._rr = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __str__(self) -> str:
+        return f'gotlsproxy pool {", ".join(m.proxy.url() for m in self.members)}'
+
+    def url(self):
+        return self.members[0].proxy.url()
+
+    def urls(self) -> list[str]:
+        return [m.proxy.url() for m in self.members]
+
+    def start(self):
+        # start every instance before waiting for any
+        for m in self.members:
+            m.proxy.start(wait_for_ready=False)
+        for m in self.members:
+            m.proxy.wait_ready()
+        self._thread = threading.Thread(target=self._health_loop, name='proxypool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for m in self.members:
+            m.proxy.stop()
+
+    def _health_loop(self):
+        while not self._stop.wait(HEALTH_INTERVAL):
+            self.check()
+
+    def check(self):
+        """restart crashed instances, bring back the ones accepting connections again"""
+        for m in self.members:
+            if self._stop.is_set():
+                return
+            if not m.proxy.alive():
+                logger.warning('gotlsproxy %s died, restarting', m.proxy.url())
+                with self._lock:
+                    m.down = True
+                try:
+                    m.proxy.start(wait_for_ready=False)
+                except Exception:
+                    logger.exception('failed to restart gotlsproxy')
+                    continue
+            if m.down and m.proxy.ready():
+                with self._lock:
+                    m.down = False
+
+    def pick(self) -> PoolMember:
+        """least loaded instance, benched (or down) ones only if there is nothing else"""
+        now = time.monotonic()
+        n = len(self.members)
+        with self._lock:
+            start = next(self._rr) % n
+            ordered = self.members[start:] + self.members[:start]
+            member = min(ordered, key=lambda m: (m.down, m.benched_until > now, m.inflight))
+            member.inflight += 1
+        return member
+
+    def _record(self, member: PoolMember, status: Optional[int], down: bool = False):
+        with self._lock:
+            member.inflight -= 1
+            member.requests += 1
+            if status is None:
+                member.errors += 1
+                member.down = member.down or down
+            elif status in BLOCKED_STATUS:
+                member.blocked += 1
+                member.consecutive_blocked += 1
+                if member.consecutive_blocked >= BENCH_BLOCKED:
+                    member.benched_until = time.monotonic() + min(BENCH_MAX, BENCH_SECONDS * 2**member.benches)
+                    member.benches += 1
+                    member.consecutive_blocked = 0
+                    logger.warning('gotlsproxy %s benched (%d blocked replies)', member.proxy.url(), BENCH_BLOCKED)
+            else:
+                member.consecutive_blocked = 0
+                member.benches = 0
+
+    def post(self, session: requests.Session, **kwargs) -> requests.Response:
+        """`session.post` through one of the instances, retried on another one if it refuses the connection"""
+        tries = min(2, len(self.members))
+        for i in range(tries):
+            member = self.pick()
+            try:
+                r = session.post(member.proxy.url(), **kwargs)
+            except requests.exceptions.ConnectionError:
+                self._record(member, None, down=True)
+                if i == tries - 1:
+                    raise
+                logger.warning('gotlsproxy %s unreachable, retrying on another one', member.proxy.url())
+                continue
+            except Exception:
+                self._record(member, None)
+                raise
+            self._record(member, r.status_code)
+            return r
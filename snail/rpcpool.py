@@ -0,0 +1,229 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+import requests
+from web3.providers.base import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from . import deadline, metrics
+
+logger = logging.getLogger(__name__)
+
+# number of endpoints a signed transaction is sent to
+BROADCAST = 3
+# consecutive errors before an endpoint is benched
+BENCH_ERRORS = 3
+# seconds an endpoint is benched for (doubles with every new bench, up to BENCH_MAX)
+BENCH_SECONDS = 10
+BENCH_MAX = 300
+# EWMA weight of the latest latency sample
+LATENCY_ALPHA = 0.2
+DEFAULT_TIMEOUT = 10
+
+RPC_SECONDS = metrics.REGISTRY.histogram('snail_rpc_request_seconds', 'JSON-RPC request latency', ('method',))
+RPC_ERRORS = metrics.REGISTRY.counter('snail_rpc_errors_total', 'JSON-RPC request errors', ('method', 'error'))
+
+# methods that must not be retried on a different endpoint
+NON_IDEMPOTENT = {'eth_sendTransaction', 'eth_sendRawTransaction'}
+
+
+def split_uris(uris: Union[str, list[str]]) -> list[str]:
+    """
+    >>> split_uris('https://a/rpc')
+    ['https://a/rpc']
+    >>> split_uris('https://a/rpc, https://b/rpc\\nhttps://c/rpc')
+    ['https://a/rpc', 'https://b/rpc', 'https://c/rpc']
+    >>> split_uris(['https://a/rpc', 'https://a/rpc'])
+    ['https://a/rpc']
+    """
+    if isinstance(uris, str):
+        uris = re.split(r'[\s,]+', uris)
+    return list(dict.fromkeys(u for u in uris if u))
+
+
+@dataclass
+class Endpoint:
+    uri: str
+    session: requests.Session = field(default_factory=requests.Session, repr=False)
+    # EWMA of request latency, in seconds
+    latency: Optional[float] = None
+    requests: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    benches: int = 0
+    benched_until: float = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.requests:
+            return 0
+        return self.errors / self.requests
+
+    def score(self) -> float:
+        """lower is better - endpoints without samples are tried first (to get one)"""
+        if self.latency is None:
+            return 0
+        return self.latency * (1 + 10 * self.error_rate)
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """
+    web3 provider that spreads requests over multiple RPC endpoints:
+    * reads go to the fastest healthy endpoint (by latency EWMA and error rate), failing over to the next ones
+    * signed transactions are broadcast to the `broadcast` best endpoints
+    * endpoints with consecutive errors are benched for a while
+    """
+
+    def __init__(
+        self,
+        endpoint_uris: Union[str, list[str]],
+        broadcast: int = BROADCAST,
+        request_kwargs: Optional[dict[str, Any]] = None,
+    ):
+        super().__init__()
+        self.endpoints = [Endpoint(uri) for uri in split_uris(endpoint_uris)]
+        if not self.endpoints:
+            raise ValueError('no RPC endpoints')
+        self.broadcast = broadcast
+        self._request_kwargs = {'timeout': DEFAULT_TIMEOUT}
+        self._request_kwargs.update(request_kwargs or {})
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __str__(self) -> str:
+        return f'RPC pool {", ".join(e.uri for e in self.endpoints)}'
+
+    def ranked(self) -> list[Endpoint]:
+        """endpoints sorted by preference, benched ones last"""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(self.endpoints, key=lambda e: (e.benched_until > now, e.score()))
+
+    def _record(self, endpoint: Endpoint, latency: Optional[float] = None):
+        with self._lock:
+            endpoint.requests += 1
+            if latency is None:
+                endpoint.errors += 1
+                endpoint.consecutive_errors += 1
+                if endpoint.consecutive_errors >= BENCH_ERRORS:
+                    endpoint.benched_until = time.monotonic() + min(BENCH_MAX, BENCH_SECONDS * 2**endpoint.benches)
+                    endpoint.benches += 1
+                    endpoint.consecutive_errors = 0
+                    logger.warning('RPC endpoint %s benched', endpoint.uri)
+            else:
+                endpoint.consecutive_errors = 0
+                endpoint.benches = 0
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency = LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * endpoint.latency
+
+    def _post(self, endpoint: Endpoint, request_data: bytes) -> RPCResponse:
+        kwargs = dict(self._request_kwargs)
+        # configured timeout, capped to the current deadline (if any)
+        kwargs['timeout'] = deadline.timeout(kwargs.get('timeout'))
+        start = time.monotonic()
+        try:
+            r = endpoint.session.post(
+                endpoint.uri,
+                data=request_data,
+                headers={'Content-Type': 'application/json'},
+                **kwargs,
+            )
+            r.raise_for_status()
+            response = self.decode_rpc_response(r.content)
+        except requests.exceptions.Timeout:
+            if not deadline.expired():
+                # otherwise cut short by the deadline, not the endpoint's fault
+                self._record(endpoint)
+            raise
+        except Exception:
+            self._record(endpoint)
+            raise
+        self._record(endpoint, time.monotonic() - start)
+        return response
+
+    def _broadcast(self, request_data: bytes) -> RPCResponse:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(self.broadcast, 1), thread_name_prefix='rpcpool')
+        pending = {
+            self._executor.submit(self._post, endpoint, request_data)
+            for endpoint in self.ranked()[: max(self.broadcast, 1)]
+        }
+        error_response = None
+        exception = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    exception = exception or e
+                    continue
+                if 'error' not in response:
+                    # first endpoint to accept it, others keep propagating in background
+                    return response
+                # the same tx sent to different nodes may be reported as "already known" by some
+                error_response = error_response or response
+        if error_response is not None:
+            return error_response
+        raise exception
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        start = time.monotonic()
+        try:
+            response = self._make_request(method, params)
+        except Exception as e:
+            RPC_ERRORS.inc(method, 'timeout' if isinstance(e, requests.exceptions.Timeout) else type(e).__name__)
+            raise
+        finally:
+            RPC_SECONDS.observe(time.monotonic() - start, method)
+        if 'error' in response:
+            RPC_ERRORS.inc(method, 'rpc')
+        return response
+
+    def _make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        if method == 'eth_sendRawTransaction' and self.broadcast > 1 and len(self.endpoints) > 1:
+            return self._broadcast(request_data)
+        endpoints = self.ranked()
+        if method in NON_IDEMPOTENT:
+            endpoints = endpoints[:1]
+        for i, endpoint in enumerate(endpoints):
+            try:
+                return self._post(endpoint, request_data)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                requests.exceptions.HTTPError,
+            ) as e:
+                if isinstance(e, requests.exceptions.Timeout):
+                    deadline.record_timeout(f'rpc {method}')
+                if i == len(endpoints) - 1 or deadline.expired():
+                    raise
+                logger.warning('RPC %s failed on %s, retrying on next endpoint', method, endpoint.uri)
+
+    def is_connected(self) -> bool:
+        try:
+            response = self.make_request(RPCEndpoint('web3_clientVersion'), [])
+        except Exception:
+            return False
+        return 'error' not in response
+
+
+_providers: dict[tuple[str, ...], PooledHTTPProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(endpoint_uris: Union[str, list[str]]) -> PooledHTTPProvider:
+    """provider shared by every client using the same endpoints (and their connection pools)"""
+    key = tuple(split_uris(endpoint_uris))
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = PooledHTTPProvider(list(key))
+        return _providers[key]
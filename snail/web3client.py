@@ -1,23 +1,27 @@
 import base64
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from functools import cached_property
 from typing import Any, Optional, Union
 
 from Crypto.Hash import keccak
-from eth_account.messages import encode_defunct
+from eth_keys import keys
 from web3 import Account, Web3, constants, exceptions
 from web3 import types as web3_types  # noqa - for others to import from here
 from web3.middleware import geth_poa_middleware
 
 from scommon.decorators import cached_property_with_ttl
 
-from . import contracts
+from . import abicodec, blocks, contracts, rpcpool
 
 DECIMALS = 1000000000000000000
 GWEI_DECIMALS = 1000000000
 BOTTOM_BASE_FEE = 25 * GWEI_DECIMALS
+# race join signatures kept by `presign_race_joins` (per client)
+PRESIGNED_MAX = 4096
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +46,63 @@ class TransactionUnderpricedWeb3Error(Web3Error):
     """Replacement transaction underpriced"""
 
 
+_presigner: Optional[ThreadPoolExecutor] = None
+_presigner_lock = threading.Lock()
+
+
+def _presign_executor() -> ThreadPoolExecutor:
+    # signing is CPU bound, one thread for all clients
+    global _presigner
+    with _presigner_lock:
+        if _presigner is None:
+            _presigner = ThreadPoolExecutor(max_workers=1, thread_name_prefix='presign')
+        return _presigner
+
+
+class ChainRegistry:
+    """
+    Parsed contracts and chain metadata of a Web3 instance, shared by every client (wallet) using it.
+    Wallets only differ in account and nonce state.
+    """
+
+    def __init__(self, web3: Web3):
+        self.web3 = web3
+        self._contracts = {}
+        self._lock = threading.Lock()
+
+    @cached_property
+    def chain_id(self) -> int:
+        return self.web3.eth.chain_id
+
+    def contract(self, module):
+        """contract object for `module` (from `snail.contracts`), ABI parsed only once"""
+        with self._lock:
+            if module not in self._contracts:
+                self._contracts[module] = self.web3.eth.contract(
+                    address=self.web3.toChecksumAddress(module.CONTRACT),
+                    abi=module.ABI,
+                )
+            return self._contracts[module]
+
+
+_registries: dict[Any, ChainRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def _make_web3(provider) -> Web3:
+    web3 = Web3(provider)
+    web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return web3
+
+
+def get_registry(provider) -> ChainRegistry:
+    """registry (and Web3 instance) shared by every client using the same provider"""
+    with _registries_lock:
+        if provider not in _registries:
+            _registries[provider] = ChainRegistry(_make_web3(provider))
+        return _registries[provider]
+
+
 class Client:
     def __init__(
         self,
@@ -51,25 +112,54 @@ class Client:
         web3_provider_class: Any = None,
         max_fee: Optional[float] = None,
         max_priority_fee: Optional[float] = None,
+        web3_ws: Optional[str] = None,
     ):
         if web3_provider_class is None:
-            web3_provider_class = Web3.HTTPProvider
-        self.web3 = Web3(web3_provider_class(web3_provider))
-        self.web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+            # pooled provider (and contracts) shared by all clients with the same endpoint(s)
+            self._registry = get_registry(rpcpool.get_provider(web3_provider))
+        else:
+            self._registry = ChainRegistry(_make_web3(web3_provider_class(web3_provider)))
+        self.web3 = self._registry.web3
         self.account: Account = web3_account
         self.wallet = wallet
         self._max_fee = max_fee
         self._max_priority_fee = max_priority_fee
+        self._web3_ws = web3_ws
+        # (snail_id, race_id, owner) => signature
+        self._presigned: dict[tuple[int, int, str], str] = {}
+        self._presigned_lock = threading.Lock()
+        # next nonce to use (None to sync with the node), as transactions may be sent without waiting for receipts
+        self._nonce: Optional[int] = None
+        self._nonce_lock = threading.Lock()
+
+    @property
+    def registry(self) -> ChainRegistry:
+        if self._registry.web3 is not self.web3:
+            # web3 replaced after init (such as in tests)
+            self._registry = ChainRegistry(self.web3)
+        return self._registry
 
     def _contract(self, module):
-        return self.web3.eth.contract(
-            address=self.web3.toChecksumAddress(module.CONTRACT),
-            abi=module.ABI,
-        )
+        return self.registry.contract(module)
 
     @cached_property
+    def block_watcher(self) -> blocks.BlockWatcher:
+        return blocks.get_watcher(self.web3, ws_uri=self._web3_ws)
+
+    def wait_for_transaction_receipt(self, tx_hash, timeout: float = 120) -> web3_types.TxReceipt:
+        """wait for receipt, checking on every new block (instead of web3 fixed polling)"""
+        try:
+            return self.block_watcher.wait_until(lambda: self.transaction_receipt(tx_hash), timeout)
+        except TimeoutError:
+            # not mined (maybe dropped), the following nonces would queue behind it
+            self.resync_nonce()
+            raise exceptions.TimeExhausted(
+                f'Transaction {tx_hash.hex() if isinstance(tx_hash, bytes) else tx_hash} is not in the chain after {timeout} seconds'
+            )
+
+    @property
     def chain_id(self):
-        return self.web3.eth.chain_id
+        return self.registry.chain_id
 
     @cached_property
     def preferences_contract(self):
@@ -131,7 +221,30 @@ class Client:
         priority_fee=None,
     ):
         """build tx, sign it and send it"""
-        nonce = self.web3.eth.getTransactionCount(self.wallet)
+        with self._nonce_lock:
+            tx_hash = self._bss_locked(function_call, estimate_only=estimate_only, priority_fee=priority_fee)
+        if estimate_only or wait_for_transaction_receipt is False:
+            return tx_hash
+        return self.wait_for_transaction_receipt(
+            tx_hash,
+            # if wait_for_transaction_receipt is None, use 120
+            timeout=wait_for_transaction_receipt or 120,
+        )
+
+    def resync_nonce(self):
+        """fetch the nonce from the node again on the next transaction (such as after one that was never mined)"""
+        with self._nonce_lock:
+            self._nonce = None
+
+    def _bss_locked(self, function_call: Any, estimate_only=False, priority_fee=None):
+        """
+        build, sign and send (with `_nonce_lock` held, so that transactions still pending do not share nonces)
+        returns the tx hash (or the estimate receipt, if `estimate_only`)
+        """
+        if self._nonce is None:
+            # include the ones still pending, if any
+            self._nonce = self.web3.eth.getTransactionCount(self.wallet, 'pending')
+        nonce = self._nonce
         # expected value in nAVAX
         gas_price = self.gas_price
         if priority_fee is None:
@@ -148,18 +261,25 @@ class Client:
         # put everything as priority fee - network will use for base fee if required!
         mpf = mf - BOTTOM_BASE_FEE
         if isinstance(function_call, dict):
-            # raw transaction
+            # raw transaction (or pre-encoded contract call, see `_encoded_call`)
             tx = {k: v for k, v in function_call.items()}
             tx.update(
                 {
                     'nonce': nonce,
                     'from': self.wallet,
-                    'gas': 21000,
                     'maxFeePerGas': mf,
                     'maxPriorityFeePerGas': mpf,
                     'chainId': self.chain_id,
                 }
             )
+            # contract calls are estimated without any `gas` set (it would cap the estimate), plain transfers are fixed
+            if 'data' in tx:
+                tx['gas'] = self.web3.eth.estimate_gas(tx)
+                if estimate_only:
+                    # already estimated
+                    return web3_types.TxReceipt({'gasUsed': tx['gas'], 'effectiveGasPrice': self.gas_price})
+            else:
+                tx['gas'] = 21000
         else:
             # function call
             tx = function_call.buildTransaction({'nonce': nonce, 'from': self.wallet})
@@ -176,15 +296,32 @@ class Client:
         try:
             tx_hash = self.web3.eth.send_raw_transaction(signed_txn.rawTransaction)
         except ValueError as e:
+            # nonce might be out of sync (such as a transaction sent by someone else), fetch it again next time
+            self._nonce = None
             raise Web3Error.make(e)
-
-        if wait_for_transaction_receipt is False:
-            return tx_hash
-        return self.web3.eth.wait_for_transaction_receipt(
-            tx_hash,
-            # if wait_for_transaction_receipt is None, use 120
-            timeout=wait_for_transaction_receipt or 120,
-        )
+        except Exception:
+            # sent or not, only the node knows
+            self._nonce = None
+            raise
+        self._nonce = nonce + 1
+        return tx_hash
+
+    def _encoded_call(self, module, function: str, *args) -> dict:
+        """contract call encoded with `abicodec` (instead of web3 contract functions), to be used with `_bss`"""
+        return {'to': abicodec.address(module), 'data': abicodec.function(module, function).encode_hex(*args)}
+
+    def _fast_call(self, module, function: str, *args) -> tuple:
+        """eth_call of a contract function encoded/decoded with `abicodec`"""
+        tx = self._encoded_call(module, function, *args)
+        tx['from'] = self.wallet
+        return abicodec.function(module, function).decode(self.web3.eth.call(tx))
+
+    def transaction_receipt(self, tx_hash) -> Optional[web3_types.TxReceipt]:
+        """non-blocking receipt lookup: returns None while transaction is still pending"""
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except exceptions.TransactionNotFound:
+            return None
 
     def set_snail_name(self, snail_id: int, new_name: str, wait_for_transaction_receipt: Union[bool, float] = None):
         return self._bss(
@@ -204,7 +341,9 @@ class Client:
         **kwargs,
     ):
         return self._bss(
-            self.race_contract.functions.joinDailyMission(
+            self._encoded_call(
+                contracts.snail_race,
+                'joinDailyMission',
                 race_info,
                 result_size,
                 results,
@@ -240,7 +379,7 @@ class Client:
 
     def claim_rewards(self, wait_for_transaction_receipt: Union[bool, float] = None, **kwargs):
         return self._bss(
-            self.race_contract.functions.claimRewards(),
+            self._encoded_call(contracts.snail_race, 'claimRewards'),
             wait_for_transaction_receipt=wait_for_transaction_receipt,
             **kwargs,
         )
@@ -249,7 +388,7 @@ class Client:
         return self.race_contract.functions.claimableRewards().call({'from': self.wallet}) / DECIMALS
 
     def balance_of_slime(self, raw=False):
-        x = self.slime_contract.functions.balanceOf(self.wallet).call({'from': self.wallet})
+        x = self._fast_call(contracts.snail_token, 'balanceOf', self.wallet)[0]
         if raw:
             return x
         return x / DECIMALS
@@ -258,13 +397,13 @@ class Client:
         return self.mega_race_contract.functions.claimableRewards().call({'from': self.wallet}) / DECIMALS
 
     def balance_of_wavax(self, raw=False):
-        x = self.wavax_contract.functions.balanceOf(self.wallet).call({'from': self.wallet})
+        x = self._fast_call(contracts.wavax, 'balanceOf', self.wallet)[0]
         if raw:
             return x
         return x / DECIMALS
 
     def balance_of_snails(self):
-        return self.snailnft_contract.functions.balanceOf(self.wallet).call({'from': self.wallet})
+        return self._fast_call(contracts.snail_nft, 'balanceOf', self.wallet)[0]
 
     def multicall_balances(
         self,
@@ -285,27 +424,27 @@ class Client:
         calls = []
         outputs = []
 
-        contracts = [
-            (self.snailnft_contract, 'balanceOf', snails, 'snails', 1),
-            (self.wavax_contract, 'balanceOf', wavax, 'wavax', DECIMALS),
-            (self.slime_contract, 'balanceOf', slime, 'slime', DECIMALS),
-            (self.multicall_contract, 'getEthBalance', avax, 'avax', DECIMALS),
-            (self.race_contract, 'dailyRewardTracker', unclaimed_slime, 'unclaimed_slime', DECIMALS),
-            (self.race_contract, 'compRewardTracker', unclaimed_slime, 'unclaimed_slime', DECIMALS),
-            (self.mega_race_contract, 'rewardTracker', unclaimed_wavax, 'unclaimed_wavax', DECIMALS),
+        targets = [
+            (contracts.snail_nft, 'balanceOf', snails, 'snails', 1),
+            (contracts.wavax, 'balanceOf', wavax, 'wavax', DECIMALS),
+            (contracts.snail_token, 'balanceOf', slime, 'slime', DECIMALS),
+            (contracts.multicall, 'getEthBalance', avax, 'avax', DECIMALS),
+            (contracts.snail_race, 'dailyRewardTracker', unclaimed_slime, 'unclaimed_slime', DECIMALS),
+            (contracts.snail_race, 'compRewardTracker', unclaimed_slime, 'unclaimed_slime', DECIMALS),
+            (contracts.snail_mega_race, 'rewardTracker', unclaimed_wavax, 'unclaimed_wavax', DECIMALS),
         ]
 
         for w in wallets:
-            for contract, function, do_it, prop, decs in contracts:
+            for module, function, do_it, prop, decs in targets:
                 if _all or do_it:
                     calls.append(
-                        (contract.address, contract.encodeABI(function, args=(w,))),
+                        (abicodec.address(module), abicodec.function(module, function).encode(w)),
                     )
-        for contract, function, do_it, prop, decs in contracts:
+        for module, function, do_it, prop, decs in targets:
             if _all or do_it:
-                outputs.append((prop, decs))
+                outputs.append((prop, decs, abicodec.function(module, function)))
 
-        x = self.multicall_contract.functions.aggregate(calls).call({'from': self.wallet})
+        x = self._fast_call(contracts.multicall, 'aggregate', calls)
         x = x[1]
         w_ind = 0
         results = {}
@@ -314,8 +453,9 @@ class Client:
             _r = _MultiCallResult()
             results[wallets[w_ind]] = _r
             for yy in range(step):
-                ov = getattr(_r, outputs[yy][0], None) or 0
-                setattr(_r, outputs[yy][0], ov + (self.web3.to_int(x[y + yy]) / outputs[yy][1]))
+                prop, decs, decoder = outputs[yy]
+                ov = getattr(_r, prop, None) or 0
+                setattr(_r, prop, ov + (decoder.decode(x[y + yy])[0] / decs))
             w_ind += 1
         return results
 
@@ -329,13 +469,50 @@ class Client:
         return r / DECIMALS
 
     def sign_race_join(self, snail_id: int, race_id: int, owner: str = None):
-        """Generate and sign payload to join a daily mission
+        """Generate and sign payload to join a daily mission (or use the one from `presign_race_joins`)
         >>> a = Account.from_key('badbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbad0')
         >>> o = Client(wallet='0xbadbadbadbadbadbadbadbadbadbadbadbadbad0', web3_account=a, web3_provider='x')
         >>> o.sign_race_join(1816, 44660)
         '0x66287e0465f644bad50cab950218ee6386f0e19bde3be4fad34f473b33f806c0177718d8ddb4ffe0149e3098b20abc1a382c6c77d7f4b7f61f6f4fa33f8f47641c'
         """
-        return self._sign_values(snail_id, race_id, owner=owner)
+        if owner is None:
+            owner = self.wallet
+        with self._presigned_lock:
+            signature = self._presigned.pop((snail_id, race_id, owner), None)
+        if signature is None:
+            signature = self._sign_values(snail_id, race_id, owner=owner)
+        return signature
+
+    def sign_race_joins(self, pairs: list[tuple[int, int]], owner: str = None) -> list[str]:
+        """
+        Sign race join payloads for all (snail_id, race_id) `pairs`, keeping them for `sign_race_join`
+        >>> a = Account.from_key('badbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbad0')
+        >>> o = Client(wallet='0xbadbadbadbadbadbadbadbadbadbadbadbadbad0', web3_account=a, web3_provider='x')
+        >>> o.sign_race_joins([(1816, 44660)])[0] == o.sign_race_join(1816, 44660)
+        True
+        """
+        if owner is None:
+            owner = self.wallet
+        signatures = []
+        for snail_id, race_id in pairs:
+            key = (snail_id, race_id, owner)
+            with self._presigned_lock:
+                signature = self._presigned.get(key)
+            if signature is None:
+                signature = self._sign_values(snail_id, race_id, owner=owner)
+                with self._presigned_lock:
+                    self._presigned[key] = signature
+                    while len(self._presigned) > PRESIGNED_MAX:
+                        # drop oldest
+                        del self._presigned[next(iter(self._presigned))]
+            signatures.append(signature)
+        return signatures
+
+    def presign_race_joins(self, pairs: list[tuple[int, int]], owner: str = None) -> Optional[Future]:
+        """`sign_race_joins` in background, so joins do not wait for signing"""
+        if self.account is None or not pairs:
+            return None
+        return _presign_executor().submit(self.sign_race_joins, list(pairs), owner=owner)
 
     def _hash_values(self, *values, owner: str = None):
         """
@@ -349,7 +526,9 @@ class Client:
 
         keccak_hash = keccak.new(digest_bits=256)
 
-        def _add_value(value):
+        stack = [values]
+        while stack:
+            value = stack.pop()
             if isinstance(value, int):
                 keccak_hash.update(value.to_bytes(32, "big"))
             elif isinstance(value, str):
@@ -357,18 +536,21 @@ class Client:
             elif isinstance(value, bytes):
                 keccak_hash.update(value)
             elif isinstance(value, (list, tuple)):
-                for value_i in value:
-                    _add_value(value_i)
+                stack.extend(reversed(value))
             else:
                 raise NotImplementedError(type(value), 'not supported')
 
-        _add_value(values)
         keccak_hash.update(bytes.fromhex(owner.replace("0x", "")))
 
         return keccak_hash.digest()
 
+    @cached_property
+    def _private_key(self) -> keys.PrivateKey:
+        # eth_keys signs with coincurve (libsecp256k1) if it is installed, pure python otherwise
+        return keys.PrivateKey(self.account.key)
+
     def _sign_values(self, *values, owner: str = None):
-        """Hash and sign typed values
+        """Hash and sign typed values - same as `account.sign_message(encode_defunct(...))`, without the overhead
         >>> a = Account.from_key('badbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbadbad0')
         >>> o = Client(wallet='0xbadbadbadbadbadbadbadbadbadbadbadbadbad0', web3_account=a, web3_provider='x')
         >>> o._sign_values(1816)
@@ -376,9 +558,12 @@ class Client:
         """
 
         sign_payload = self._hash_values(*values, owner=owner)
-        message = encode_defunct(sign_payload)
-
-        return self.account.sign_message(message).signature.hex()
+        message_hash = keccak.new(digest_bits=256)
+        message_hash.update(b'\x19Ethereum Signed Message:\n32')
+        message_hash.update(sign_payload)
+        signature = self._private_key.sign_msg_hash(message_hash.digest())
+        rsv = signature.r.to_bytes(32, 'big') + signature.s.to_bytes(32, 'big') + bytes([signature.v + 27])
+        return '0x' + rsv.hex()
 
     def sign_burn(self, snails: list[int], owner: str = None):
         """Generate and sign payload to join a daily mission
@@ -443,7 +628,7 @@ class Client:
         self, _from: str, to: str, token_id: int, wait_for_transaction_receipt: Union[bool, float] = None, **kwargs
     ):
         return self._bss(
-            self.snailnft_contract.functions.transferFrom(_from, to, token_id),
+            self._encoded_call(contracts.snail_nft, 'transferFrom', _from, to, token_id),
             wait_for_transaction_receipt=wait_for_transaction_receipt,
             **kwargs,
         )
@@ -0,0 +1,46 @@
+import itertools
+import time
+from unittest import TestCase, mock
+
+from snail import blocks
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.web3 = mock.MagicMock()
+        numbers = itertools.count(100)
+        self.block_number = mock.PropertyMock(side_effect=lambda: next(numbers))
+        type(self.web3.eth).block_number = self.block_number
+        self.watcher = blocks.BlockWatcher(self.web3, poll_interval=0.01)
+
+    def test_wait_for_block(self):
+        b = self.watcher.wait_for_block(timeout=5)
+        self.assertGreater(b, 100)
+        self.assertGreater(self.watcher.wait_for_block(timeout=5), b)
+
+    def test_wait_until(self):
+        calls = []
+
+        def _predicate():
+            calls.append(self.watcher.block_number)
+            if len(calls) == 3:
+                return 'ready'
+
+        self.assertEqual(self.watcher.wait_until(_predicate, timeout=5), 'ready')
+        # evaluated once per new block
+        self.assertEqual(len(set(calls)), 3)
+
+    def test_wait_until_timeout(self):
+        with self.assertRaises(TimeoutError):
+            self.watcher.wait_until(lambda: None, timeout=0.05)
+
+    def test_no_polling_without_waiters(self):
+        self.watcher.wait_for_block(timeout=5)
+        time.sleep(0.05)
+        calls = self.block_number.call_count
+        # poller is parked until someone waits
+        time.sleep(0.1)
+        self.assertEqual(self.block_number.call_count, calls)
+
+    def test_get_watcher(self):
+        self.assertIs(blocks.get_watcher(self.web3), blocks.get_watcher(self.web3))
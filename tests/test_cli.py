@@ -6,8 +6,11 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest import TestCase, mock
 
+import requests
+
 import cli
-from cli import types
+from cli import missions, types
+from snail import deadline
 from snail.gqlclient.types import Race, Snail
 from snail.web3client import _MultiCallResult
 
@@ -57,6 +60,45 @@ class TestBot(TestCase):
     def test_masked_owner(self):
         self.assertEqual(self.cli.masked_wallet, '0xbad...081')
 
+    def test_tick_exception_handler(self):
+        r = requests.Response()
+        r.status_code, r.headers['Retry-After'] = 429, '7'
+        error = requests.exceptions.HTTPError(response=r)
+        self.assertEqual(self.cli._cmd_bot_tick_exception_handler(mock.MagicMock(side_effect=error)), 7)
+        del r.headers['Retry-After']
+        self.assertEqual(self.cli._cmd_bot_tick_exception_handler(mock.MagicMock(side_effect=error)), 20)
+        # ticks are bounded by the deadline, when given (mission ticks)
+        self.assertEqual(
+            self.cli._cmd_bot_tick_exception_handler(
+                lambda: deadline.remaining() <= self.cli.args.tick_deadline, self.cli.args.tick_deadline
+            ),
+            True,
+        )
+        self.assertIsNone(self.cli._cmd_bot_tick_exception_handler(deadline.remaining))
+        self.assertEqual(
+            self.cli._cmd_bot_tick_exception_handler(mock.MagicMock(side_effect=deadline.DeadlineExceeded())), 20
+        )
+
+    def test_profile_ticks(self):
+        def _cmd_bot_tick_other():
+            return 5
+
+        self.assertIsNone(self.cli.args.profile_ticks)
+        with mock.patch('snail.profiling.profile') as profile:
+            self.assertEqual(self.cli._cmd_bot_tick_exception_handler(_cmd_bot_tick_other), 5)
+            profile.assert_not_called()
+
+        self.cli.args.profile_ticks = 1
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.cli.args.data_dir = Path(tmp_dir)
+            self.assertEqual(self.cli._cmd_bot_tick_exception_handler(_cmd_bot_tick_other), 5)
+            # not sampled
+            self.cli._cmd_bot_tick_exception_handler(lambda: None)
+            profiles = list((Path(tmp_dir) / 'profiles').iterdir())
+            self.assertEqual(sorted(p.suffix for p in profiles), ['.prof', '.txt'])
+            self.assertIn(f'{TEST_WALLET_MASKED}-cmd_bot_tick_other', profiles[0].name)
+            self.assertIn('cumulative', profiles[0].with_suffix('.txt').read_text())
+
     def test_join_missions(self):
         self.cli.client.gql.get_my_snails_for_missions.return_value = data.GQL_MISSION_SNAILS
         self.cli.client.gql.get_mission_races.return_value = data.GQL_MISSION_RACES
@@ -92,13 +134,15 @@ class TestBot(TestCase):
         self.assertEqual(
             self.cli.client.gql.join_mission_races.call_args_list,
             [
-                mock.call(8922, 169396, self._wallet, 'signed'),
-                mock.call(9104, 169399, self._wallet, 'signed'),
+                # planner prefers races matching adaptations (mission_matches=0 still allows any)
+                mock.call(9104, 169401, self._wallet, 'signed'),
+                mock.call(8922, 169405, self._wallet, 'signed'),
             ],
         )
         self.cli.client.web3.join_daily_mission.assert_not_called()
-        # before the fixes in this commit/test, count was 24, then 12, then 11, now it's 1 + number of snails (up to max 11)
-        self.assertEqual(self.cli.client.gql.get_mission_races.call_count, 3)
+        # before the fixes in this commit/test, count was 24, then 12, then 11, then 1 + number of snails (up to max 11)
+        # now the initial fetch is re-used for the plan and races are only refreshed after failures or if stale
+        self.assertEqual(self.cli.client.gql.get_mission_races.call_count, 1)
 
     def test_join_missions_no_adaptations(self):
         self.cli.client.gql.get_my_snails_for_missions.return_value = data.GQL_MISSION_SNAILS
@@ -205,6 +249,117 @@ class TestBot(TestCase):
         )
         self.cli.client.web3.join_daily_mission.assert_not_called()
 
+    def test_join_missions_last_spot_pending(self):
+        """
+        last spot joins do not wait for the receipt: all races are submitted first and
+        outcomes (joined / reverted) are reconciled as receipts become available
+        """
+        self.cli.client.gql.get_my_snails_for_missions.return_value = data.GQL_MISSION_SNAILS
+        self.cli.client.gql.get_mission_races.return_value = data.GQL_MISSION_RACES
+        self.cli.client.web3.sign_race_join.return_value = 'signed'
+        self.cli.args.mission_matches = 0
+        self.cli.args.boost = [int(s['id']) for s in data.GQL_MISSION_SNAILS['snails']]
+
+        def _join(snail_id, race_id, *_):
+            return {
+                'status': 1,
+                'signature': 'x',
+                'payload': {
+                    'race_id': race_id,
+                    'token_id': snail_id,
+                    'address': TEST_WALLET,
+                    'size': 0,
+                    'completed_races': [],
+                    'timeout': 1,
+                    'salt': 1,
+                },
+            }
+
+        self.cli.client.gql.join_mission_races.side_effect = _join
+        self.cli.client.web3.join_daily_mission.side_effect = lambda race_info, *_, **__: race_info[0]
+        lookups = []
+        deadlines = set()
+
+        def _receipt(tx_hash):
+            lookups.append(tx_hash)
+            deadlines.add(deadline.remaining())
+            if lookups.count(tx_hash) == 1:
+                # still pending on first lookup
+                return None
+            # odd race ids revert
+            return {'status': int(tx_hash % 2 == 0), 'transactionHash': b'', 'gasUsed': 1, 'effectiveGasPrice': 1}
+
+        self.cli.client.web3.transaction_receipt.side_effect = _receipt
+        with deadline.deadline(60):
+            r = self.cli.join_missions()
+
+        self.assertEqual(self.cli.client.web3.join_daily_mission.call_count, 6)
+        for c in self.cli.client.web3.join_daily_mission.call_args_list:
+            self.assertIs(c.kwargs['wait_for_transaction_receipt'], False)
+        # receipts were looked up while other races were still being joined
+        self.assertEqual(lookups[:3], [169396, 169396, 169399])
+        # and not cut by the tick deadline
+        self.assertEqual(deadlines, {None})
+        self.assertEqual(r.joined_last, 3)
+        self.assertEqual(set(self.cli.database.joins_last), {(8667, 169396), (8416, 169400), (8663, 169402)})
+        self.assertEqual(set(self.cli._snail_mission_cooldown), {8392, 8267, 8922})
+
+    def test_join_missions_coordinated(self):
+        """wallets share the mission race feed and do not target the same races"""
+        other = cli.cli.CLI(cli.cli.Wallet('0xother', 'pkey2'), 'http://localhost:99999', self.cli.args, True)
+        other.client.gql = mock.MagicMock()
+        other.client.web3 = mock.MagicMock(wallet='0xother')
+        other.notifier = mock.MagicMock()
+        coordinator = missions.MissionCoordinator(self.cli.client)
+        self.cli.multicli = other.multicli = mock.MagicMock(mission_coordinator=coordinator)
+        for c in (self.cli, other):
+            c.client.gql.get_my_snails_for_missions.return_value = data.GQL_MISSION_SNAILS
+            c.client.web3.sign_race_join.return_value = 'signed'
+        self.cli.client.gql.get_mission_races.return_value = data.GQL_MISSION_RACES
+        self.cli.args.mission_matches = 0
+
+        self.cli.join_missions()
+        other.join_missions()
+        self.assertEqual([c.args[1] for c in self.cli.client.gql.join_mission_races.call_args_list], [169405, 169406])
+        self.assertEqual(other.client.gql.join_mission_races.call_args_list, [])
+        # single fetch for both wallets
+        self.assertEqual(self.cli.client.gql.get_mission_races.call_count, 1)
+        other.client.gql.get_mission_races.assert_not_called()
+
+    def test_mission_watch_wakeup(self):
+        self.cli.multicli = mock.MagicMock(race_watcher=missions.RaceWatcher(lambda: []))
+        self.cli.join_missions = mock.MagicMock()
+        self.cli.args.missions = True
+        loop = self.cli.database.mission_loop
+        loop.status = cli.database.MissionLoop.Status.DONE
+        loop.next_at = self.cli._now() + timedelta(minutes=10)
+        loop.pending = 2
+        loop.pending_boosted = 1
+        # pending snails do not re-run the mission loop every tick
+        self.cli._cmd_bot_tick_missions()
+        self.cli.join_missions.assert_not_called()
+
+        race = Race({'id': 1, 'athletes': list(range(9))})
+        new_race = Race({'id': 2, 'athletes': [5]})
+        self.cli._mission_pending_boosted = {5, 100}
+        self.cli._mission_pending_normal = {101}
+        self.cli.mission_watch_wakeup(missions.WatchChanges(last_spots=[race], new_races=[new_race]))
+        # snail 5 is already in the race, only boosted snails for last spots (and the others for new races)
+        self.cli.client.web3.presign_race_joins.assert_called_once_with([(100, 1), (101, 2)])
+        self.cli.join_missions.return_value = cli.database.MissionLoop(
+            status=cli.database.MissionLoop.Status.DONE, pending=1, pending_boosted=1
+        )
+        self.cli._cmd_bot_tick_missions()
+        self.cli.join_missions.assert_called_once()
+        # still pending, fallback re-check within the watcher max interval
+        self.assertLessEqual(loop.next_at, self.cli._now() + timedelta(seconds=self.cli.race_watcher.max_interval))
+
+        # new races are of no use for boosted snails
+        loop = self.cli.database.mission_loop
+        loop.next_at = _next_at = self.cli._now() + timedelta(minutes=10)
+        self.cli.mission_watch_wakeup(missions.WatchChanges(new_races=[race]))
+        self.assertEqual(loop.next_at, _next_at)
+
     def test_join_missions_boosted_to_15(self):
         msnails = copy.deepcopy(data.GQL_MISSION_SNAILS)
         for s in msnails['snails']:
@@ -226,8 +381,9 @@ class TestBot(TestCase):
                 mock.call(8267, 169401, self._wallet, 'signed'),
                 mock.call(8663, 169402, self._wallet, 'signed'),
                 mock.call(8851, 169403, self._wallet, 'signed'),
-                mock.call(8922, 169405, self._wallet, 'signed'),
-                mock.call(8667, 169406, self._wallet, 'signed'),
+                # greedy order had 8922 in 169405 and 8667 in 169406 (no match), both match this way
+                mock.call(8667, 169405, self._wallet, 'signed'),
+                mock.call(8922, 169406, self._wallet, 'signed'),
             ],
         )
         self.cli.client.web3.join_daily_mission.assert_not_called()
@@ -592,6 +748,7 @@ AVAX: 1.000 / SNAILS: 1
         self.cli._bot_tournament_market()
         self.cli.notifier.notify.assert_not_called()
 
+        snails = self.cli.client.gql.get_all_snails_marketplace.return_value['snails']
         self.cli.client.gql.get_all_snails_marketplace.return_value['snails'] = []
         self.cli._bot_tournament_market()
         self.cli.notifier.notify.assert_called_once_with(
@@ -602,6 +759,12 @@ AVAX: 1.000 / SNAILS: 1
         self.cli._bot_tournament_market()
         self.cli.notifier.notify.assert_not_called()
 
+        # cache is trimmed to the most recently updated
+        self.cli.client.gql.get_all_snails_marketplace.return_value['snails'] = snails
+        with mock.patch('cli.cli.TOURNAMENT_MARKET_CACHE_SIZE', 1):
+            self.cli._bot_tournament_market()
+        self.assertEqual(list(self.cli.database.tournament_market_cache), [20283])
+
     def test_find_candidates(self):
         snails = [
             Snail({'id': 1, 'adaptations': ['Mountain', 'Cold', 'Slide'], 'purity': 13}),
@@ -739,7 +902,8 @@ wallet: [{self.wallet_file.name}]
         cli.main(['-c', self.config_file.name, 'missions'])
         multi_mock.assert_called_once_with(wallets=[TEST_WALLET_WALLET], proxy_url=None, args=mock.ANY)
         notifier = multi_mock.mock_calls[0][2]['args'].notify
-        self.assertEqual(notifier._Notifier__token, '')
+        # no --notify, no telegram bot
+        self.assertIsNone(notifier.updater)
         self.assertEqual(notifier.chat_id, None)
         self.assertEqual(notifier.owner_chat_id, None)
 
@@ -1,8 +1,9 @@
 import tempfile
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from unittest import TestCase
+from unittest import TestCase, mock
 
-from cli import database
+from cli import database, helpers
 from cli.helpers import SetQueue
 
 
@@ -124,3 +125,148 @@ class Test(TestCase):
             db_copy = database.WalletDB.load_from_file(t)
             self.assertEqual(db_copy.tournament_market_cache, {1: ('a', 1, 2)})
             self.assertIn(1, db_copy.tournament_market_cache)
+
+    @mock.patch.object(helpers, 'JOURNAL_FLUSH_SECONDS', 0)
+    def test_journal(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = Path(tmp_dir) / 'db.json'
+            journal_file = database.GlobalDB.journal_file(db_file.with_stem('db-x'))
+
+            db = database.GlobalDB.load_from_file(db_file, journal=True)
+            wdb = db.add_wallet('x')
+            wdb.slime_won = 2
+            wdb.joins_last.add(10)
+            wdb.save()
+            # only changed fields journaled, no snapshot yet
+            self.assertFalse(wdb.save_file.exists())
+            self.assertEqual(journal_file.read_text(), '{"slime_won": 2.0, "joins_last": [10]}\n')
+            # not dirty, nothing written
+            wdb.save()
+            self.assertEqual(len(journal_file.read_text().splitlines()), 1)
+            wdb.slime_won += 1
+            wdb.joins_last.add(11)
+            wdb.save()
+            # only the added item journaled, not the whole queue
+            self.assertEqual(
+                journal_file.read_text().splitlines()[1], '{"slime_won": 3.0, "$extend": {"joins_last": [0, [11]]}}'
+            )
+
+            # crash while appending
+            with journal_file.open('a') as f:
+                f.write('{"slime_won": 9')
+
+            another_db = database.GlobalDB.load_from_file(db_file)
+            w2 = another_db.add_wallet('x')
+            self.assertEqual(w2.slime_won, 3)
+            self.assertEqual(w2.joins_last, {10: None, 11: None})
+            # not journaling, left untouched
+            self.assertTrue(journal_file.read_text().endswith('{"slime_won": 9'))
+
+            # journaling, incomplete entry is dropped so the next ones are not merged with it
+            db = database.GlobalDB.load_from_file(db_file, journal=True)
+            wdb = db.add_wallet('x')
+            self.assertEqual(len(journal_file.read_text().splitlines()), 2)
+            wdb.slime_won = 4
+            wdb.save()
+            self.assertEqual(database.GlobalDB.load_from_file(db_file).add_wallet('x').slime_won, 4)
+
+            db.compact_all()
+            self.assertFalse(journal_file.exists())
+            self.assertEqual(database.WalletDB.load_from_file(wdb.save_file).slime_won, 4)
+
+    def test_journal_debounce(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = Path(tmp_dir) / 'db.json'
+            journal_file = database.GlobalDB.journal_file(db_file.with_stem('db-x'))
+            db = database.GlobalDB.load_from_file(db_file, journal=True)
+            wdb = db.add_wallet('x')
+            wdb.slime_won = 1
+            wdb.save()
+            # right after a write, saves are coalesced
+            wdb.slime_won = 2
+            wdb.save()
+            wdb.joins_last.add(10)
+            wdb.save()
+            self.assertEqual(journal_file.read_text(), '{"slime_won": 1.0}\n')
+            db.flush_all()
+            self.assertEqual(journal_file.read_text().splitlines()[1], '{"slime_won": 2.0, "joins_last": [10]}')
+            # and written on exit
+            wdb.slime_won = 3
+            wdb.save()
+            self.assertEqual(len(journal_file.read_text().splitlines()), 2)
+            db.compact_all()
+            self.assertFalse(journal_file.exists())
+            self.assertEqual(database.GlobalDB.load_from_file(db_file).add_wallet('x').slime_won, 3)
+
+    @mock.patch.object(helpers, 'JOURNAL_FLUSH_SECONDS', 0)
+    def test_journal_compaction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            t = Path(tmp_dir) / 'db.json'
+            db = database.WalletDB.load_from_file(t, journal=True)
+            for i in range(helpers.JOURNAL_COMPACT_ENTRIES):
+                db.notified_races.add(i)
+                db.save()
+            self.assertFalse(database.WalletDB.journal_file(t).exists())
+            self.assertEqual(len(database.WalletDB.load_from_file(t).notified_races), 100)
+            # snapshot written atomically, no leftovers
+            self.assertEqual([x.name for x in Path(tmp_dir).iterdir()], ['db.json'])
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file = Path(tmp_dir) / 'db.sqlite'
+            db = database.GlobalDB.load_from_sqlite(db_file)
+            w = db.add_wallet('x')
+            w.slime_won += 2
+            w.slime_won_last += 2
+            w.joins_last.add((1, 10))
+            w.joins_last.add((2, 10))
+            w.tournament_market_cache[1] = ('a', 1, 2)
+            w.save()
+            w.slime_won += 1
+            w.slime_won_normal += 1
+            # re-added, moved to the end
+            w.joins_last.add((1, 10))
+            w.notified_races.add(5)
+            w.save()
+            db.fee_spike_notified = True
+            db.save()
+            self.assertEqual(db.total_slime_won(), (3, 2, 1))
+            self.assertEqual(db.slime_won_since(datetime.now(tz=timezone.utc) - timedelta(hours=1)), (3, 2, 1))
+            self.assertEqual(db.slime_won_since(datetime.now(tz=timezone.utc) + timedelta(hours=1)), (0, 0, 0))
+
+            db2 = database.GlobalDB.load_from_sqlite(db_file)
+            self.assertTrue(db2.fee_spike_notified)
+            w2 = db2.add_wallet('x')
+            self.assertEqual(w2.slime_won, 3)
+            self.assertEqual(list(w2.joins_last), [(2, 10), (1, 10)])
+            self.assertEqual(w2.notified_races, {5: None})
+            self.assertEqual(w2.tournament_market_cache, {1: ('a', 1, 2)})
+            self.assertEqual(db2.add_wallet('y').slime_won, 0)
+
+    def test_sqlite_import_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            db = database.GlobalDB.load_from_file(tmp_path / 'db.json')
+            db.fee_spike_notified = True
+            db.save()
+            for owner, won in (('x', 1), ('y', 2)):
+                w = db.add_wallet(owner)
+                w.slime_won = won
+                w.joins_normal.add((won, 1))
+                w.save()
+
+            db = database.GlobalDB.load_from_sqlite(tmp_path / 'db.sqlite')
+            self.assertTrue(db.fee_spike_notified)
+            self.assertEqual(db.add_wallet('x').joins_normal, {(1, 1): None})
+            db.add_wallet('y')
+            self.assertEqual(db.total_slime_won(), (3, 0, 0))
+            # imported totals were not won in the last day
+            self.assertEqual(db.slime_won_since(datetime.now(tz=timezone.utc) - timedelta(days=1)), (0, 0, 0))
+            db.wallets['x'].slime_won += 2
+            db.wallets['x'].save()
+            self.assertEqual(db.slime_won_since(datetime.now(tz=timezone.utc) - timedelta(days=1)), (2, 0, 0))
+            self.assertEqual(db.total_slime_won(), (5, 0, 0))
+            # only imported once
+            (tmp_path / 'db-x.json').write_text('{"slime_won": 10}')
+            db = database.GlobalDB.load_from_sqlite(tmp_path / 'db.sqlite')
+            self.assertEqual(db.add_wallet('x').slime_won, 3)
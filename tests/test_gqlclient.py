@@ -1,10 +1,15 @@
+import threading
+import time
 from pathlib import Path
 from unittest import TestCase, mock
 
 import gql
+import requests
 from graphql.error.syntax_error import GraphQLSyntaxError
 
-from snail import gqlclient
+from snail import deadline, gqlclient, proxy
+from snail.gqlclient import hedge, priority, throttle
+from snail.gqlclient.priority import Priority
 
 
 class Test(TestCase):
@@ -35,11 +40,281 @@ class Test(TestCase):
         c = gqlclient.Client(http_token='x')
         self.assertIn('authorization', c.headers)
 
+    def test_shared_rate_limiter(self):
+        self.assertIsNone(self.client._limiter)
+        c1 = gqlclient.Client(rate_limiter=0.5)
+        c2 = gqlclient.Client(rate_limiter=0.5)
+        self.assertIs(c1._limiter, c2._limiter)
+        self.assertIsNot(c1._limiter, gqlclient.Client(rate_limiter=1)._limiter)
+        limiter = gqlclient.RateLimiter(0.2)
+        start = time.monotonic()
+        limiter.wait()
+        self.assertLess(time.monotonic() - start, 0.1)
+        limiter.wait()
+        self.assertAlmostEqual(time.monotonic() - start, 0.2, places=1)
+
+    def test_rate_limiter_priority(self):
+        limiter = gqlclient.RateLimiter(0.1)
+        limiter.wait()
+        order = []
+
+        def _wait(lane):
+            limiter.wait(lane)
+            order.append(lane)
+
+        background = threading.Thread(target=_wait, args=(Priority.BACKGROUND,))
+        background.start()
+        # queued after the background one, still goes first
+        time.sleep(0.02)
+        critical = threading.Thread(target=_wait, args=(Priority.CRITICAL,))
+        critical.start()
+        background.join(5)
+        critical.join(5)
+        self.assertEqual(order, [Priority.CRITICAL, Priority.BACKGROUND])
+
+    def test_impersonate(self):
+        curl = mock.MagicMock()
+        curl.requests.errors.RequestsError = type('RequestsError', (Exception,), {})
+        modules = {
+            'curl_cffi': curl,
+            'curl_cffi.requests': curl.requests,
+            'curl_cffi.requests.errors': curl.requests.errors,
+        }
+        with mock.patch.dict('sys.modules', modules):
+            c = gqlclient.Client(retry=2, impersonate=True)
+            curl_session = curl.requests.Session.return_value
+            curl_session.request.return_value = mock.MagicMock(
+                status_code=200, headers={'Content-Type': 'application/json'}, content=b'{"data": {"x": {"y": 1}}}'
+            )
+            self.assertEqual(c.query('op', {}, 'query'), {'x': {'y': 1}})
+            kwargs = curl_session.request.call_args.kwargs
+            self.assertEqual(kwargs['ja3'], proxy.JA3)
+            self.assertEqual(kwargs['headers']['User-Agent'], proxy.USER_AGENT)
+
+            # one curl session per thread
+            thread = threading.Thread(target=c.query, args=('op', {}, 'query'))
+            thread.start()
+            thread.join(5)
+            self.assertEqual(curl.requests.Session.call_count, 2)
+
+            curl_session.request.side_effect = curl.requests.errors.RequestsError('boom')
+            with self.assertRaises(requests.exceptions.ConnectionError) as ctx:
+                c.query('op', {}, 'query')
+            self.assertNotIsInstance(ctx.exception, requests.exceptions.Timeout)
+            timeout = curl.requests.errors.RequestsError('timed out')
+            timeout.code = 28
+            curl_session.request.side_effect = timeout
+            with self.assertRaises(requests.exceptions.Timeout):
+                c.query('op', {}, 'query')
+
     def test_init_retry(self):
         self.assertEqual(self.client.adapters['https://'].max_retries.total, 0)
         c = gqlclient.Client(retry=5)
         self.assertEqual(c.adapters['https://'].max_retries.total, 5)
 
+    def test_shared_pool(self):
+        c1 = gqlclient.Client(http_token='a', retry=2, pool_size=20, keepalive=30)
+        c2 = gqlclient.Client(http_token='b', retry=2, pool_size=20, keepalive=30)
+        adapter = c1.adapters['https://']
+        self.assertIs(adapter, c2.adapters['https://'])
+        self.assertIsNot(adapter, self.client.adapters['https://'])
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertIn(
+            gqlclient.keepalive_socket_options(30)[-1], adapter.poolmanager.connection_pool_kw['socket_options']
+        )
+        # authorization is not shared
+        self.assertNotEqual(c1.headers['authorization'], c2.headers['authorization'])
+
+    def test_prewarm(self):
+        pool = mock.MagicMock()
+        fresh, alive = mock.MagicMock(sock=None), mock.MagicMock(sock=object())
+        pool._get_conn.side_effect = [fresh, alive]
+        with mock.patch.object(
+            self.client.adapters['https://'], 'get_connection_with_tls_context', return_value=pool
+        ) as get_conn:
+            self.client.prewarm(connections=2)
+        get_conn.assert_called_once()
+        fresh.connect.assert_called_once_with()
+        alive.connect.assert_not_called()
+        self.assertEqual(pool._put_conn.call_args_list, [mock.call(fresh), mock.call(alive)])
+
+    def test_timeout_budgets(self):
+        self.req_mock.return_value.json.return_value = {'data': {'x': {}}}
+        self.client.query('joinMissionRaces', {}, 'query')
+        self.assertAlmostEqual(
+            self.req_mock.call_args.kwargs['timeout'], gqlclient.OPERATION_TIMEOUTS['joinMissionRaces'], places=1
+        )
+        self.client.query('unknownOperation', {}, 'query')
+        self.assertAlmostEqual(self.req_mock.call_args.kwargs['timeout'], gqlclient.DEFAULT_TIMEOUT, places=1)
+        # capped to the deadline of the caller
+        with deadline.deadline(2):
+            self.client.query('getAllSnail', {}, 'query')
+        self.assertLessEqual(self.req_mock.call_args.kwargs['timeout'], 2)
+
+    def test_timeout_metrics(self):
+        before = deadline.timeouts().get('getMissionRaces', 0)
+        self.req_mock.side_effect = requests.exceptions.ReadTimeout()
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.query('getMissionRaces', {}, 'query')
+        # deadline already expired, not even sent
+        self.req_mock.reset_mock()
+        with deadline.deadline(0):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                self.client.query('getMissionRaces', {}, 'query')
+        self.req_mock.assert_not_called()
+        self.assertEqual(deadline.timeouts()['getMissionRaces'], before + 2)
+
+    def test_deadline_retry(self):
+        retry = gqlclient._retries(3)
+        self.assertFalse(retry.is_exhausted())
+        with mock.patch('urllib3.util.retry.Retry.get_backoff_time', return_value=10):
+            self.assertEqual(retry.get_backoff_time(), 10)
+            with deadline.deadline(1):
+                self.assertLessEqual(retry.get_backoff_time(), 1)
+        with deadline.deadline(0):
+            self.assertTrue(retry.is_exhausted())
+
+    @mock.patch('snail.gqlclient.throttle.INTERVAL_STEP', 0.02)
+    def test_throttle(self):
+        t = throttle.Throttle(4)
+        t.acquire()
+        t.release(429, retry_after=0.2)
+        self.assertEqual(t.stats()['limit'], 2)
+        self.assertEqual(t.interval, 0.02)
+        self.assertGreater(t.stats()['blocked_for'], 0.1)
+        # same event (requests already in flight), no further decrease
+        t.acquire()
+        t.release(502)
+        self.assertEqual(t.stats()['limit'], 2)
+        # back up with successes
+        for _ in range(10):
+            t.acquire()
+            t.release(200)
+        self.assertEqual(t.stats()['limit'], 4)
+        self.assertLess(t.interval, 0.02)
+        self.assertEqual(t.stats()['throttled'], 2)
+
+    def test_throttle_slots(self):
+        t = throttle.Throttle(1)
+        t.acquire()
+        with deadline.deadline(0.05):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                t.acquire()
+        t.release(200)
+        t.acquire()
+        self.assertEqual(t.stats()['inflight'], 1)
+
+    def test_throttle_lanes(self):
+        t = throttle.Throttle(2)
+        t.acquire(Priority.BACKGROUND)
+        # background leaves the last slot for the others
+        with deadline.deadline(0.05):
+            with self.assertRaises(deadline.DeadlineExceeded):
+                t.acquire(Priority.BACKGROUND)
+        t.acquire(Priority.CRITICAL)
+        self.assertEqual(t.stats()['inflight'], 2)
+
+    def test_priority(self):
+        self.req_mock.return_value.json.return_value = {'data': {'x': {}}}
+        self.client._limiter = mock.MagicMock()
+        with priority.lane(Priority.BACKGROUND):
+            self.client.query('getAllSnail', {}, 'query')
+            self.client.query('joinMissionRaces', {}, 'query')
+        self.client.query('getAllSnail', {}, 'query')
+        self.assertEqual(
+            self.client._limiter.wait.call_args_list,
+            [mock.call(Priority.BACKGROUND), mock.call(Priority.CRITICAL), mock.call(Priority.NORMAL)],
+        )
+
+    def test_hedge(self):
+        h = hedge.Hedger(0.5)
+        for _ in range(hedge.MIN_SAMPLES):
+            h._record('getMissionRaces', 0.01)
+        calls = []
+        release = threading.Event()
+
+        def _send():
+            calls.append(1)
+            if len(calls) == 1:
+                # first one hangs
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+
+        # budget not there yet (0.5 token)
+        self.assertEqual(h.run('getMissionRaces', lambda: 'x'), 'x')
+        self.assertEqual(h.run('getMissionRaces', _send), 'fast')
+        release.set()
+        self.assertEqual(h.stats(), {'requests': 2, 'hedged': 1, 'hedge_wins': 1})
+        # budget spent
+        calls.clear()
+        release.clear()
+        threading.Timer(0.1, release.set).start()
+        self.assertEqual(h.run('getMissionRaces', _send), 'slow')
+        self.assertEqual(len(calls), 1)
+
+    def test_hedge_busy(self):
+        h = hedge.Hedger(1)
+        for _ in range(hedge.MIN_SAMPLES):
+            h._record('getMissionRaces', 0.01)
+        release = threading.Event()
+        slow = [h._executor.submit(release.wait, 5) for _ in range(hedge.WORKERS)]
+        h._busy = hedge.WORKERS
+        # copies are not queued behind the slow originals
+        self.assertEqual(h._submit(h._copies, lambda: 'copy').result(1), 'copy')
+        # and originals are sent inline when all workers are taken
+        self.assertEqual(h.run('getMissionRaces', threading.current_thread), threading.current_thread())
+        h._busy = 0
+        release.set()
+        for f in slow:
+            f.result(5)
+        # resend used for the copy
+        release.clear()
+        self.assertEqual(h.run('getMissionRaces', lambda: release.wait(5) and 'slow', lambda: 'copy'), 'copy')
+        release.set()
+
+    def test_hedge_rate_limited(self):
+        c = gqlclient.Client(hedge_fraction=0.3, max_concurrency=3)
+        c._throttle = throttle.Throttle(3)
+        c._limiter = mock.MagicMock()
+        c._hedger = mock.MagicMock()
+        # only the copy is sent
+        c._hedger.run.side_effect = lambda operation, send, resend: resend()
+        with mock.patch.object(c, 'post') as post:
+            post.return_value.status_code = 200
+            post.return_value.headers = {}
+            post.return_value.json.return_value = {'data': {'x': {}}}
+            c.query('getMissionRaces', {}, 'query getMissionRaces { }')
+        # the copy waited for its own token (after the one of the original) and took a throttle slot
+        self.assertEqual(c._limiter.wait.call_count, 2)
+        self.assertEqual(c._throttle.stats()['succeeded'], 1)
+
+    def test_hedge_only_reads(self):
+        c = gqlclient.Client(hedge_fraction=0.3)
+        self.assertIs(c._hedger, hedge.get_hedger(0.3))
+        c._hedger = mock.MagicMock()
+        with mock.patch.object(c, 'post') as post:
+            post.return_value.json.return_value = {'data': {'join_mission_promise': {}}}
+            c.get_mission_races()
+            c._hedger.run.assert_called_once()
+            c._hedger.run.reset_mock()
+            c.join_mission_races(1, 2, '0x', 'sig')
+            c._hedger.run.assert_not_called()
+
+    def test_throttled_query(self):
+        c = gqlclient.Client(max_concurrency=3)
+        self.assertIs(c._throttle, gqlclient.Client(max_concurrency=3)._throttle)
+        c._throttle = throttle.Throttle(3)
+        r = requests.Response()
+        r.status_code, r.headers['Retry-After'] = 429, '5'
+        with mock.patch.object(c, 'post', return_value=r):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                c.query('op', {}, 'query')
+        stats = c._throttle.stats()
+        self.assertEqual((stats['limit'], stats['inflight']), (1, 0))
+        self.assertGreater(stats['blocked_for'], 4)
+
     def test_get_all_genes_marketplace(self):
         self.client.get_all_genes_marketplace()
         self.req_mock.assert_called_once()
@@ -25,3 +25,39 @@ class Test(TestCase):
         q.add(7)
         q.add(8)
         self.assertEqual(list(q), [2, 5, 6, 7, 8])
+
+    def test_lru_dict(self):
+        d = helpers.LRUDict(capacity=3)
+        d[1] = 'a'
+        d[2] = 'b'
+        d[3] = 'c'
+        # reads and writes move it to last, membership checks do not
+        self.assertEqual(d.get(1), 'a')
+        self.assertIn(2, d)
+        d[3] = 'C'
+        self.assertEqual(list(d), [2, 1, 3])
+        self.assertEqual(d[1], 'a')
+        # above capacity, least recently used goes first
+        d[4] = 'd'
+        self.assertEqual(list(d.items()), [(3, 'C'), (1, 'a'), (4, 'd')])
+        self.assertIsNone(d.get(2))
+
+    @mock.patch('time.monotonic')
+    def test_lru_dict_ttl(self, monotonic):
+        monotonic.return_value = 100
+        d = helpers.LRUDict(capacity=3, ttl=10)
+        d[1] = 'a'
+        monotonic.return_value = 105
+        d[2] = 'b'
+        self.assertEqual(d[1], 'a')
+        # expired items are gone when looked up...
+        monotonic.return_value = 110
+        self.assertNotIn(1, d)
+        with self.assertRaises(KeyError):
+            d[1]
+        self.assertEqual(d.get(2), 'b')
+        # ...or when writing any other
+        monotonic.return_value = 115
+        d[3] = 'c'
+        self.assertEqual(list(d), [3])
+        self.assertEqual(d._expires, {3: 125})
@@ -0,0 +1,79 @@
+import threading
+from unittest import TestCase
+
+from cli import jobs
+from snail import profiling
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.queue = jobs.JobQueue(max_workers=2, limits={'stats': 2})
+
+    def tearDown(self) -> None:
+        self.queue.stop()
+
+    def test_inline(self):
+        calls = []
+        job = self.queue.submit('stats', lambda: calls.append(jobs.current()))
+        self.assertEqual(calls, [job])
+        self.assertFalse(job.background)
+        self.assertIsNone(jobs.current())
+        self.assertEqual(self.queue.jobs(), [])
+
+    def test_background(self):
+        self.queue.start()
+        release = threading.Event()
+        job = self.queue.submit('stats', release.wait, 5)
+        self.assertTrue(job.background)
+        self.assertEqual(self.queue.jobs(), [job])
+        release.set()
+        job.future.result(5)
+        self.assertEqual(self.queue.jobs(), [])
+
+    def test_limits(self):
+        self.queue.start()
+        release = threading.Event()
+        j1 = self.queue.submit('inventory', release.wait, 5)
+        with self.assertRaises(jobs.JobLimitReached):
+            self.queue.submit('inventory', release.wait, 5)
+        # other kinds have their own limits
+        j2 = self.queue.submit('stats', release.wait, 5)
+        j3 = self.queue.submit('stats', release.wait, 5)
+        with self.assertRaises(jobs.JobLimitReached):
+            self.queue.submit('stats', release.wait, 5)
+        release.set()
+        for j in (j1, j2, j3):
+            j.future.result(5)
+
+    def test_cancel(self):
+        self.queue.start()
+        started = threading.Event()
+        steps = []
+
+        def _work():
+            started.set()
+            while True:
+                jobs.checkpoint()
+                steps.append(1)
+                threading.Event().wait(0.01)
+
+        job = self.queue.submit('stats', _work)
+        started.wait(5)
+        self.assertTrue(self.queue.cancel(job.id))
+        job.future.result(5)
+        self.assertTrue(job.cancelled)
+        self.assertEqual(self.queue.jobs(), [])
+        self.assertFalse(self.queue.cancel(job.id))
+
+    def test_checkpoint_outside_job(self):
+        # no-op
+        jobs.checkpoint()
+
+    def test_fanout_profiled(self):
+        def _fanout_work(x):
+            return x * 2
+
+        with self.assertLogs('snail.profiling') as logs, profiling.profile('fanout', top=None):
+            self.assertEqual(sorted(r for _, r, _ in jobs.fanout(_fanout_work, [1, 2])), [2, 4])
+        # recorded in the worker threads
+        self.assertIn('(_fanout_work)', logs.output[0])
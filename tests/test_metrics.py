@@ -0,0 +1,47 @@
+from unittest import TestCase, mock
+
+import requests
+
+from snail import gqlclient, metrics
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.registry = metrics.Registry()
+
+    def test_register_existing(self):
+        c = self.registry.counter('x_total', 'X', ('a',))
+        self.assertIs(self.registry.counter('x_total', 'X', ('a',)), c)
+        with self.assertRaises(ValueError):
+            c.inc()
+
+    def test_render(self):
+        self.registry.counter('errors_total', 'Errors', ('operation',)).inc('say "hi"')
+        self.registry.callback('inflight', 'In flight', lambda: {('8',): 3}, ('max',))
+        self.assertEqual(
+            self.registry.render(),
+            '''\
+# HELP errors_total Errors
+# TYPE errors_total counter
+errors_total{operation="say \\"hi\\""} 1
+# HELP inflight In flight
+# TYPE inflight gauge
+inflight{max="8"} 3
+''',
+        )
+
+    def test_callback_failure(self):
+        self.registry.callback('broken', 'Broken', lambda: 1 / 0)
+        self.assertEqual(self.registry.render(), '# HELP broken Broken\n# TYPE broken gauge\n')
+
+    def test_graphql_query(self):
+        client = gqlclient.Client()
+        client.request = mock.MagicMock()
+        client.request.return_value.json.return_value = {'data': {'x': {}}}
+        count = gqlclient.QUERY_SECONDS.series().get(('metricsTest',), (0, 0))[0]
+        client.query('metricsTest', {}, 'query')
+        client.request.side_effect = requests.exceptions.ReadTimeout()
+        with self.assertRaises(requests.exceptions.Timeout):
+            client.query('metricsTest', {}, 'query')
+        self.assertEqual(gqlclient.QUERY_SECONDS.series()[('metricsTest',)][0], count + 2)
+        self.assertEqual(gqlclient.QUERY_ERRORS.values()[('metricsTest', 'timeout')], 1)
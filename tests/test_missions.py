@@ -0,0 +1,103 @@
+from unittest import TestCase, mock
+
+from cli import missions
+from snail.gqlclient.types import Race
+
+
+class TestMissionCoordinator(TestCase):
+    def setUp(self) -> None:
+        self.client = mock.MagicMock()
+        self.client.iterate_mission_races.side_effect = lambda: iter(
+            [
+                Race({'id': 1, 'athletes': [10, 11, 12], 'participation': False}),
+                Race({'id': 2, 'athletes': [20, 21, 22, 23, 24, 25, 26, 27, 28], 'participation': False}),
+            ]
+        )
+        self.coordinator = missions.MissionCoordinator(self.client)
+
+    def test_owner_races(self):
+        races = self.coordinator.owner_races('owner1', {11, 99})
+        self.assertEqual([(r.id, r.participation) for r in races], [(1, True), (2, False)])
+        races = self.coordinator.owner_races('owner2', {28})
+        self.assertEqual([(r.id, r.participation) for r in races], [(1, False), (2, True)])
+        # shared feed, fetched once
+        self.assertEqual(self.client.iterate_mission_races.call_count, 1)
+
+    def test_ttl(self):
+        self.coordinator.races()
+        self.coordinator.races()
+        self.assertEqual(self.client.iterate_mission_races.call_count, 1)
+        with mock.patch('time.monotonic', return_value=self.coordinator._fetched_at + missions.MISSION_FEED_TTL + 1):
+            self.coordinator.races()
+        self.assertEqual(self.client.iterate_mission_races.call_count, 2)
+        self.coordinator.invalidate()
+        self.coordinator.races()
+        self.assertEqual(self.client.iterate_mission_races.call_count, 3)
+
+    def test_claims(self):
+        self.coordinator.races()
+        self.assertTrue(self.coordinator.claim(2, 'owner1'))
+        self.assertTrue(self.coordinator.claim(2, 'owner1'))
+        self.assertFalse(self.coordinator.claim(2, 'owner2'))
+        self.assertEqual([r.id for r in self.coordinator.owner_races('owner1', set())], [1, 2])
+        self.assertEqual([r.id for r in self.coordinator.owner_races('owner2', set())], [1])
+        # claims are reset with a new feed
+        self.coordinator.invalidate()
+        self.assertEqual([r.id for r in self.coordinator.owner_races('owner2', set())], [1, 2])
+
+    def test_joined(self):
+        races = self.coordinator.owner_races('owner1', set())
+        self.coordinator.joined(2, 99)
+        # copies returned to wallets are not changed
+        self.assertEqual(len(races[1].athletes), 9)
+        races = self.coordinator.owner_races('owner2', set())
+        self.assertEqual(len(races[1].athletes), 10)
+        races = self.coordinator.owner_races('owner1', {99})
+        self.assertTrue(races[1].participation)
+
+
+class TestRaceWatcher(TestCase):
+    def setUp(self) -> None:
+        self.races = []
+        self.watcher = missions.RaceWatcher(lambda: self.races, min_interval=2, max_interval=60)
+
+    def _race(self, race_id, athletes):
+        return Race({'id': race_id, 'athletes': list(range(athletes))})
+
+    def test_observe(self):
+        changes = self.watcher.observe([self._race(1, 5), self._race(2, 9)], now=0)
+        self.assertEqual([r.id for r in changes.new_races], [1, 2])
+        self.assertEqual([r.id for r in changes.last_spots], [2])
+
+        changes = self.watcher.observe([self._race(1, 9), self._race(2, 9)], now=10)
+        self.assertEqual(changes.new_races, [])
+        # race 2 was already a last spot
+        self.assertEqual([r.id for r in changes.last_spots], [1])
+
+        changes = self.watcher.observe([self._race(1, 9), self._race(2, 9)], now=20)
+        self.assertFalse(changes)
+
+    def test_interval(self):
+        # no history, back off
+        self.watcher.observe([self._race(1, 2)], now=0)
+        self.assertEqual(self.watcher.interval(), 60)
+        # 1 athlete per 10 seconds, 6 missing: eta 60s, poll in half
+        self.watcher.observe([self._race(1, 3)], now=10)
+        self.assertEqual(self.watcher.interval(), 30)
+        # new race uses the rate learnt from others
+        self.watcher.observe([self._race(1, 3), self._race(2, 7)], now=10)
+        self.assertEqual(self.watcher.interval(), 10)
+        # one join away from a last spot
+        self.watcher.observe([self._race(1, 8)], now=20)
+        self.assertEqual(self.watcher.interval(), 2)
+
+    def test_tick(self):
+        self.races = [self._race(1, 2)]
+        with mock.patch('time.monotonic', return_value=100):
+            self.assertTrue(self.watcher.tick())
+        with mock.patch('time.monotonic', return_value=110):
+            # next poll only after `max_interval`
+            self.races = [self._race(1, 9)]
+            self.assertFalse(self.watcher.tick())
+        with mock.patch('time.monotonic', return_value=161):
+            self.assertEqual([r.id for r in self.watcher.tick().last_spots], [1])
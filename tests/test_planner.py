@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from cli import planner
+from cli.types import RaceCandidate
+from snail.gqlclient.types import Race, Snail
+
+
+def _snail(snail_id, tickets=0, slime_boost=1):
+    return Snail(
+        {
+            'id': snail_id,
+            'adaptations': [],
+            'purity': 1,
+            'slime_boost': slime_boost,
+            'stats': {'mission_tickets': tickets},
+        }
+    )
+
+
+class Test(TestCase):
+    def test_plan_missions(self):
+        s1, s2 = _snail(1), _snail(2)
+        race1 = Race({'id': 10, 'athletes': [1, 2, 3]})
+        race2 = Race({'id': 20, 'athletes': [1, 2, 3, 4]})
+        # greedy (race2 first) would pick s1 for race2 and leave race1 with a 0-score snail
+        plan = planner.plan_missions(
+            [
+                (race2, [RaceCandidate(2, s1), RaceCandidate(1, s2)]),
+                (race1, [RaceCandidate(2, s1), RaceCandidate(0, s2)]),
+            ],
+            set(),
+        )
+        self.assertEqual([(p.race.id, p.snail.id, p.score) for p in plan], [(20, 2, 1), (10, 1, 2)])
+
+    def test_plan_missions_fullest_first(self):
+        s1, s2 = _snail(1), _snail(2)
+        race1 = Race({'id': 10, 'athletes': [1, 2, 3]})
+        race2 = Race({'id': 20, 'athletes': [1, 2, 3, 4]})
+        # same total score either way: the fullest race gets its best candidate (s1), as the greedy order did
+        for races in (
+            [
+                (race1, [RaceCandidate(1, s1), RaceCandidate(1, s2)]),
+                (race2, [RaceCandidate(1, s1), RaceCandidate(1, s2)]),
+            ],
+            [
+                (race2, [RaceCandidate(1, s1), RaceCandidate(1, s2)]),
+                (race1, [RaceCandidate(1, s1), RaceCandidate(1, s2)]),
+            ],
+        ):
+            plan = planner.plan_missions(races, set())
+            self.assertEqual([(p.race.id, p.snail.id) for p in plan], [(20, 1), (10, 2)])
+
+    def test_plan_missions_ties_after_no_join(self):
+        s1, s2, s3 = _snail(1), _snail(2), _snail(3)
+        race1 = Race({'id': 10, 'athletes': [1]})
+        race2 = Race({'id': 20, 'athletes': [1, 2]})
+        race3 = Race({'id': 30, 'athletes': [1, 2, 3]})
+        # race3 (fullest) has no candidates, the column it is left on does not keep race2 from its best candidate
+        plan = planner.plan_missions(
+            [
+                (race1, [RaceCandidate(2, s1)]),
+                (race2, [RaceCandidate(2, s1), RaceCandidate(1, s3), RaceCandidate(1, s2)]),
+                (race3, []),
+            ],
+            set(),
+        )
+        self.assertEqual([(p.race.id, p.snail.id) for p in plan], [(20, 3), (10, 1)])
+
+    def test_plan_missions_fewer_tickets(self):
+        s1, s2 = _snail(1, tickets=10), _snail(2, tickets=2)
+        race = Race({'id': 10, 'athletes': [1] * 9})
+        plan = planner.plan_missions([(race, [RaceCandidate(1, s1), RaceCandidate(1, s2)])], {1, 2})
+        self.assertEqual([(p.race.id, p.snail.id) for p in plan], [(10, 2)])
+        # not boosted, tickets are ignored
+        plan = planner.plan_missions([(race, [RaceCandidate(1, s1), RaceCandidate(1, s2)])], set())
+        self.assertEqual([(p.race.id, p.snail.id) for p in plan], [(10, 1)])
+
+    def test_plan_missions_no_candidates(self):
+        race = Race({'id': 10, 'athletes': []})
+        self.assertEqual(planner.plan_missions([(race, [])], set()), [])
+        self.assertEqual(planner.plan_missions([], set()), [])
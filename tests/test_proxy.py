@@ -0,0 +1,68 @@
+from unittest import TestCase, mock
+
+import requests
+
+from snail import proxy
+
+
+@mock.patch('snail.proxy._free_port', new=mock.MagicMock(return_value=1234))
+class Test(TestCase):
+    @mock.patch('snail.proxy._free_port', new=mock.MagicMock(return_value=1234))
+    def setUp(self) -> None:
+        self.pool = proxy.ProxyPool(mock.MagicMock(), size=3, upstream_proxies=['http://a', 'http://b'])
+        for i, m in enumerate(self.pool.members):
+            m.proxy = mock.MagicMock()
+            m.proxy.url.return_value = f'http://127.0.0.1:{i}'
+        self.session = mock.MagicMock()
+        self.session.post.return_value.status_code = 200
+
+    def test_upstreams(self):
+        pool = proxy.ProxyPool(mock.MagicMock(), size=3, upstream_proxies=['http://a', 'http://b'])
+        self.assertEqual([m.proxy._upstream for m in pool.members], ['http://a', 'http://b', 'http://a'])
+
+    def test_round_robin(self):
+        for _ in range(3):
+            self.pool.post(self.session, json={})
+        urls = [c.args[0] for c in self.session.post.call_args_list]
+        self.assertEqual(sorted(urls), ['http://127.0.0.1:0', 'http://127.0.0.1:1', 'http://127.0.0.1:2'])
+
+    def test_least_loaded(self):
+        m1 = self.pool.pick()
+        m2 = self.pool.pick()
+        m3 = self.pool.pick()
+        self.assertEqual(len({m1, m2, m3}), 3)
+        self.pool._record(m2, 200)
+        self.assertIs(self.pool.pick(), m2)
+
+    def test_bench_blocked(self):
+        bad = self.pool.members[0]
+        for _ in range(proxy.BENCH_BLOCKED):
+            bad.inflight += 1
+            self.pool._record(bad, 403)
+        self.assertGreater(bad.benched_until, 0)
+        self.assertEqual(bad.block_rate, 1)
+        for _ in range(4):
+            self.pool.post(self.session, json={})
+        urls = {c.args[0] for c in self.session.post.call_args_list}
+        self.assertNotIn('http://127.0.0.1:0', urls)
+
+    def test_connection_error_failover(self):
+        ok = mock.MagicMock(status_code=200)
+        self.session.post.side_effect = [requests.exceptions.ConnectionError(), ok]
+        self.assertIs(self.pool.post(self.session, json={}), ok)
+        down = [m for m in self.pool.members if m.down]
+        self.assertEqual(len(down), 1)
+        self.assertEqual(sum(m.inflight for m in self.pool.members), 0)
+        # health check brings it back once it accepts connections
+        down[0].proxy.ready.return_value = True
+        self.pool.check()
+        self.assertFalse(down[0].down)
+
+    def test_check_restarts(self):
+        dead = self.pool.members[1]
+        dead.proxy.alive.return_value = False
+        dead.proxy.ready.return_value = False
+        self.pool.check()
+        dead.proxy.start.assert_called_once_with(wait_for_ready=False)
+        self.assertTrue(dead.down)
+        self.pool.members[0].proxy.start.assert_not_called()
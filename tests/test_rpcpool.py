@@ -0,0 +1,105 @@
+import json
+import time
+from unittest import TestCase, mock
+
+import requests
+
+from snail import deadline, rpcpool
+
+
+def _response(result=None, error=None):
+    r = mock.MagicMock()
+    body = {'jsonrpc': '2.0', 'id': 1}
+    if error is not None:
+        body['error'] = error
+    else:
+        body['result'] = result
+    r.content = json.dumps(body).encode()
+    return r
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.provider = rpcpool.PooledHTTPProvider(['http://a', 'http://b', 'http://c'], broadcast=2)
+        self.a, self.b, self.c = self.provider.endpoints
+        for e in self.provider.endpoints:
+            e.session = mock.MagicMock()
+
+    def test_prefers_fastest(self):
+        self.a.latency, self.b.latency, self.c.latency = 0.3, 0.1, 0.2
+        self.b.session.post.return_value = _response('0x1')
+        self.assertEqual(self.provider.make_request('eth_blockNumber', [])['result'], '0x1')
+        self.a.session.post.assert_not_called()
+        self.c.session.post.assert_not_called()
+        self.assertEqual(self.b.requests, 1)
+
+    def test_failover_reads(self):
+        self.a.latency, self.b.latency, self.c.latency = 0.1, 0.2, 0.3
+        self.a.session.post.side_effect = requests.exceptions.ConnectionError()
+        self.b.session.post.return_value = _response('0x2')
+        self.assertEqual(self.provider.make_request('eth_blockNumber', [])['result'], '0x2')
+        self.assertEqual(self.a.errors, 1)
+        # errors push the endpoint down
+        self.assertEqual([e.uri for e in self.provider.ranked()], ['http://b', 'http://c', 'http://a'])
+
+    def test_bench(self):
+        self.a.latency, self.b.latency, self.c.latency = 0.1, 0.2, 0.3
+        self.a.session.post.side_effect = requests.exceptions.Timeout()
+        self.b.session.post.return_value = _response('0x2')
+        for _ in range(rpcpool.BENCH_ERRORS):
+            self.a.latency = 0.01
+            self.provider.make_request('eth_blockNumber', [])
+        self.assertGreater(self.a.benched_until, 0)
+        self.a.latency = 0.01
+        self.assertEqual(self.provider.ranked()[-1].uri, 'http://a')
+
+    def test_broadcast(self):
+        self.a.latency, self.b.latency, self.c.latency = 0.1, 0.2, 0.3
+        self.a.session.post.return_value = _response(error={'code': -32000, 'message': 'already known'})
+        self.b.session.post.return_value = _response('0xhash')
+        self.assertEqual(self.provider.make_request('eth_sendRawTransaction', ['0x00'])['result'], '0xhash')
+        self.a.session.post.assert_called_once()
+        # only sent to best 2
+        self.c.session.post.assert_not_called()
+
+    def test_broadcast_all_errors(self):
+        error = {'code': -32000, 'message': 'insufficient funds for gas * price + value'}
+        self.a.session.post.return_value = _response(error=error)
+        self.b.session.post.side_effect = requests.exceptions.ConnectionError()
+        self.c.session.post.side_effect = requests.exceptions.ConnectionError()
+        self.assertEqual(self.provider.make_request('eth_sendRawTransaction', ['0x00'])['error'], error)
+
+    def test_non_idempotent(self):
+        self.provider.broadcast = 1
+        self.a.latency, self.b.latency, self.c.latency = 0.1, 0.2, 0.3
+        self.a.session.post.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.provider.make_request('eth_sendRawTransaction', ['0x00'])
+        self.b.session.post.assert_not_called()
+
+    def test_deadline(self):
+        self.a.latency, self.b.latency, self.c.latency = 0.1, 0.2, 0.3
+        self.a.session.post.return_value = _response('0x1')
+        self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual(self.a.session.post.call_args.kwargs['timeout'], rpcpool.DEFAULT_TIMEOUT)
+        with deadline.deadline(2):
+            self.provider.make_request('eth_blockNumber', [])
+        self.assertLessEqual(self.a.session.post.call_args.kwargs['timeout'], 2)
+
+        # no failover once the deadline expires
+        def _timeout(*args, **kwargs):
+            time.sleep(kwargs['timeout'])
+            raise requests.exceptions.Timeout()
+
+        self.a.session.post.side_effect = _timeout
+        with deadline.deadline(0.01):
+            with self.assertRaises(requests.exceptions.Timeout):
+                self.provider.make_request('eth_blockNumber', [])
+        self.b.session.post.assert_not_called()
+        # cut short by the deadline, not an endpoint error
+        self.assertEqual(self.a.errors, 0)
+
+    def test_get_provider(self):
+        p1 = rpcpool.get_provider('http://x1,http://x2')
+        self.assertIs(rpcpool.get_provider(['http://x1', 'http://x2']), p1)
+        self.assertIsNot(rpcpool.get_provider('http://x1'), p1)
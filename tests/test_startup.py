@@ -0,0 +1,34 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest import TestCase
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _loaded_modules(code: str) -> set[str]:
+    out = subprocess.check_output(
+        [sys.executable, '-c', f'{code}\nimport sys\nprint("\\n".join(sys.modules))'],
+        cwd=ROOT,
+        text=True,
+    )
+    return set(out.splitlines())
+
+
+class Test(TestCase):
+    def test_cli_cold_start(self):
+        modules = _loaded_modules('import cli')
+        self.assertIn('cli.cli', modules)
+        # only loaded when --notify is used or something is rendered
+        self.assertNotIn('telegram', modules)
+        self.assertNotIn('jinja2', modules)
+        # ABIs loaded on first contract use
+        self.assertNotIn('snail.contracts.traderjoe', modules)
+        self.assertNotIn('snail.contracts.snail_race', modules)
+
+    def test_notify_loads_telegram(self):
+        modules = _loaded_modules(
+            'import cli\ncli.build_parser().parse_args(["--notify", "123:a", "2", "bot"], config_file_contents="")'
+        )
+        self.assertIn('telegram', modules)
+        self.assertIn('cli.tgbot', modules)
@@ -1,9 +1,11 @@
+import threading
 from unittest import TestCase, mock
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.user import User
 
 from cli import tempconfigparser, tgbot
+from snail import metrics
 from snail.web3client import _MultiCallResult
 
 
@@ -64,6 +66,9 @@ class Test(TestCase):
 /markettournament - Show market great buys for this month's tournament
 /balancebalance - Distribute AVAX balance from richest wallet to the others
 /reloadsnails - Reset snails cache (and reload wallet guilds)
+/jobs - Running commands (cancel them)
+/perf - Performance summary (latencies, errors, waits and caches)
+/memory - Memory usage (cache sizes and top allocators)
 /settings - Toggle bot settings
 /usethisformissions - Use this chat for mission join notifications'''
         )
@@ -124,6 +129,7 @@ class Test(TestCase):
                 'css_minimum',
                 'fee_spike',
                 'mission_priority_fee',
+                'profile_ticks',
             ],
         )
 
@@ -145,6 +151,9 @@ class Test(TestCase):
                 'data_dir',
                 None,
                 None,
+                'db_backend',
+                None,
+                None,
                 'balance_balance',
                 None,
                 None,
@@ -420,7 +429,7 @@ class Test(TestCase):
         self.cli.client.web3.balance_of_slime = lambda raw=True: 1
         self.cli.client.web3.get_balance = lambda: 2
         self.cli.client.web3.claim_rewards = lambda *a, **b: {'logs': [{'data': '0x1'}]}
-        self.cli.client.web3.web3.eth.wait_for_transaction_receipt = lambda *a, **b: {
+        self.cli.client.web3.wait_for_transaction_receipt = lambda *a, **b: {
             'status': 1,
             'logs': [{'data': '0x1'}],
         }
@@ -432,7 +441,7 @@ class Test(TestCase):
         cli2.client.web3.balance_of_slime = lambda raw=True: 3
         cli2.client.web3.get_balance = lambda: 4
         cli2.client.web3.claim_rewards = lambda *a, **b: {'logs': [{'data': '0x3'}]}
-        cli2.client.web3.web3.eth.wait_for_transaction_receipt = lambda *a, **b: {
+        cli2.client.web3.wait_for_transaction_receipt = lambda *a, **b: {
             'status': 2,
             'logs': [{'data': '0x3'}],
         }
@@ -502,7 +511,7 @@ class Test(TestCase):
         self.cli.client.web3.balance_of_slime = lambda raw=True: 1
         self.cli.client.web3.get_balance = lambda: 2
         self.cli.client.web3.transfer_slime = lambda *a, **b: {'logs': [{'data': '0x1'}]}
-        self.cli.client.web3.web3.eth.wait_for_transaction_receipt = lambda *a, **b: {'logs': [{'data': '0x1'}]}
+        self.cli.client.web3.wait_for_transaction_receipt = lambda *a, **b: {'logs': [{'data': '0x1'}]}
         cli2 = mock.MagicMock(
             owner='0x3fff',
             args=mock.MagicMock(wtv=False),
@@ -511,7 +520,7 @@ class Test(TestCase):
         cli2.client.web3.balance_of_slime = lambda raw=True: 3
         cli2.client.web3.get_balance = lambda: 4
         cli2.client.web3.transfer_slime = lambda *a, **b: {'logs': [{'data': '0x3'}]}
-        cli2.client.web3.web3.eth.wait_for_transaction_receipt = lambda *a, **b: {'logs': [{'data': '0x3'}]}
+        cli2.client.web3.wait_for_transaction_receipt = lambda *a, **b: {'logs': [{'data': '0x3'}]}
         self.bot.register_cli(cli2)
 
         self.update.callback_query = mock.MagicMock(data='swapsend')
@@ -567,7 +576,7 @@ class Test(TestCase):
         self.cli.client.web3.get_balance = lambda: 2
         self.cli.client.web3.claim_rewards = lambda *a, **b: {'logs': [{'data': '0x1'}]}
         self.cli.client.web3.transfer_slime = lambda *a, **b: {'logs': [{'data': '0x1'}]}
-        self.cli.client.web3.web3.eth.wait_for_transaction_receipt.side_effect = [
+        self.cli.client.web3.wait_for_transaction_receipt.side_effect = [
             {
                 'status': 1,
                 'logs': [{'data': '0x1'}],
@@ -584,7 +593,7 @@ class Test(TestCase):
         cli2.client.web3.get_balance = lambda: 4
         cli2.client.web3.claim_rewards = lambda *a, **b: {'logs': [{'data': '0x3'}]}
         cli2.client.web3.transfer_slime = lambda *a, **b: {'logs': [{'data': '0x3'}]}
-        cli2.client.web3.web3.eth.wait_for_transaction_receipt.side_effect = [
+        cli2.client.web3.wait_for_transaction_receipt.side_effect = [
             {
                 'status': 2,
                 'logs': [{'data': '0x3'}],
@@ -690,6 +699,102 @@ Swapped 1.50 SLIME for 0.01 AVAX ✅''',
             ),
         )
 
+    def test_background_jobs(self):
+        self.bot.jobs.start()
+        self.addCleanup(self.bot.jobs.stop)
+        release = threading.Event()
+        job = self.bot.jobs.submit('inventory', release.wait, 5)
+        self.bot.cmd_inventory(self.update, self.context)
+        self.update.effective_message.reply_markdown.assert_called_once_with(
+            '`inventory` is already running, check /jobs'
+        )
+        self.update.reset_mock()
+        self.bot.cmd_jobs(self.update, self.context)
+        keyboard = self.update.message.reply_markdown.call_args.kwargs['reply_markup'].inline_keyboard
+        self.assertEqual(keyboard[0][0].callback_data, f'cancel {job.id}')
+        release.set()
+        job.future.result(5)
+
+    def test_job_cancel_button(self):
+        self.bot.jobs.start()
+        self.addCleanup(self.bot.jobs.stop)
+        m = mock.MagicMock()
+
+        def _progress(final=False):
+            tgbot.progress_edit_text(m, text='loading')
+            if final:
+                tgbot.result_edit_text(m, text='done')
+
+        # cancel button only while running, removed once the job is done
+        self.bot.jobs.submit('inventory', _progress).future.result(5)
+        keyboard = m.edit_text.call_args.kwargs['reply_markup'].inline_keyboard
+        self.assertEqual(keyboard[0][0].text, '✋ Cancel')
+        m.edit_reply_markup.assert_called_once_with(reply_markup=None)
+        # the final edit replaces it
+        m.reset_mock()
+        self.bot.jobs.submit('inventory', _progress, True).future.result(5)
+        self.assertEqual(m.edit_text.call_args, mock.call(text='done'))
+        m.edit_reply_markup.assert_not_called()
+        # progress edits are not trivial, failures are raised
+        m.reset_mock()
+        m.edit_text.side_effect = ValueError('failed')
+        with self.assertRaises(ValueError):
+            self.bot.jobs.submit('inventory', _progress).future.result(5)
+
+    def test_perf(self):
+        registry = metrics.Registry()
+        query = registry.histogram('snail_graphql_query_seconds', 'x', ('operation',))
+        query.observe(0.2, 'getMissionRaces')
+        query.observe(0.3, 'getMissionRaces')
+        registry.counter('snail_graphql_errors_total', 'x', ('operation', 'error')).inc('getMissionRaces', '429')
+        cache = registry.counter('snail_cache_requests_total', 'x', ('cache', 'result'))
+        cache.inc('my_snails', 'hit', amount=3)
+        cache.inc('my_snails', 'miss')
+        with mock.patch('snail.metrics.REGISTRY', registry):
+            self.bot.cmd_perf(self.update, self.context)
+        self.update.message.reply_markdown.assert_called_once_with(
+            '''*GraphQL*
+`getMissionRaces`: 2 in 0.5s, avg 0.25s, p95 ≤0.5s, ❌ 1
+*RPC*
+_nothing yet_
+*Ticks*
+_nothing yet_
+*Waiting for rate limit*
+_nothing yet_
+*Caches*
+`my_snails`: 75% hits of 4'''
+        )
+
+    @mock.patch('cli.memory.sizes', return_value={'notifier.sent_messages': 3, 'cli.snail_levels': 120})
+    @mock.patch('cli.memory.rss', return_value=50 * 1024 * 1024)
+    def test_memory(self, *_):
+        with mock.patch('tracemalloc.is_tracing', return_value=False), mock.patch('tracemalloc.start') as start:
+            self.bot.cmd_memory(self.update, self.context)
+        start.assert_called_once_with(1)
+        self.update.message.reply_markdown.assert_called_once_with(
+            '''*RSS*: 50.0 MB
+*Structures*
+`cli.snail_levels`: 120
+`notifier.sent_messages`: 3
+*Top allocators*
+_tracing started, check again later_'''
+        )
+
+        self.update.message.reply_markdown.reset_mock()
+        with mock.patch('tracemalloc.is_tracing', return_value=True), mock.patch(
+            'cli.memory.traced', return_value=(2 * 1024 * 1024, 3 * 1024 * 1024)
+        ), mock.patch('cli.memory.top_allocators', return_value=[('/app/cli/cli.py:42', 10240, 20)]):
+            self.bot.cmd_memory(self.update, self.context)
+        self.update.message.reply_markdown.assert_called_once_with(
+            '''*RSS*: 50.0 MB
+*Structures*
+`cli.snail_levels`: 120
+`notifier.sent_messages`: 3
+*Top allocators*
+traced 2.0 MB (peak 3.0 MB)
+`cli/cli.py:42`: 10 KB in 20 blocks'''
+        )
+
     def test_notify(self):
         send_mock = mock.MagicMock()
         self.bot.updater.bot.send_message = send_mock
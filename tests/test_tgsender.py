@@ -0,0 +1,74 @@
+from unittest import TestCase, mock
+
+from telegram.error import RetryAfter
+
+from cli import tgsender
+
+
+@mock.patch('cli.tgsender.CHAT_INTERVAL', 0)
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.bot = mock.MagicMock()
+        self.bot.send_message.side_effect = lambda chat_id, *a, **b: {
+            'chat': {'id': chat_id},
+            'message_id': self.bot.send_message.call_count,
+        }
+        self.sender = tgsender.TelegramSender(self.bot, coalesce=0.05, edit_interval=0.1)
+
+    def tearDown(self) -> None:
+        self.sender.stop()
+
+    def test_coalesce(self):
+        self.sender.start()
+        m1 = self.sender.send(1, 'hello', parse_mode='Markdown')
+        m2 = self.sender.send(1, 'world', parse_mode='Markdown')
+        # different chat
+        m3 = self.sender.send(2, 'other', parse_mode='Markdown')
+        self.assertEqual(m1.result(5), m2.result(5))
+        m3.result(5)
+        self.assertEqual(
+            self.bot.send_message.call_args_list,
+            [
+                mock.call(1, 'hello\n\nworld', parse_mode='Markdown', disable_notification=False, reply_markup=None),
+                mock.call(2, 'other', parse_mode='Markdown', disable_notification=False, reply_markup=None),
+            ],
+        )
+
+    def test_no_coalesce_with_actions(self):
+        self.sender.start()
+        self.sender.send(1, 'hello')
+        self.sender.send(1, 'join?', reply_markup='buttons').result(5)
+        self.assertEqual(self.bot.send_message.call_count, 2)
+
+    def test_edit_before_send(self):
+        m = self.sender.send(1, 'hello')
+        self.sender.edit(m, 'hello again')
+        self.sender.start()
+        m.result(5)
+        self.bot.send_message.assert_called_once_with(
+            1, 'hello again', parse_mode=None, disable_notification=False, reply_markup=None
+        )
+        self.bot.edit_message_text.assert_not_called()
+
+    def test_edit_debounce(self):
+        self.sender.start()
+        m = self.sender.send(1, 'a', parse_mode='Markdown')
+        m.result(5)
+        for text in ('a b', 'a b c', 'a b c d'):
+            self.sender.edit(m, text, parse_mode='Markdown')
+        self.sender.stop()
+        self.bot.edit_message_text.assert_called_once_with('a b c d', 1, 1, parse_mode='Markdown')
+
+    def test_edit_message(self):
+        self.sender.edit({'chat': {'id': 1}, 'message_id': 9}, 'x')
+        self.sender.edit({'chat': {'id': 1}, 'message_id': 9}, 'y')
+        self.sender.start()
+        self.sender.stop()
+        self.bot.edit_message_text.assert_called_once_with('y', 1, 9, parse_mode=None)
+
+    def test_retry_after(self):
+        self.bot.send_message.side_effect = [RetryAfter(0.05), {'chat': {'id': 1}, 'message_id': 1}]
+        self.sender.start()
+        m = self.sender.send(1, 'hello')
+        self.assertEqual(m.result(5), {'chat': {'id': 1}, 'message_id': 1})
+        self.assertEqual(self.bot.send_message.call_count, 2)
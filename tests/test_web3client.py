@@ -1,6 +1,10 @@
 from unittest import TestCase, mock
 
-from snail.web3client import DECIMALS, Client, _MultiCallResult
+import eth_abi
+from web3 import exceptions
+
+from snail import abicodec, contracts
+from snail.web3client import DECIMALS, Client, Web3Error, _MultiCallResult
 
 from .test_cli import TEST_WALLET, TEST_WALLET_WALLET
 
@@ -34,13 +38,20 @@ class Test(TestCase):
         )
         self.assertEqual(tx, {'gasUsed': 10, 'effectiveGasPrice': 25000000000})
 
-    def test_multicall_all(self):
-        self.cli.web3.to_int = lambda x: x
-
-        self.cli.multicall_contract.functions.aggregate.return_value.call.return_value = (
-            [],
-            [1, 2 * DECIMALS, 3 * DECIMALS, 4 * DECIMALS, 5 * DECIMALS, 5 * DECIMALS, 6 * DECIMALS],
+    def _aggregate(self, *values):
+        self.cli.web3.eth.call.return_value = eth_abi.encode(
+            ['uint256', 'bytes[]'], [1, [eth_abi.encode(['uint256'], [v]) for v in values]]
         )
+
+    def _aggregate_calls(self):
+        self.cli.web3.eth.call.assert_called_once()
+        tx = self.cli.web3.eth.call.call_args[0][0]
+        self.assertEqual(tx['to'], abicodec.address(contracts.multicall))
+        self.assertEqual(tx['data'][:10], contracts.multicall.FUNCTIONS['aggregate'][0])
+        return eth_abi.decode(['(address,bytes)[]'], bytes.fromhex(tx['data'][10:]))[0]
+
+    def test_multicall_all(self):
+        self._aggregate(1, 2 * DECIMALS, 3 * DECIMALS, 4 * DECIMALS, 5 * DECIMALS, 5 * DECIMALS, 6 * DECIMALS)
         data = self.cli.multicall_balances([TEST_WALLET])
         self.assertEqual(
             data,
@@ -50,25 +61,109 @@ class Test(TestCase):
                 )
             },
         )
-        self.cli.multicall_contract.functions.aggregate.assert_called_once_with(
-            [mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY, mock.ANY]
+        calls = self._aggregate_calls()
+        self.assertEqual(len(calls), 7)
+        self.assertEqual(
+            calls[0],
+            (
+                contracts.snail_nft.CONTRACT.lower(),
+                abicodec.function(contracts.snail_nft, 'balanceOf').encode(TEST_WALLET),
+            ),
         )
 
     def test_multicall_just_one(self):
-        self.cli.web3.to_int = lambda x: x
-
-        self.cli.multicall_contract.functions.aggregate.return_value.call.return_value = (
-            [],
-            [2 * DECIMALS, 1 * DECIMALS],
-        )
+        self._aggregate(2 * DECIMALS, 1 * DECIMALS)
         data = self.cli.multicall_balances([TEST_WALLET], _all=False, unclaimed_slime=True)
         self.assertEqual(data, {TEST_WALLET: _MultiCallResult(unclaimed_slime=3)})
-        self.cli.multicall_contract.functions.aggregate.assert_called_once_with([mock.ANY, mock.ANY])
+        self.assertEqual(len(self._aggregate_calls()), 2)
 
     def test_multicall_snails_and_other(self):
-        self.cli.web3.to_int = lambda x: x
-
-        self.cli.multicall_contract.functions.aggregate.return_value.call.return_value = ([], [1, 2 * DECIMALS])
+        self._aggregate(1, 2 * DECIMALS)
         data = self.cli.multicall_balances([TEST_WALLET], _all=False, snails=True, slime=True)
         self.assertEqual(data, {TEST_WALLET: _MultiCallResult(snails=1, slime=2)})
-        self.cli.multicall_contract.functions.aggregate.assert_called_once_with([mock.ANY, mock.ANY])
+        self.assertEqual(len(self._aggregate_calls()), 2)
+
+    def test_encoded_call(self):
+        self.cli.web3.eth.gasPrice = 25000000000
+        estimated = []
+        # copy, as the same dict gets the estimated gas afterwards
+        self.cli.web3.eth.estimate_gas.side_effect = lambda tx: estimated.append(dict(tx)) or 50000
+        self.cli.web3.eth.send_raw_transaction.return_value = b'hash'
+        self.cli.transfer_snail(TEST_WALLET, TEST_WALLET, 1, wait_for_transaction_receipt=False)
+        (tx,) = estimated
+        # a gas limit would cap the estimate
+        self.assertNotIn('gas', tx)
+        # same calldata as web3 contract functions
+        self.assertEqual(
+            tx['data'],
+            Client(TEST_WALLET, 'x').snailnft_contract.encodeABI('transferFrom', args=(TEST_WALLET, TEST_WALLET, 1)),
+        )
+        self.assertEqual(tx['to'], abicodec.address(contracts.snail_nft))
+        self.assertEqual(tx['chainId'], 40000)
+        self.cli.web3.eth.send_raw_transaction.assert_called_once()
+        # estimated once, not sent
+        estimated.clear()
+        receipt = self.cli.transfer_snail(TEST_WALLET, TEST_WALLET, 1, estimate_only=True)
+        self.assertEqual(receipt['gasUsed'], 50000)
+        self.assertEqual(len(estimated), 1)
+        self.cli.web3.eth.send_raw_transaction.assert_called_once()
+
+    def test_pending_nonces(self):
+        self.cli.web3.eth.gasPrice = 25000000000
+        self.cli.web3.eth.estimate_gas.return_value = 50000
+        self.cli.web3.eth.send_raw_transaction.return_value = b'hash'
+        join = ((1, 2, TEST_WALLET), 1, ((1, 0, [], []), (1, 0, [], [])), 100, 1, b'\x00' * 65)
+        with mock.patch.object(self.cli.account, 'sign_transaction') as sign_mock:
+            # node still reports the latest count, both joins are pending
+            self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.assertEqual([c[0][0]['nonce'] for c in sign_mock.call_args_list], [1, 2])
+            self.cli.web3.eth.getTransactionCount.assert_called_once_with(TEST_WALLET, 'pending')
+
+            # resync after a rejected transaction
+            self.cli.web3.eth.send_raw_transaction.side_effect = ValueError(
+                {'code': -32000, 'message': 'nonce too low'}
+            )
+            with self.assertRaises(Web3Error):
+                self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.cli.web3.eth.getTransactionCount.return_value = 5
+            self.cli.web3.eth.send_raw_transaction.side_effect = None
+            self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.assertEqual([c[0][0]['nonce'] for c in sign_mock.call_args_list], [1, 2, 3, 5])
+
+            # resync after a transaction that was never mined
+            self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.cli.block_watcher = mock.MagicMock()
+            self.cli.block_watcher.wait_until.side_effect = TimeoutError
+            with self.assertRaises(exceptions.TimeExhausted):
+                self.cli.join_daily_mission(*join, wait_for_transaction_receipt=1)
+            self.cli.web3.eth.getTransactionCount.return_value = 7
+            self.cli.join_daily_mission(*join, wait_for_transaction_receipt=False)
+            self.assertEqual([c[0][0]['nonce'] for c in sign_mock.call_args_list], [1, 2, 3, 5, 6, 7, 7])
+
+    def test_shared_registry(self):
+        cli1 = Client(TEST_WALLET, 'http://registry-test', TEST_WALLET_WALLET.account)
+        cli2 = Client('0x0000000000000000000000000000000000000001', 'http://registry-test')
+        self.assertIs(cli1.web3, cli2.web3)
+        self.assertIs(cli1.registry, cli2.registry)
+        with mock.patch.object(cli1.web3.eth, 'contract', side_effect=lambda **_: mock.MagicMock()) as contract_mock:
+            self.assertIs(cli1.race_contract, cli2.race_contract)
+            self.assertIsNot(cli1.race_contract, cli1.snailnft_contract)
+        # ABI parsed once per contract, for all clients
+        self.assertEqual(contract_mock.call_count, 2)
+        # web3 replaced, own registry
+        self.assertIsNot(self.cli.registry.web3, cli1.web3)
+        self.assertEqual(self.cli.chain_id, 40000)
+
+    def test_presign_race_joins(self):
+        with mock.patch.object(self.cli, '_sign_values', side_effect=lambda *a, **k: f'sig{a}') as sign_mock:
+            self.cli.presign_race_joins([(1, 10), (2, 10)]).result()
+            self.assertEqual(sign_mock.call_count, 2)
+            # presigned, popped from cache
+            self.assertEqual(self.cli.sign_race_join(2, 10), 'sig(2, 10)')
+            self.assertEqual(sign_mock.call_count, 2)
+            self.assertEqual(self.cli.sign_race_join(2, 10), 'sig(2, 10)')
+            self.assertEqual(sign_mock.call_count, 3)
+            # other owner, other payload
+            self.cli.sign_race_join(1, 10, owner='0x0000000000000000000000000000000000000001')
+            self.assertEqual(sign_mock.call_count, 4)
@@ -1,13 +1,18 @@
 #!/usr/bin/env python -u
 
+import importlib
 import json
 import re
 import subprocess
+import sys
 import time
+from collections import Counter
 from pathlib import Path
 
 import json5
 import requests
+from eth_utils import function_signature_to_4byte_selector
+from eth_utils.abi import collapse_if_tuple
 
 EXPECTED_CONTRACTS = 12
 CONTRACT_DIR = Path(__file__).absolute().parent / 'snail' / 'contracts'
@@ -28,6 +33,35 @@ def camel_to_snake(name):
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
 
 
+def function_table(abi_definition):
+    """
+    selector, input and output type strings of every function, for snail.abicodec
+    overloaded functions are keyed by signature instead of name
+    """
+    functions = [x for x in abi_definition if x.get('type') == 'function']
+    names = Counter(x['name'] for x in functions)
+    table = {}
+    for x in functions:
+        inputs = tuple(collapse_if_tuple(i) for i in x['inputs'])
+        outputs = tuple(collapse_if_tuple(o) for o in x.get('outputs', []))
+        signature = f'{x["name"]}({",".join(inputs)})'
+        key = x['name'] if names[x['name']] == 1 else signature
+        table[key] = ('0x' + function_signature_to_4byte_selector(signature).hex(), inputs, outputs)
+    return table
+
+
+def contract_module(header, address, abi_definition):
+    return f'''{header}
+
+CONTRACT = '{address}'
+
+ABI = {repr(abi_definition)}
+
+# name => (selector, input types, output types)
+FUNCTIONS = {repr(function_table(abi_definition))}
+'''
+
+
 class Parser:
     def fetch_script(self):
         r = requests.get('https://www.snailtrail.art/')
@@ -125,14 +159,7 @@ class Parser:
             camel = camel_to_snake(contract)
             address = self.contracts[contract]
             f = path / f'{camel}.py'
-            f.write_text(
-                f'''{header}
-
-CONTRACT = '{address}'
-
-ABI = {repr(abi_definition)}
-'''
-            )
+            f.write_text(contract_module(header, address, abi_definition))
 
     def _update_contract(self, address, contract):
         r = requests.get(f'https://api.snowtrace.io/api?module=contract&action=getabi&address={address}')
@@ -140,14 +167,7 @@ ABI = {repr(abi_definition)}
         abi_definition = json.loads(r.json()['result'])
         f = CONTRACT_DIR / f'{contract}.py'
         header = f'# generated automatically - DO NOT MODIFY'
-        f.write_text(
-            f'''{header}
-
-CONTRACT = '{address}'
-
-ABI = {repr(abi_definition)}
-'''
-        )
+        f.write_text(contract_module(header, address, abi_definition))
 
     def update_bulk_transfer(self):
         return self._update_contract('0xee5b5376d71d4af51bdc64ca353f51485fa8d6d5', 'bulk_transfer')
@@ -160,10 +180,33 @@ ABI = {repr(abi_definition)}
 
     def update_init(self):
         path = CONTRACT_DIR
-        modules = [f'from . import {l.stem}' for l in path.glob('*.py') if l.stem != '__init__']
-        modules.sort()
+        modules = sorted(l.stem for l in path.glob('*.py') if l.stem != '__init__')
         header = f'# generated automatically - DO NOT MODIFY'
-        (path / '__init__.py').write_text('\n'.join([header, ''] + modules))
+        # modules are loaded lazily (PEP 562), on first contract use
+        (path / '__init__.py').write_text(
+            f'''{header}
+
+import importlib
+
+__all__ = {repr(modules)}
+
+
+def __getattr__(name):
+    # ABI modules are big, load them on first use
+    if name in __all__:
+        return importlib.import_module(f'.{{name}}', __name__)
+    raise AttributeError(f'module {{__name__!r}} has no attribute {{name!r}}')
+'''
+        )
+
+    def update_functions(self):
+        """regenerate FUNCTIONS of the existing modules (offline)"""
+        for f in CONTRACT_DIR.glob('*.py'):
+            if f.stem == '__init__':
+                continue
+            module = importlib.import_module(f'snail.contracts.{f.stem}')
+            header = f.read_text().split('\n', 1)[0]
+            f.write_text(contract_module(header, module.CONTRACT, module.ABI))
 
     def isort_em(self):
         subprocess.check_call(['isort', CONTRACT_DIR])
@@ -192,7 +235,12 @@ ABI = {repr(abi_definition)}
 
 
 def main():
-    Parser().run()
+    if '--functions-only' in sys.argv[1:]:
+        p = Parser()
+        p.update_functions()
+        p.black_em()
+    else:
+        Parser().run()
 
 
 if __name__ == '__main__':